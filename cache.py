@@ -1,16 +1,23 @@
-import subprocess, requests, shutil, sys, bs4, re, os # Default Python libraries
+import requests, asyncio, argparse, json, sys, bs4, re, os # Default Python libraries
 
-from client.client import * # Importing The Client/Task Manager
+from client.enroll import enroll_images # Importing Parallel Bulk Enrollment
+from client.store import open_store # Importing The Encoding Store
 from client.config import * # Importing The Config File
 
-from typing import List # Type Hinting
+from concurrent.futures import ThreadPoolExecutor # Threads Running The Blocking Requests
+from requests.adapters import HTTPAdapter # Pooled Keep-Alive Connections
+from urllib3.util.retry import Retry # Retrying Failed Requests
+from typing import Any, List, Mapping, MutableMapping, Optional, Tuple # Type Hinting
 
 # Global Variables Not In Config (Specific For Caching Only)
-SITE: str          = "https://cornellcuprobotics.com/"
-OUTPUT_PATH: str   = "resources/cache/"
-DOWNLOAD_PATH: str = "resources/download/"
-SIZE: str          = "900x600!"
-EXT: str           = ".JPG"
+SITE: str             = "https://cornellcuprobotics.com/"
+SIZE: Tuple[int, int] = (900, 600)
+EXT: str              = ".JPG"
+CONCURRENCY: int      = 8 # Number Of Images Downloaded At Once
+TIMEOUT: float        = 10.0 # Seconds To Wait For A Server To Connect Or Respond
+RETRIES: int          = 3 # Number Of Times A Failed Or Throttled Request Is Retried
+BACKOFF: float        = 0.5 # Seconds Before The First Retry, Doubled For Every Retry After
+VALIDATORS: str       = "fetched.json" # ETags & Last-Modified Dates Of Downloaded Images (In Cache Directory)
 
 def convert(urlname: str) -> str:
     """
@@ -35,53 +42,172 @@ def convert(urlname: str) -> str:
             break
     return urlname.strip()
 
-def cache_website() -> None:
+class Fetcher:
     """
-    Pulls all files from the members page of the Cornell Cup Robotics website, filters
-    for specific image types, downloads them to a temporary directory, converts them
-    to a specific size using imagemagick, and then loads them onto the cache through
-    the client. Removes the temporary directories after completion.
+    Downloads many images at once over one pooled keep-alive session, with a timeout on every
+    request and retries with backoff on connection errors and throttled or failing servers. The
+    ETag and Last-Modified date of every image are remembered in [cache_dir], so an image fetched
+    conditionally is skipped entirely (a 304 with no body) when it has not changed.
+    """
+
+    def __init__(self: any, concurrency: int = CONCURRENCY, timeout: float = TIMEOUT, retries: int = RETRIES,
+                 cache_dir: str = DEFAULT_CACHE_DIR) -> 'Fetcher':
+        """
+        PARAMETERS
+        ----------
+        concurrency - The number of requests in flight at once, and of pooled connections per host.
+        timeout     - The number of seconds to wait for a server to connect or respond.
+        retries     - The number of times a failed request is retried.
+        cache_dir   - The directory the validators of downloaded images are kept in.
+        """
+
+        self.concurrency: int = max(concurrency, 1); self.timeout: float = timeout
+        self.path: str = os.path.join(cache_dir, VALIDATORS)
+
+        retry: Retry = Retry(total=retries, backoff_factor=BACKOFF, status_forcelist=(429, 500, 502, 503, 504))
+        adapter: HTTPAdapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.concurrency, max_retries=retry)
+        self.session: requests.Session = requests.Session()
+        self.session.mount('http://', adapter); self.session.mount('https://', adapter)
+
+        try:
+            with open(self.path, 'r', encoding=TEXT_ENCODING) as file: self.validators: MutableMapping[str, Mapping[str, str]] = json.load(file)
+        except (OSError, ValueError): self.validators = {}
+
+    def __enter__(self: any) -> 'Fetcher':
+        return self
+
+    def __exit__(self: any, exc_type: any, exc_val: any, exc_tb: any) -> None:
+        self.session.close()
+
+    def get(self: any, url: str, conditional: bool = False) -> Tuple[int, Optional[bytes], Mapping[str, str]]:
+        """
+        Downloads [url], blocking until it is done.
+
+        PARAMETERS
+        ----------
+        url         - The URL to download.
+        conditional - Whether to send the validators last seen for [url], so the server answers 304
+                      (and no body) if it has not changed.
+
+        RAISES
+        ------
+        requests.RequestException - Raised when the request fails after every retry, or is answered
+                                    with an error status.
+
+        RETURNS
+        -------
+        Tuple[int, Optional[bytes], Mapping[str, str]] - The status, the body (None if unchanged),
+        and the validators the server sent.
+        """
+
+        known: Mapping[str, str] = self.validators.get(url, {}) if conditional else {}
+        headers: MutableMapping[str, str] = {}
+        if 'etag' in known: headers['If-None-Match'] = known['etag']
+        if 'modified' in known: headers['If-Modified-Since'] = known['modified']
+
+        response: requests.Response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304: return 304, None, known
+
+        response.raise_for_status()
+        validators: Mapping[str, str] = { key: response.headers[header] for key, header in (('etag', 'ETag'), ('modified', 'Last-Modified'))
+                                          if header in response.headers }
+        return response.status_code, response.content, validators
+
+    async def fetch_all(self: any, urls: List[Tuple[str, bool]], prnt: bool = True) -> List[Tuple[str, Optional[bytes], Optional[str]]]:
+        """
+        Downloads every URL in [urls], [concurrency] at a time, see `get`.
+
+        PARAMETERS
+        ----------
+        urls - Every URL, paired with whether to request it conditionally.
+        prnt - Whether or not to print every download as it finishes.
+
+        RETURNS
+        -------
+        List[Tuple[str, Optional[bytes], Optional[str]]] - For every URL in order, the URL, its body
+        (None if unchanged or failed), and the error (None on success).
+        """
+
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+
+        async def fetch(i: int, url: str, conditional: bool, executor: ThreadPoolExecutor) -> Tuple[str, Optional[bytes], Optional[str]]:
+            try: status, content, validators = await loop.run_in_executor(executor, self.get, url, conditional)
+            except requests.RequestException as exc:
+                if (prnt): print(f"Failed downloading image {i:02}: {url} ({exc})")
+                return url, None, f'{type(exc).__name__}: {exc}'
+
+            if validators: self.validators[url] = validators
+            if (prnt): print(f"Unchanged image {i:02}: {url}" if content is None else f"Finished downloading image {i:02}: {url}")
+            return url, content, None
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return await asyncio.gather(*(fetch(i, url, conditional, executor) for i, (url, conditional) in enumerate(urls)))
+
+    def save(self: any) -> None:
+        """
+        Writes the validators of every downloaded image to the cache directory.
+        """
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path + '.tmp', 'w', encoding=TEXT_ENCODING) as file: json.dump(self.validators, file, indent=1, sort_keys=True)
+        os.replace(self.path + '.tmp', self.path)
+
+def cache_website(site: str = SITE, concurrency: int = CONCURRENCY, cache_dir: str = DEFAULT_CACHE_DIR) -> Mapping[str, int]:
     """
-    os.makedirs(DOWNLOAD_PATH, exist_ok=True)
-    os.makedirs(OUTPUT_PATH, exist_ok=True)
+    Pulls all files from the members page of the Cornell Cup Robotics website, filters
+    for specific image types, downloads them into memory, and then decodes, resizes and
+    encodes them in parallel and loads them onto the cache. Nothing is written to disk
+    except the cache itself. Images are downloaded [concurrency] at a time, and the images
+    of people already cached are requested conditionally, so unchanged ones are skipped.
+
+    PARAMETERS
+    ----------
+    site        - The website, whose members page is `members.html`.
+    concurrency - The number of images downloaded at once.
+    cache_dir   - The directory of the `cache`, default specified by `DEFAULT_CACHE_DIR`.
 
-    response: requests.Response = requests.get(SITE + "members.html")
-    soup: bs4.BeautifulSoup = bs4.BeautifulSoup(response.text, 'html.parser')
-    tags: List[bs4.element.Tag] = soup.find_all('img')
+    RETURNS
+    -------
+    Mapping[str, int] - The number of images downloaded, unchanged and failed.
+    """
 
-    urls: List[str] = [img['src'] for img in tags]
-    urls: List[str] = [img for img in urls if EXT in img]
+    with Fetcher(concurrency=concurrency, cache_dir=cache_dir) as fetcher:
+        response: requests.Response = fetcher.session.get(site + "members.html", timeout=fetcher.timeout)
+        response.raise_for_status()
+        soup: bs4.BeautifulSoup = bs4.BeautifulSoup(response.text, 'html.parser')
+        tags: List[bs4.element.Tag] = soup.find_all('img')
 
-    for i, url in enumerate(urls):
-        urlname: str = re.search(r'/([\w_-]+[.]JPG)$', url).group(1)
-        downloadname: str = DOWNLOAD_PATH + urlname[:-4] + ".jpg"
+        urls: List[str] = [img['src'] for img in tags]
+        urls: List[str] = [img for img in urls if EXT in img]
+        names: MutableMapping[str, str] = {}
 
-        filename: str = OUTPUT_PATH + convert(urlname[:-4]) + ".jpg"
+        for url in urls:
+            urlname: str = re.search(r'/([\w_-]+[.]JPG)$', url).group(1)
+            names['{}{}'.format(site, url) if 'http' not in url else url] = convert(urlname[:-4])
 
-        with open(downloadname, 'wb') as f:
-            if 'http' not in url: url = '{}{}'.format(SITE, url)
-            response = requests.get(url)
-            f.write(response.content)
+        # Only People Already Cached Can Skip Their Image, The Rest (Or Anyone Forgotten) Need It
+        cached: Any = open_store(cache_dir)
+        results: List[Tuple[str, Optional[bytes], Optional[str]]] = asyncio.run(
+            fetcher.fetch_all([(url, name in cached) for url, name in names.items()]))
+        fetcher.save()
 
-        cmdname = "magick" if MAC_MODE else "convert"
-        subprocess.call([cmdname, downloadname, "-resize", SIZE, filename])
-        print(f"Finished downloading image {i:02}: {url}")
+    jobs: List[Tuple[str, bytes]] = [(names[url], content) for url, content, _ in results if content is not None]
+    summary: Mapping[str, int] = { 'downloaded': len(jobs), 'failed': sum(error is not None for _, _, error in results),
+                                   'unchanged': sum(content is None and error is None for _, content, error in results) }
+    print(f"Downloads: {summary}")
 
     print("Started loading all images onto cache.")
-    _ = Client(path=OUTPUT_PATH, open=False)
+    enroll_images(jobs, cache_dir=cache_dir, size=SIZE)
     print("Finished loading all images onto cache.")
-
-    shutil.rmtree(DOWNLOAD_PATH)
-    shutil.rmtree(OUTPUT_PATH)
+    return summary
 
 def cache_images(filenames: str) -> None:
     """
-    Extracts the file paths and makes sure they exists/are valid, then converts
-    them to a specific size using imagemagick, and then loads them onto the cache.
-    Removes the temporary directories after completion.
+    Extracts the file paths and makes sure they exists/are valid, then decodes, resizes
+    and encodes them in parallel and loads them onto the cache.
     """
 
-    os.makedirs(OUTPUT_PATH, exist_ok=True)
+    jobs: List[Tuple[str, str]] = []
 
     for filename in filenames:
         if (not os.path.exists(filename)):
@@ -90,20 +216,20 @@ def cache_images(filenames: str) -> None:
 
         a_index: int = filename.rfind("/")+1 if "/" in filename else 0
         b_index: int = filename.rfind(".") if "." in filename else len(filename)
-        diffname: str = OUTPUT_PATH + convert(filename[a_index:b_index]) + ".jpg"
-
-        cmdname = "magick" if MAC_MODE else "convert"
-        subprocess.call([cmdname, filename, "-resize", SIZE, diffname])
-        print(f"Converted {filename} to {diffname}")
+        jobs.append((convert(filename[a_index:b_index]), filename))
 
     print("Started loading all images onto cache.")
-    _ = Client(path=OUTPUT_PATH, open=False)
+    enroll_images(jobs, size=SIZE)
     print("Finished loading all images onto cache.")
 
-    shutil.rmtree(OUTPUT_PATH)
-
 if __name__ == '__main__':
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description='Caches the encodings of the website\'s members, or of the given files.')
+    parser.add_argument('files', nargs='*', help='images to cache instead of the website')
+    parser.add_argument('--site', default=SITE, help='website whose members.html lists the images')
+    parser.add_argument('-j', '--concurrency', type=int, default=CONCURRENCY, help='images downloaded at once')
+    args: argparse.Namespace = parser.parse_args()
+
     # If No Arguments, Cache The Cornell Cup Robotics Website
-    if len(sys.argv) == 1: cache_website()
+    if len(args.files) == 0: cache_website(args.site, args.concurrency)
     # Else, Cache The Given Files From Arguments
-    else: cache_images(sys.argv[1:])
+    else: cache_images(args.files)
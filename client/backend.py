@@ -0,0 +1,491 @@
+import numpy as np, time, sys, cv2, os # Default Python Libraries
+
+from client.lazy import face_recognition # Imported On First Use
+from client.config import * # Default Configurations
+
+from typing import Any, List, Mapping, MutableMapping, Optional, Tuple # Type Hinting
+
+# Copying Config Values
+BACKEND: str           = DEFAULT_BACKEND
+BACKEND_BATCH: int     = DEFAULT_BACKEND_BATCH
+FACE_DETECT_MODEL: str = DEFAULT_NN_MODEL
+ENCODING_MODEL: str    = DEFAULT_ENCODING_MODEL
+NUM_JITTERS: int       = DEFAULT_NUM_JITTERS
+NUM_UPSAMPLE: int      = DEFAULT_NUM_UPSAMPLE
+CONFIDENCE: float      = DEFAULT_DETECT_CONFIDENCE
+CASCADE_SCALE: float      = DEFAULT_CASCADE_SCALE
+CASCADE_CONFIDENCE: float = DEFAULT_CASCADE_CONFIDENCE
+CASCADE_CNN: bool         = DEFAULT_CASCADE_CNN
+CASCADE_PADDING: float    = DEFAULT_CASCADE_PADDING
+CROP_PADDING: float       = DEFAULT_CROP_PADDING
+
+# Type Of A (Top, Right, Bottom, Left) Face Location
+Location = Tuple[int, int, int, int]
+
+def clip_location(box: Tuple[float, float, float, float], shape: Tuple[int, ...]) -> Location:
+    """
+    Converts a (left, top, right, bottom) pixel box to a (top, right, bottom, left) location,
+    clipped to an image of the given [shape].
+    """
+
+    left, top, right, bottom = box
+    return (max(int(top), 0), min(int(right), shape[1]), min(int(bottom), shape[0]), max(int(left), 0))
+
+def crop_face(img: np.ndarray, location: Location, padding: float = CROP_PADDING) -> Tuple[np.ndarray, Location]:
+    """
+    Returns a padded crop around the face at [location], along with the location of the face within
+    the crop. The padding leaves room for the landmarks and the aligned face chip the encoder extracts
+    around the face. Only the crop is copied, into a C-contiguous array, since dlib needs contiguous
+    memory and would otherwise copy (or refuse) a strided view into the whole frame.
+
+    PARAMETERS
+    ----------
+    img      - The image the face is in.
+    location - The location of the face in (top, right, bottom, left) format.
+    padding  - The fraction of the face's size added on each side.
+
+    RETURNS
+    -------
+    Tuple[np.ndarray, Location] - The crop, and the face's location relative to it.
+    """
+
+    top, right, bottom, left = location
+    pad: int = int(max(bottom - top, right - left) * padding)
+    y: int = max(top - pad, 0); x: int = max(left - pad, 0)
+    return np.ascontiguousarray(img[y:bottom + pad, x:right + pad]), (top - y, right - x, bottom - y, left - x)
+
+def suppress(boxes: np.ndarray, scores: np.ndarray, shape: Tuple[int, ...], confidence: float,
+             overlap: float = 0.4) -> List[Location]:
+    """
+    Keeps the boxes scoring at least [confidence], removing those overlapping a better box by more
+    than [overlap] (non-maximum suppression), and returns them as locations in an image of [shape].
+
+    PARAMETERS
+    ----------
+    boxes      - A (N x 4) array of (left, top, right, bottom) boxes, in pixels.
+    scores     - The confidence of every box.
+    shape      - The shape of the image the boxes are in.
+    confidence - The minimum confidence of a face.
+    overlap    - The maximum intersection over union between two kept boxes.
+
+    RETURNS
+    -------
+    List[Location] - The locations of the kept faces, most confident first.
+    """
+
+    keep: np.ndarray = np.flatnonzero(scores >= confidence)
+    if len(keep) == 0: return []
+
+    rects: List[List[int]] = [[int(l), int(t), int(r - l), int(b - t)] for l, t, r, b in boxes[keep]]
+    kept: np.ndarray = np.asarray(cv2.dnn.NMSBoxes(rects, scores[keep].tolist(), confidence, overlap)).reshape(-1)
+    order: np.ndarray = kept[np.argsort(-scores[keep][kept])]
+    return [clip_location(boxes[keep[i]], shape) for i in order]
+
+def encode_face(img: np.ndarray, location: Location) -> np.ndarray:
+    """
+    Encodes the face at [location] in [img] from a padded crop around it, see `crop_face`.
+
+    PARAMETERS
+    ----------
+    img      - The image the face is in.
+    location - The location of the face in (top, right, bottom, left) format.
+
+    RETURNS
+    -------
+    np.ndarray - The 128 dimensional encoding of the face.
+    """
+
+    crop: np.ndarray; inner: Location; crop, inner = crop_face(img, location)
+    return face_recognition.face_encodings(crop, [inner], num_jitters=NUM_JITTERS, model=ENCODING_MODEL)[0]
+
+class Backend:
+    """
+    The interface between `check_faces` and the models that find and encode faces. Both steps take
+    a batch of images at once, so backends that can run several images per call amortize their
+    per-call overhead. Every backend states the throughput it is expected to reach (images per
+    second, detection and encoding of one face, on a 640x480 image with a 4 core CPU), which
+    `benchmark` measures it against.
+    """
+
+    name: str         = 'backend'
+    throughput: float = 0.0
+
+    def detect(self: any, images: List[np.ndarray]) -> List[List[Location]]:
+        """
+        Finds the faces in every image.
+
+        PARAMETERS
+        ----------
+        images - The images to search, in RGB format (see `Client.prepare`).
+
+        RETURNS
+        -------
+        List[List[Location]] - The (top, right, bottom, left) location of every face, for every image.
+        """
+
+        raise NotImplementedError
+
+    def encode(self: any, images: List[np.ndarray], locations: List[List[Location]]) -> List[List[np.ndarray]]:
+        """
+        Encodes the faces at [locations] in every image, as 128 dimensional dlib-compatible encodings
+        so they can be matched against the gallery. Shared by every backend by default, since the
+        gallery's encodings come from dlib. Every face is encoded from a padded crop around it (see
+        `crop_face`) rather than the whole image, since dlib converts the whole image it is given
+        for every face it encodes.
+
+        PARAMETERS
+        ----------
+        images    - The images the faces are in.
+        locations - The locations of the faces to encode, for every image.
+
+        RETURNS
+        -------
+        List[List[np.ndarray]] - The encoding of every face, for every image.
+        """
+
+        return [[encode_face(img, loc) for loc in locs] for img, locs in zip(images, locations)]
+
+    def stats(self: any) -> Mapping[str, Any]:
+        """
+        Returns whatever the backend measures about itself, nothing by default.
+        """
+
+        return {}
+
+class DlibBackend(Backend):
+    """
+    The original dlib path through `face_recognition`: the HOG detector, or the CNN detector which
+    runs batches of equally sized images in a single call.
+    """
+
+    name: str = 'dlib'
+
+    def __init__(self: any, model: str = FACE_DETECT_MODEL, upsample: int = NUM_UPSAMPLE,
+                 batch: int = BACKEND_BATCH) -> 'DlibBackend':
+        """
+        PARAMETERS
+        ----------
+        model    - Either 'cnn' or 'hog'.
+        upsample - The number of times to upsample each image before detecting.
+        batch    - The number of images the CNN detector runs at once.
+        """
+
+        self.model: str = model; self.upsample: int = upsample; self.batch: int = max(batch, 1)
+        self.throughput: float = 0.5 if model == 'cnn' else 8.0
+
+    def detect(self: any, images: List[np.ndarray]) -> List[List[Location]]:
+        if self.model != 'cnn':
+            return [face_recognition.face_locations(img, number_of_times_to_upsample=self.upsample, model=self.model)
+                    for img in images]
+
+        # The CNN Detector Only Batches Images Of The Same Size
+        found: MutableMapping[int, List[Location]] = {}; shapes: MutableMapping[Tuple[int, ...], List[int]] = {}
+        for i, img in enumerate(images): shapes.setdefault(img.shape, []).append(i)
+
+        for idxs in shapes.values():
+            for start in range(0, len(idxs), self.batch):
+                chunk: List[int] = idxs[start:start + self.batch]
+                results: List[List[Location]] = face_recognition.batch_face_locations([images[i] for i in chunk],
+                    number_of_times_to_upsample=self.upsample, batch_size=len(chunk))
+                found.update(zip(chunk, results))
+
+        return [found[i] for i in range(len(images))]
+
+class OpenCVBackend(Backend):
+    """
+    OpenCV's DNN face detector (the ResNet-10 SSD, or any detector with the same output layout),
+    running a whole batch of images as one blob. Far faster than dlib's CNN detector on a CPU.
+    """
+
+    name: str         = 'opencv'
+    throughput: float = 25.0
+
+    def __init__(self: any, model: str = DEFAULT_OPENCV_MODEL, config: str = DEFAULT_OPENCV_CONFIG,
+                 confidence: float = CONFIDENCE, size: Tuple[int, int] = (300, 300)) -> 'OpenCVBackend':
+        """
+        PARAMETERS
+        ----------
+        model      - The path to the detector's weights (e.g. `res10_300x300_ssd_iter_140000.caffemodel`).
+        config     - The path to the detector's network description (e.g. `deploy.prototxt`).
+        confidence - The minimum confidence of a face.
+        size       - The (width, height) images are resized to for the network.
+
+        RAISES
+        ------
+        OSError - Raised when the model files do not exist.
+        """
+
+        for path in (model, config):
+            if not os.path.isfile(path): raise OSError(f'OpenCV face detector file {path} does not exist.')
+
+        self.net: Any = cv2.dnn.readNet(model, config)
+        self.confidence: float = confidence; self.size: Tuple[int, int] = size
+
+    def detect(self: any, images: List[np.ndarray]) -> List[List[Location]]:
+        if len(images) == 0: return []
+
+        blob: np.ndarray = cv2.dnn.blobFromImages(images, 1.0, self.size, (123.0, 177.0, 104.0), swapRB=True)
+        self.net.setInput(blob)
+        detections: np.ndarray = self.net.forward().reshape(-1, 7)
+
+        found: List[List[Location]] = []
+        for i, img in enumerate(images):
+            rows: np.ndarray = detections[detections[:, 0] == i]
+            scale: np.ndarray = np.array([img.shape[1], img.shape[0], img.shape[1], img.shape[0]])
+            found.append(suppress(rows[:, 3:7] * scale, rows[:, 2], img.shape, self.confidence))
+
+        return found
+
+class ONNXBackend(Backend):
+    """
+    A face detector run by ONNX Runtime on the CPU, with the output layout of the Ultra-Light-Fast
+    face detectors (`version-RFB-320.onnx`): per-anchor scores and normalized corner boxes. Images
+    are run as one batch if the model accepts a dynamic batch size, otherwise one at a time.
+    """
+
+    name: str         = 'onnx'
+    throughput: float = 40.0
+
+    def __init__(self: any, model: str = DEFAULT_ONNX_MODEL, confidence: float = CONFIDENCE,
+                 threads: int = 0) -> 'ONNXBackend':
+        """
+        PARAMETERS
+        ----------
+        model      - The path to the ONNX model.
+        confidence - The minimum confidence of a face.
+        threads    - The number of threads ONNX Runtime uses, its default if 0.
+
+        RAISES
+        ------
+        OSError     - Raised when the model does not exist.
+        ImportError - Raised when ONNX Runtime is not installed.
+        """
+
+        if not os.path.isfile(model): raise OSError(f'ONNX face detector {model} does not exist.')
+        import onnxruntime # Optional Dependency, Only Needed For This Backend
+
+        options: Any = onnxruntime.SessionOptions(); options.intra_op_num_threads = threads
+        self.session: Any = onnxruntime.InferenceSession(model, options, providers=['CPUExecutionProvider'])
+        self.input: Any = self.session.get_inputs()[0]
+        self.size: Tuple[int, int] = (int(self.input.shape[3]), int(self.input.shape[2]))
+        self.batched: bool = not isinstance(self.input.shape[0], int)
+        self.confidence: float = confidence
+
+    def detect(self: any, images: List[np.ndarray]) -> List[List[Location]]:
+        if len(images) == 0: return []
+
+        blob: np.ndarray = np.stack([cv2.resize(img, self.size) for img in images]).astype(np.float32)
+        blob = ((blob - 127.0) / 128.0).transpose(0, 3, 1, 2)
+
+        chunks: List[np.ndarray] = [blob] if self.batched else [blob[i:i + 1] for i in range(len(blob))]
+        outputs: List[List[np.ndarray]] = [self.session.run(None, { self.input.name: chunk }) for chunk in chunks]
+        scores: np.ndarray = np.concatenate([out[0] for out in outputs]); boxes: np.ndarray = np.concatenate([out[1] for out in outputs])
+
+        found: List[List[Location]] = []
+        for i, img in enumerate(images):
+            scale: np.ndarray = np.array([img.shape[1], img.shape[0], img.shape[1], img.shape[0]])
+            found.append(suppress(boxes[i] * scale, scores[i][:, 1], img.shape, self.confidence))
+
+        return found
+
+class CascadeBackend(Backend):
+    """
+    A detection cascade that only pays for expensive detection where the cheap pass falls short.
+    Every image first gets a fast HOG pass at [scale] of its size. If that finds nothing, HOG runs
+    again at full size with upsampling, and then (if [cnn]) the CNN runs on the whole image. Faces
+    the cheap pass found with a score below [confidence] are verified by the CNN on a padded crop
+    around them only, and dropped if it finds no face there. The time spent in every stage is
+    recorded, see `stats`.
+    """
+
+    name: str         = 'cascade'
+    throughput: float = 15.0
+
+    def __init__(self: any, scale: float = CASCADE_SCALE, confidence: float = CASCADE_CONFIDENCE,
+                 cnn: bool = CASCADE_CNN, padding: float = CASCADE_PADDING, upsample: int = NUM_UPSAMPLE) -> 'CascadeBackend':
+        """
+        PARAMETERS
+        ----------
+        scale      - The scale of the first HOG pass, relative to the image being searched.
+        confidence - The HOG score below which a face is verified by the CNN.
+        cnn        - Whether the CNN detector is used for the last stage and for verification.
+        padding    - The fraction of a face's size added on each side of it when verifying it.
+        upsample   - The number of times to upsample the image in the escalated stages.
+        """
+
+        self.scale: float = scale; self.confidence: float = confidence; self.cnn: bool = cnn
+        self.padding: float = padding; self.upsample: int = upsample
+        self.timings: MutableMapping[str, List[float]] = {}
+        self.counts: MutableMapping[str, int] = { 'images': 0, 'escalated': 0, 'verified': 0, 'rejected': 0 }
+
+    def timed(self: any, stage: str, detect: Any, *args: Any) -> Any:
+        """
+        Runs [detect] with [args], adding its duration to the calls and total seconds of [stage].
+        """
+
+        start: float = time.perf_counter()
+        try: return detect(*args)
+        finally:
+            timing: List[float] = self.timings.setdefault(stage, [0, 0.0])
+            timing[0] += 1; timing[1] += time.perf_counter() - start
+
+    @staticmethod
+    def hog(img: np.ndarray, upsample: int) -> Tuple[List[Location], List[float]]:
+        """
+        Runs dlib's HOG detector on [img], returning the faces and their scores. The scores are only
+        available through dlib's detector itself, every face counts as confident otherwise.
+        """
+
+        detector: Any = getattr(getattr(face_recognition, 'api', None), 'face_detector', None)
+        if detector is None or not hasattr(detector, 'run'):
+            found: List[Location] = face_recognition.face_locations(img, number_of_times_to_upsample=upsample, model='hog')
+            return found, [float('inf')] * len(found)
+
+        rects: Any; scores: Any; rects, scores, _ = detector.run(img, upsample, 0.0)
+        return [clip_location((r.left(), r.top(), r.right(), r.bottom()), img.shape) for r in rects], list(scores)
+
+    def verify(self: any, img: np.ndarray, location: Location) -> Optional[Location]:
+        """
+        Runs the CNN on a padded crop around [location], returning the face it finds there (in the
+        coordinates of [img]), or None if it finds none.
+        """
+
+        crop: np.ndarray; inner: Location; crop, inner = crop_face(img, location, self.padding)
+        y: int = location[0] - inner[0]; x: int = location[3] - inner[3]
+
+        found: List[Location] = self.timed('cnn_region', face_recognition.face_locations, crop, self.upsample, 'cnn')
+        if len(found) == 0: return None
+
+        t, r, b, l = max(found, key=lambda loc: (loc[2] - loc[0]) * (loc[1] - loc[3]))
+        return (t + y, r + x, b + y, l + x)
+
+    def search(self: any, img: np.ndarray) -> List[Location]:
+        """
+        Runs the cascade on a single image.
+        """
+
+        self.counts['images'] += 1
+        small: np.ndarray = cv2.resize(img, (0, 0), fx=self.scale, fy=self.scale) if self.scale != 1.0 else img
+
+        found: List[Location]; scores: List[float]
+        found, scores = self.timed('hog_low', CascadeBackend.hog, small, 0)
+        found = [clip_location((l / self.scale, t / self.scale, r / self.scale, b / self.scale), img.shape)
+                 for t, r, b, l in found]
+
+        if len(found) == 0:
+            self.counts['escalated'] += 1
+            found, _ = self.timed('hog_full', CascadeBackend.hog, img, self.upsample)
+            if len(found) == 0 and self.cnn: found = self.timed('cnn_full', face_recognition.face_locations, img, self.upsample, 'cnn')
+            return found
+
+        if not self.cnn: return found
+        kept: List[Location] = []
+
+        for location, score in zip(found, scores):
+            if score >= self.confidence: kept.append(location); continue
+
+            verified: Optional[Location] = self.verify(img, location)
+            self.counts['verified' if verified is not None else 'rejected'] += 1
+            if verified is not None: kept.append(verified)
+
+        return kept
+
+    def detect(self: any, images: List[np.ndarray]) -> List[List[Location]]:
+        return [self.search(img) for img in images]
+
+    def stats(self: any) -> Mapping[str, Any]:
+        """
+        Returns how many images went through the cascade, how many escalated past the first stage,
+        how many low-confidence faces were verified or rejected, and the calls, total and mean
+        milliseconds of every stage.
+        """
+
+        stages: Mapping[str, Mapping[str, float]] = { stage: { 'calls': calls, 'ms': seconds * 1000, 'mean_ms': seconds * 1000 / calls }
+                                                      for stage, (calls, seconds) in self.timings.items() }
+        return { **self.counts, 'stages': stages }
+
+# Every Known Backend, By Name
+BACKENDS: Mapping[str, type] = { 'dlib': DlibBackend, 'cascade': CascadeBackend, 'opencv': OpenCVBackend, 'onnx': ONNXBackend }
+
+def create_backend(kind: str = BACKEND) -> Backend:
+    """
+    Creates a backend of the given kind with its default configuration.
+
+    PARAMETERS
+    ----------
+    kind - Either 'dlib', 'cascade', 'opencv' or 'onnx'.
+
+    RAISES
+    ------
+    ValueError - Raised when [kind] is not a known kind of backend.
+
+    RETURNS
+    -------
+    Backend - The backend.
+    """
+
+    if kind not in BACKENDS: raise ValueError(f'Unknown backend kind: {kind}, expected one of {list(BACKENDS)}.')
+    return BACKENDS[kind]()
+
+# Backends Created So Far, So Each Model Is Only Loaded Once
+OPENED: MutableMapping[str, Backend] = {}
+
+def open_backend(kind: str = BACKEND) -> Backend:
+    """
+    Returns the backend of the given kind, creating it the first time it is used.
+
+    PARAMETERS
+    ----------
+    kind - Either 'dlib', 'cascade', 'opencv' or 'onnx'.
+
+    RETURNS
+    -------
+    Backend - The backend.
+    """
+
+    if kind not in OPENED: OPENED[kind] = create_backend(kind)
+    return OPENED[kind]
+
+def benchmark(backend: Backend, images: List[np.ndarray], batch: int = BACKEND_BATCH, repeats: int = 3) -> Mapping[str, Any]:
+    """
+    Measures how many images per second [backend] detects and encodes, in batches of [batch]
+    images, and compares it with the throughput the backend states.
+
+    PARAMETERS
+    ----------
+    backend - The backend to measure.
+    images  - The images to run, repeated [repeats] times (after one warm-up batch).
+    batch   - The number of images passed to the backend at once.
+    repeats - The number of passes over [images].
+
+    RETURNS
+    -------
+    Mapping[str, Any] - The backend's name, the images run, faces found, measured and expected
+    images per second, and mean milliseconds per image.
+    """
+
+    backend.encode(images[:batch], backend.detect(images[:batch]))
+    faces: int = 0; start: float = time.perf_counter()
+
+    for _ in range(repeats):
+        for first in range(0, len(images), batch):
+            chunk: List[np.ndarray] = images[first:first + batch]
+            locations: List[List[Location]] = backend.detect(chunk)
+            backend.encode(chunk, locations); faces += sum(len(locs) for locs in locations)
+
+    elapsed: float = time.perf_counter() - start; count: int = len(images) * repeats
+    return { 'backend': backend.name, 'images': count, 'faces': faces, 'fps': count / elapsed if elapsed > 0 else 0.0,
+             'expected_fps': backend.throughput, 'ms': elapsed * 1000 / max(count, 1) }
+
+if __name__ == '__main__':
+    # Benchmark The Given Backends (All That Load If None Given) On The Example Images
+    folder: str = os.path.join('resources', 'examples')
+    images: List[np.ndarray] = [cv2.imread(os.path.join(folder, file)) for file in sorted(os.listdir(folder))]
+    images = [cv2.cvtColor(cv2.resize(img, (640, 480)), cv2.COLOR_BGR2RGB) for img in images if img is not None]
+
+    for kind in sys.argv[1:] or list(BACKENDS):
+        try: result: Mapping[str, Any] = benchmark(create_backend(kind), images)
+        except (OSError, ImportError) as exc: print(f'{kind:>6}: unavailable ({exc})'); continue
+
+        print(f"{result['backend']:>6}: {result['fps']:.2f} images/s (expected {result['expected_fps']:.2f}), "
+              f"{result['ms']:.1f} ms/image, {result['faces']} faces in {result['images']} images")
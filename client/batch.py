@@ -0,0 +1,222 @@
+import numpy as np, argparse, glob, json, time, csv, sys, cv2, os # Default Python Libraries
+
+from client.config import * # Default Configurations
+
+from concurrent.futures import ThreadPoolExecutor # Decoding Ahead Of Recognition
+from collections import deque # Images Being Decoded, In Order
+from typing import Any, Callable, Iterator, List, Mapping, MutableMapping, Optional, TextIO, Tuple # Type Hinting
+
+# Copying Config Values
+BATCH_WORKERS: int = DEFAULT_BATCH_WORKERS
+BATCH_AHEAD: int   = DEFAULT_BATCH_AHEAD
+BATCH_FORMAT: str  = DEFAULT_BATCH_FORMAT
+BATCH_SIZE: int    = DEFAULT_BACKEND_BATCH
+FORMATS: List[str] = ['jsonl', 'csv']
+CSV_FIELDS: List[str] = ['file', 'name', 'top', 'right', 'bottom', 'left', 'error']
+
+def collect_images(sources: List[str]) -> List[str]:
+    """
+    Expands [sources] into the image files they refer to, in order and without duplicates. Each
+    source is a directory (searched recursively), a glob pattern (`**` matches subdirectories),
+    a file, or `@list.txt` naming a file that lists one source per line. Only files with the
+    extensions in `IMG_EXTs` are kept from directories and globs.
+
+    PARAMETERS
+    ----------
+    sources - The directories, globs, files and file lists.
+
+    RAISES
+    ------
+    OSError - Raised when a source is not a directory, file or pattern matching any file.
+
+    RETURNS
+    -------
+    List[str] - The paths to the images.
+    """
+
+    is_image = lambda file: '.' in file and file[file.rindex('.')+1:].lower() in IMG_EXTs
+    files: MutableMapping[str, None] = {}
+
+    for source in sources:
+        if source.startswith('@'):
+            with open(source[1:], 'r', encoding=TEXT_ENCODING) as listing:
+                lines: List[str] = [line.strip() for line in listing]
+            files.update(dict.fromkeys(collect_images([line for line in lines if line and not line.startswith('#')])))
+
+        elif os.path.isdir(source):
+            for root, dirs, names in os.walk(source):
+                dirs.sort()
+                files.update((os.path.join(root, name), None) for name in sorted(names) if is_image(name))
+
+        elif os.path.isfile(source): files[source] = None
+
+        elif glob.has_magic(source):
+            matched: List[str] = sorted(glob.glob(source, recursive=True))
+            if len(matched) == 0: raise OSError(f'No files match {source}.')
+            files.update((file, None) for file in matched if os.path.isfile(file) and is_image(file))
+
+        else: raise OSError(f'The path given ({source}) is not a directory, file or pattern.')
+
+    return list(files)
+
+def decode_image(file: str) -> np.ndarray:
+    """
+    Reads and decodes the image at [file] in BGR format, like `cv2.imread`.
+
+    RAISES
+    ------
+    OSError - Raised when the file does not exist or can not be decoded as an image.
+    """
+
+    img: Optional[np.ndarray] = cv2.imread(file)
+    if img is None: raise OSError(f'File {file} does not exist or is not an image.')
+    return img
+
+def read_images(files: List[str], workers: int = BATCH_WORKERS, ahead: int = BATCH_AHEAD
+                ) -> Iterator[Tuple[str, Optional[np.ndarray], Optional[str]]]:
+    """
+    Decodes [files] in a pool of threads, keeping up to [ahead] images decoded (or decoding) ahead
+    of the consumer, and yields them in order. OpenCV releases the GIL while decoding, so reading
+    overlaps with recognition of the previous images.
+
+    PARAMETERS
+    ----------
+    files   - The paths to the images.
+    workers - The number of decoding threads.
+    ahead   - The maximum number of images decoded ahead of the one being consumed.
+
+    RETURNS
+    -------
+    Iterator[Tuple[str, Optional[np.ndarray], Optional[str]]] - The file, its image (None on
+    failure) and the error message (None on success), for every file in order.
+    """
+
+    pending: deque = deque(); remaining: Iterator[str] = iter(files)
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        def submit() -> None:
+            for file in remaining:
+                pending.append((file, pool.submit(decode_image, file)))
+                if len(pending) >= max(ahead, 1): return
+
+        try:
+            submit()
+            while pending:
+                file, future = pending.popleft(); submit()
+                try: yield file, future.result(), None
+                except Exception as exc: yield file, None, str(exc)
+
+        finally:
+            for _, future in pending: future.cancel()
+
+def classify_batch(files: List[str], analyze: Callable[[List[np.ndarray]], List[List[Tuple[str, Tuple[int, int, int, int]]]]],
+                   scale_factor: float = 1.0, workers: int = BATCH_WORKERS, ahead: int = BATCH_AHEAD,
+                   batch: int = BATCH_SIZE) -> Iterator[Mapping[str, Any]]:
+    """
+    Recognizes the faces in every image of [files] as they are decoded ahead (see `read_images`),
+    passing [batch] images at a time to [analyze] so the backend can amortize its per-call overhead,
+    and yielding one result per image so results can be written as they are produced.
+
+    PARAMETERS
+    ----------
+    files        - The paths to the images.
+    analyze      - Finds and identifies the faces in a list of images, e.g. `Client.analyze_batch`.
+    scale_factor - The factor [analyze] resized the images by, so boxes are given in the original image.
+    workers      - The number of decoding threads.
+    ahead        - The maximum number of images decoded ahead of recognition.
+    batch        - The number of images analyzed at once.
+
+    RETURNS
+    -------
+    Iterator[Mapping[str, Any]] - For every image, its file, the name and (top, right, bottom, left)
+    box of every face, the recognition time in milliseconds (shared evenly by a batch) and the error
+    (None on success).
+    """
+
+    decoded: List[Tuple[str, Optional[np.ndarray], Optional[str]]] = []
+
+    def flush() -> Iterator[Mapping[str, Any]]:
+        imgs: List[np.ndarray] = [img for _, img, _ in decoded if img is not None]
+        results: Iterator[List[Tuple[str, Tuple[int, int, int, int]]]] = iter([]); failure: Optional[str] = None
+
+        start: float = time.perf_counter()
+        try: results = iter(analyze(imgs) if imgs else [])
+        except Exception as exc: failure = f'Unable to classify batch: {exc}'
+        ms: float = round((time.perf_counter() - start) * 1000.0 / max(len(imgs), 1), 3)
+
+        for file, img, error in decoded:
+            record: MutableMapping[str, Any] = { 'file': file, 'faces': [], 'ms': 0.0, 'error': error }
+            if img is not None:
+                record['ms'] = ms; record['error'] = failure
+                if failure is None:
+                    record['faces'] = [{ 'name': name, 'box': [int(v / scale_factor) for v in location] }
+                                       for name, location in next(results)]
+            yield record
+
+        decoded.clear()
+
+    for item in read_images(files, workers=workers, ahead=max(ahead, batch)):
+        decoded.append(item)
+        if len(decoded) >= max(batch, 1): yield from flush()
+
+    yield from flush()
+
+def write_results(records: Iterator[Mapping[str, Any]], out: TextIO, fmt: str = BATCH_FORMAT) -> Mapping[str, int]:
+    """
+    Writes every result to [out] as soon as it is produced, flushing after each image. As JSON
+    lines there is one object per image; as CSV there is one row per face, and a row with an empty
+    name for images without faces or that failed.
+
+    PARAMETERS
+    ----------
+    records - The results of `classify_batch`.
+    out     - The stream to write to.
+    fmt     - Either 'jsonl' or 'csv'.
+
+    RAISES
+    ------
+    ValueError - Raised when [fmt] is not a supported format.
+
+    RETURNS
+    -------
+    Mapping[str, int] - The number of images, faces, unknown faces and failed images.
+    """
+
+    if fmt not in FORMATS: raise ValueError(f'Expected one of {FORMATS}. Got \'{fmt}\' instead.')
+    counts: MutableMapping[str, int] = { 'images': 0, 'faces': 0, 'unknown': 0, 'failed': 0 }
+
+    writer: Any = None
+    if fmt == 'csv': writer = csv.DictWriter(out, fieldnames=CSV_FIELDS); writer.writeheader()
+
+    for record in records:
+        counts['images'] += 1; counts['faces'] += len(record['faces'])
+        counts['unknown'] += sum(face['name'] == DEFAULT_UNKNOWN_FACE_ID for face in record['faces'])
+        counts['failed'] += record['error'] is not None
+
+        if writer is None: out.write(json.dumps(record) + '\n')
+        else:
+            rows: List[Mapping[str, Any]] = [{ 'file': record['file'], 'name': face['name'], 'error': record['error'],
+                **dict(zip(CSV_FIELDS[2:6], face['box'])) } for face in record['faces']]
+            writer.writerows(rows or [{ 'file': record['file'], 'error': record['error'] }])
+
+        out.flush()
+
+    return counts
+
+if __name__ == '__main__':
+    from client.client import Client # Loaded Here, The Client Imports This Module
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description='Recognizes the faces in many images.')
+    parser.add_argument('sources', nargs='+', help='directories, globs, files, or @file listing them')
+    parser.add_argument('-o', '--output', default=None, help='file to write the results to, stdout if not given')
+    parser.add_argument('-f', '--format', default=BATCH_FORMAT, choices=FORMATS)
+    parser.add_argument('-w', '--workers', type=int, default=BATCH_WORKERS, help='number of decoding threads')
+    parser.add_argument('-b', '--batch', type=int, default=BATCH_SIZE, help='number of images analyzed at once')
+    parser.add_argument('-p', '--processes', type=int, default=1, help='number of recognition processes')
+    args: argparse.Namespace = parser.parse_args()
+
+    client: Client = Client(open=False, disp=False, prnt=False)
+    summary: Mapping[str, Any] = client.classify_batch(args.sources, output=args.output, fmt=args.format,
+                                                       workers=args.workers, batch=args.batch,
+                                                       processes=args.processes, prnt=False)
+    print(f'Batch: {summary}', file=sys.stderr)
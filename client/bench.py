@@ -0,0 +1,244 @@
+import numpy as np, multiprocessing, subprocess, itertools, argparse, platform, json, time, sys, cv2, os # Default Python Libraries
+
+from client.config import * # Default Configurations
+
+from typing import Any, Iterator, List, Mapping, MutableMapping, Optional, Sequence, TextIO # Type Hinting
+
+# Copying Config Values
+EXAMPLES_DIR: str           = os.path.join('resources', 'examples')
+SCALE_FACTORS: List[float]  = [0.25, 0.5, 1.0]
+UPSAMPLES: List[int]        = [0, 1]
+JITTERS: List[int]          = [1, 2]
+NN_MODELS: List[str]        = ['hog', 'cnn']
+ENCODING_MODELS: List[str]  = ['large', 'small']
+GALLERY_SIZES: List[int]    = [10, 100, 1000, 10000, 100000]
+BENCH_REPEATS: int          = 3
+BENCH_QUERIES: int          = 200
+
+def peak_rss() -> Optional[int]:
+    """
+    Returns the peak resident set size of this process in bytes, or None where it can not be read
+    (e.g. on Windows).
+    """
+
+    try: import resource # Unix Only
+    except ImportError: return None
+
+    peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024 # Kilobytes On Linux, Bytes On macOS
+
+def summarize(latencies: Sequence[float], elapsed: float) -> Mapping[str, float]:
+    """
+    Returns the throughput (runs per second over [elapsed] seconds) and the mean, median and 99th
+    percentile of [latencies] (in seconds) in milliseconds.
+    """
+
+    ms: np.ndarray = np.asarray(latencies, dtype=np.float64) * 1000
+    if len(ms) == 0: return { 'throughput': 0.0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p99_ms': 0.0 }
+
+    return { 'throughput': round(len(ms) / elapsed, 3) if elapsed > 0 else 0.0, 'mean_ms': round(float(ms.mean()), 3),
+             'p50_ms': round(float(np.percentile(ms, 50)), 3), 'p99_ms': round(float(np.percentile(ms, 99)), 3) }
+
+def load_examples(folder: str = EXAMPLES_DIR) -> List[np.ndarray]:
+    """
+    Reads every image in [folder], in name order so runs are comparable.
+
+    RAISES
+    ------
+    OSError - Raised when the folder holds no images.
+    """
+
+    files: List[str] = [file for file in sorted(os.listdir(folder)) if file.split('.')[-1].lower() in IMG_EXTs]
+    images: List[np.ndarray] = [img for img in (cv2.imread(os.path.join(folder, file)) for file in files) if img is not None]
+    if len(images) == 0: raise OSError(f'No images found in {folder}.')
+    return images
+
+def bench_pipeline(scale_factor: float, upsample: int, jitters: int, nn_model: str, encoding_model: str,
+                   folder: str = EXAMPLES_DIR, repeats: int = BENCH_REPEATS) -> Mapping[str, Any]:
+    """
+    Measures resizing, detecting and encoding every face of the example images with the given
+    settings, one image at a time as the client does, after one warm-up pass.
+
+    PARAMETERS
+    ----------
+    scale_factor   - The factor images are resized by before detection (`DEFAULT_SCALE_FACTOR`).
+    upsample       - The number of upsamples when detecting (`DEFAULT_NUM_UPSAMPLE`).
+    jitters        - The number of noisy copies encoded per face (`DEFAULT_NUM_JITTERS`).
+    nn_model       - Either 'hog' or 'cnn' (`DEFAULT_NN_MODEL`).
+    encoding_model - Either 'large' or 'small' (`DEFAULT_ENCODING_MODEL`).
+    folder         - The folder of images to run.
+    repeats        - The number of passes over the images.
+
+    RETURNS
+    -------
+    Mapping[str, Any] - The settings, the images run and faces found, the images per second, the mean,
+    median and 99th percentile milliseconds per image, and the peak RSS in bytes.
+    """
+
+    import client.backend as backend # Imported Here, So Matching Benchmarks Do Not Load dlib
+
+    images: List[np.ndarray] = load_examples(folder)
+    detector: backend.Backend = backend.DlibBackend(model=nn_model, upsample=upsample, batch=1)
+    backend.NUM_JITTERS, backend.ENCODING_MODEL = jitters, encoding_model # Read By `encode_face` On Every Call
+
+    def run(img: np.ndarray) -> int:
+        resized: np.ndarray = cv2.cvtColor(cv2.resize(img, (0, 0), fx=scale_factor, fy=scale_factor), cv2.COLOR_BGR2RGB)
+        locations: List[List[backend.Location]] = detector.detect([resized])
+        detector.encode([resized], locations)
+        return len(locations[0])
+
+    for img in images: run(img)
+    latencies: List[float] = []; faces: int = 0; start: float = time.perf_counter()
+
+    for _ in range(repeats):
+        for img in images:
+            began: float = time.perf_counter(); faces += run(img)
+            latencies.append(time.perf_counter() - began)
+
+    return { 'bench': 'pipeline', 'scale_factor': scale_factor, 'upsample': upsample, 'jitters': jitters,
+             'nn_model': nn_model, 'encoding_model': encoding_model, 'images': len(latencies), 'faces': faces,
+             **summarize(latencies, time.perf_counter() - start), 'peak_rss': peak_rss() }
+
+def bench_matching(size: int, queries: int = BENCH_QUERIES, index: str = DEFAULT_INDEX, seed: int = 0,
+                   dtype: str = DEFAULT_GALLERY_DTYPE) -> Mapping[str, Any]:
+    """
+    Measures matching single encodings against a synthetic gallery of [size] random encodings
+    (one per identity), after one warm-up query.
+
+    PARAMETERS
+    ----------
+    size    - The number of encodings in the gallery.
+    queries - The number of encodings matched.
+    index   - The kind of index the gallery searches with, see `create_index`.
+    seed    - The seed for generating the gallery and queries.
+    dtype   - How the gallery holds encodings, see `Gallery`.
+
+    RETURNS
+    -------
+    Mapping[str, Any] - The gallery size, index and dtype, the queries per second, the mean, median
+    and 99th percentile milliseconds per query, the peak RSS and matrix size in bytes, and how far
+    the distances stray from float64 (see `parity`).
+    """
+
+    from client.gallery import Gallery, parity # Imported Here, So Pipeline Benchmarks Measure Only Their Own Memory
+    from client.index import create_index
+
+    rng: np.random.Generator = np.random.default_rng(seed)
+    data: np.ndarray = rng.normal(0.0, 0.1, (size, DEFAULT_ENCODING_DIM))
+    query: np.ndarray = data[rng.integers(0, size, queries)] + rng.normal(0.0, 0.01, (queries, DEFAULT_ENCODING_DIM))
+
+    gallery: Gallery = Gallery(capacity=size, index=create_index(index, None), dtype=dtype)
+    gallery.extend([str(i) for i in range(size)], data)
+    gallery.match(query[:1])
+
+    latencies: List[float] = []; start: float = time.perf_counter()
+    for i in range(queries):
+        began: float = time.perf_counter(); gallery.match(query[i:i + 1])
+        latencies.append(time.perf_counter() - began)
+
+    stats: Mapping[str, Any] = { **summarize(latencies, time.perf_counter() - start), 'peak_rss': peak_rss() }
+    report: Mapping[str, Any] = parity(data, dtype, query)
+    return { 'bench': 'matching', 'size': size, 'index': index, 'dtype': dtype, 'queries': queries, **stats,
+             'matrix_bytes': report['bytes'], 'max_error': report['max_error'], 'agreement': report['agreement'] }
+
+def run_case(case: Mapping[str, Any]) -> Mapping[str, Any]:
+    """
+    Runs one benchmark case, `bench_pipeline` or `bench_matching` depending on its 'bench' key,
+    returning its result or the error that stopped it.
+    """
+
+    args: MutableMapping[str, Any] = dict(case); kind: str = args.pop('bench')
+    try: return (bench_pipeline if kind == 'pipeline' else bench_matching)(**args)
+    except Exception as exc: return { 'bench': kind, **args, 'error': f'{type(exc).__name__}: {exc}' }
+
+def run_isolated(case: Mapping[str, Any]) -> Mapping[str, Any]:
+    """
+    Runs one benchmark case in a fresh process, so its peak RSS is its own and not that of the
+    cases before it.
+    """
+
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(run_case, (case,))
+
+def environment() -> Mapping[str, Any]:
+    """
+    Returns what a run depends on outside the settings it sweeps: the commit, python and numpy
+    versions, platform and CPU count.
+    """
+
+    try: commit: Optional[str] = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True).stdout.strip() or None
+    except OSError: commit = None
+
+    return { 'bench': 'environment', 'commit': commit, 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+             'python': platform.python_version(), 'numpy': np.__version__, 'opencv': cv2.__version__,
+             'platform': platform.platform(), 'cpus': os.cpu_count() }
+
+def cases(scale_factors: List[float] = SCALE_FACTORS, upsamples: List[int] = UPSAMPLES, jitters: List[int] = JITTERS,
+          nn_models: List[str] = NN_MODELS, encoding_models: List[str] = ENCODING_MODELS, sizes: List[int] = GALLERY_SIZES,
+          folder: str = EXAMPLES_DIR, repeats: int = BENCH_REPEATS, queries: int = BENCH_QUERIES,
+          index: str = DEFAULT_INDEX, dtypes: List[str] = [DEFAULT_GALLERY_DTYPE]) -> Iterator[Mapping[str, Any]]:
+    """
+    Yields every pipeline case of the grid of settings, then every matching case.
+    """
+
+    for scale, upsample, jitter, nn_model, encoding_model in itertools.product(scale_factors, upsamples, jitters, nn_models, encoding_models):
+        yield { 'bench': 'pipeline', 'scale_factor': scale, 'upsample': upsample, 'jitters': jitter, 'nn_model': nn_model,
+                'encoding_model': encoding_model, 'folder': folder, 'repeats': repeats }
+
+    for size, dtype in itertools.product(sizes, dtypes):
+        yield { 'bench': 'matching', 'size': size, 'queries': queries, 'index': index, 'dtype': dtype }
+
+def run_bench(out: TextIO, isolate: bool = True, **grid: Any) -> int:
+    """
+    Runs every case of the grid (see `cases`) and writes one JSON line per case to [out], after a
+    line describing the environment, flushing after each so partial runs are still usable.
+
+    PARAMETERS
+    ----------
+    out     - The stream to write to.
+    isolate - Whether every case runs in its own process, so peak RSS is measured per case.
+    grid    - The settings to sweep, passed to `cases`.
+
+    RETURNS
+    -------
+    int - The number of cases that failed.
+    """
+
+    out.write(json.dumps(environment()) + '\n'); out.flush(); failed: int = 0
+
+    for case in cases(**grid):
+        result: Mapping[str, Any] = run_isolated(case) if isolate else run_case(case)
+        failed += 'error' in result
+        out.write(json.dumps(result) + '\n'); out.flush()
+
+    return failed
+
+if __name__ == '__main__':
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description='Benchmarks recognition settings and gallery matching.')
+    parser.add_argument('-o', '--output', default=None, help='file to write the JSON lines to, stdout if not given')
+    parser.add_argument('--scale', type=float, nargs='+', default=SCALE_FACTORS, help='DEFAULT_SCALE_FACTOR values')
+    parser.add_argument('--upsample', type=int, nargs='+', default=UPSAMPLES, help='DEFAULT_NUM_UPSAMPLE values')
+    parser.add_argument('--jitters', type=int, nargs='+', default=JITTERS, help='DEFAULT_NUM_JITTERS values')
+    parser.add_argument('--nn-model', nargs='+', default=NN_MODELS, choices=NN_MODELS, help='DEFAULT_NN_MODEL values')
+    parser.add_argument('--encoding-model', nargs='+', default=ENCODING_MODELS, choices=ENCODING_MODELS, help='DEFAULT_ENCODING_MODEL values')
+    parser.add_argument('--sizes', type=int, nargs='*', default=GALLERY_SIZES, help='synthetic gallery sizes')
+    parser.add_argument('--folder', default=EXAMPLES_DIR, help='folder of images to run')
+    parser.add_argument('--repeats', type=int, default=BENCH_REPEATS, help='passes over the images per setting')
+    parser.add_argument('--queries', type=int, default=BENCH_QUERIES, help='queries per gallery size')
+    parser.add_argument('--index', default=DEFAULT_INDEX, choices=['brute', 'ivf'], help='gallery index to match with')
+    parser.add_argument('--dtype', nargs='+', default=[DEFAULT_GALLERY_DTYPE], choices=['float64', 'float32', 'int8'], help='gallery dtypes to match with')
+    parser.add_argument('--no-pipeline', action='store_true', help='only benchmark matching')
+    parser.add_argument('--inline', action='store_true', help='run every case in this process (peak RSS is then cumulative)')
+    args: argparse.Namespace = parser.parse_args()
+
+    out: TextIO = open(args.output, 'w', encoding=TEXT_ENCODING) if args.output else sys.stdout
+    try:
+        failed: int = run_bench(out, isolate=not args.inline, scale_factors=[] if args.no_pipeline else args.scale,
+                                upsamples=args.upsample, jitters=args.jitters, nn_models=args.nn_model,
+                                encoding_models=args.encoding_model, sizes=args.sizes, folder=args.folder,
+                                repeats=args.repeats, queries=args.queries, index=args.index,
+                                dtypes=args.dtype)
+    finally:
+        if out is not sys.stdout: out.close()
+
+    sys.exit(1 if failed else 0)
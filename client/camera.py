@@ -1,8 +1,11 @@
-import numpy as np, time, cv2 # Default Python Libraries
+import numpy as np, threading, time, cv2 # Default Python Libraries
 
-from client.config import DEFAULT_CAMERA # Default Configurations
+from client.config import DEFAULT_CAMERA, DEFAULT_THREADED_CAMERA, DEFAULT_FRAME_BUFFER # Default Configurations
+from client.config import DEFAULT_RING_NAME, DEFAULT_RING_SLOTS, DEFAULT_RING_READERS # Shared Frame Ring
+from client.metrics import METRICS # Stage Timings
 
-from typing import List, Optional # Type Hinting
+from collections import deque # Ring Buffer Of Recent Frames
+from typing import Any, Deque, List, Mapping, MutableMapping, Optional, Tuple # Type Hinting
 
 class Camera:
     """
@@ -11,7 +14,8 @@ class Camera:
     following: https://docs.opencv.org/3.4/d8/dfe/classcv_1_1VideoCapture.html
     """
 
-    def __init__(self: any, camera: Optional[int] = DEFAULT_CAMERA, attempts: int = 30) -> 'Camera':
+    def __init__(self: any, camera: Optional[int] = DEFAULT_CAMERA, attempts: int = 30,
+                 threaded: bool = DEFAULT_THREADED_CAMERA, buffer_size: int = DEFAULT_FRAME_BUFFER) -> 'Camera':
         """
         Attempts to initialize a camera devices and create a VideoCapture object.
         Note that this does not actually take frames, those should be done in a
@@ -19,14 +23,29 @@ class Camera:
 
         PARAMETERS
         ----------
-        camera   - The camera device to initialize, if None will try to find one.
-        attempts - The number of attempts to try to read in frames from the camera.
+        camera      - The camera device to initialize, if None will try to find one.
+        attempts    - The number of attempts to try to read in frames from the camera.
+        threaded    - Whether to capture frames continuously on a background thread.
+        buffer_size - The number of most recent frames kept when capturing in the background.
         """
 
         self.devices: int                = 10
         self.attempts: int               = attempts
         self.image: Optional[np.ndarray] = None
 
+        self.threaded: bool                               = threaded
+        self.buffer: Deque[Tuple[int, float, np.ndarray]] = deque(maxlen=max(buffer_size, 1))
+        self.condition: threading.Condition               = threading.Condition()
+        self.thread: Optional[threading.Thread]           = None
+        self.running: bool                                = False
+        self.sequence: int = 0; self.consumed: int = 0; self.dropped: int = 0; self.fps: float = 0.0
+        self.seen: int                                    = 0
+        self.ring: Optional[Any]                          = None
+
+        self.lock: threading.Lock                                = threading.Lock()
+        self.scratch: MutableMapping[str, np.ndarray]            = {}
+        self.tables: MutableMapping[Tuple[int, int], np.ndarray] = {}
+
         self.camera: str                 = self.find_camera() if camera is None else camera
         self.device: cv2.VideoCapture    = cv2.VideoCapture(self.camera, cv2.CAP_GSTREAMER)
 
@@ -40,6 +59,8 @@ class Camera:
         if not self.device.isOpened():
             if not self.device.open(self.camera):
                 raise OSError(f'Unable to open device at index: {self.camera}')
+
+        if self.threaded: self.start()
         return self
 
     def __exit__(self: any, exc_type: any, exc_val: any, exc_tb: any) -> None:
@@ -56,12 +77,233 @@ class Camera:
         exc_tb   - The exception traceback.
         """
 
+        self.stop()
+        if self.ring is not None: self.ring.close(); self.ring = None
         self.device.release()
 
+    def start(self: any) -> None:
+        """
+        Starts the background capture thread, which keeps reading frames from the camera into
+        a small ring buffer so the most recent frame is always ready. The thread is a daemon, so
+        it never keeps the program alive, and is stopped when leaving the `with` block.
+        """
+
+        if self.thread is not None and self.thread.is_alive(): return
+
+        self.running = True
+        self.thread = threading.Thread(target=self.capture, name='camera-capture', daemon=True)
+        self.thread.start()
+
+    def stop(self: any) -> None:
+        """
+        Stops the background capture thread if it is running, and waits for it to finish.
+        """
+
+        self.running = False
+        if self.thread is not None: self.thread.join(timeout=1.0); self.thread = None
+
+    def share(self: any, name: Optional[str] = DEFAULT_RING_NAME, slots: int = DEFAULT_RING_SLOTS,
+              readers: int = DEFAULT_RING_READERS) -> Any:
+        """
+        Publishes every frame captured in the background to a `FrameRing` in shared memory, so other
+        processes can read them without copying (see `FrameReader`). Starts the background capture
+        if it is not running. The ring is removed when leaving the `with` block.
+
+        PARAMETERS
+        ----------
+        name    - The name of the shared memory readers attach to, a random one if None.
+        slots   - The number of frames held, at least [readers] + 2.
+        readers - The number of processes that can read at once.
+
+        RETURNS
+        -------
+        FrameRing - The ring frames are written to.
+        """
+
+        from client.ring import FrameRing # Imported Here, Shared Memory Needs Python 3.8+
+
+        if self.ring is None:
+            self.read_image()
+            self.ring = FrameRing.create(self.image.shape, slots=slots, readers=readers, name=name)
+
+        self.start()
+        return self.ring
+
+    def capture(self: any) -> None:
+        """
+        The loop run by the background capture thread. Each frame is stored with a sequence
+        number and timestamp, and a frame pushed out of the ring buffer before being read is
+        counted as dropped. The capture rate is tracked as an exponential moving average. Frames
+        are also written to the shared frame ring, if the camera is shared (see `share`).
+        """
+
+        last: Optional[float] = None
+
+        while self.running:
+            ret: bool; img: np.ndarray; ret, img = self.device.read()
+            if not ret: time.sleep(0.01); continue
+
+            now: float = time.monotonic()
+            if self.ring is not None: self.ring.write(img, now)
+
+            with self.condition:
+                if len(self.buffer) == self.buffer.maxlen and self.buffer[0][0] > self.consumed: self.dropped += 1
+
+                self.sequence += 1
+                self.buffer.append((self.sequence, now, img))
+                if last is not None and now > last:
+                    rate: float = 1.0 / (now - last)
+                    self.fps = rate if self.fps == 0.0 else 0.9 * self.fps + 0.1 * rate
+                self.condition.notify_all()
+
+            last = now
+
+    def latest(self: any, timeout: Optional[float] = None, after: Optional[int] = None) -> Tuple[int, float, np.ndarray]:
+        """
+        Returns the freshest frame captured by the background thread, waiting up to [timeout]
+        seconds only if no frame has been captured yet, or none newer than the frame numbered [after].
+
+        PARAMETERS
+        ----------
+        timeout - The number of seconds to wait for a frame, waits forever if None.
+        after   - The sequence number of the last frame already handled, any frame will do if None.
+
+        RAISES
+        ------
+        OSError - Raised when no (new enough) frame has been captured within [timeout] seconds.
+
+        RETURNS
+        -------
+        Tuple[int, float, np.ndarray] - The sequence number, capture time and frame (in BGR format).
+        """
+
+        with self.condition:
+            if not self.condition.wait_for(lambda: len(self.buffer) > 0 and (after is None or self.buffer[-1][0] > after), timeout=timeout):
+                raise OSError(f'No frames received after {timeout} seconds.')
+
+            frame: Tuple[int, float, np.ndarray] = self.buffer[-1]
+            self.consumed = max(self.consumed, frame[0])
+            return frame
+
+    def recent(self: any) -> List[Tuple[int, float, np.ndarray]]:
+        """
+        Returns every frame currently in the ring buffer, oldest first.
+
+        RETURNS
+        -------
+        List[Tuple[int, float, np.ndarray]] - The sequence number, capture time and frame of each.
+        """
+
+        with self.condition: return list(self.buffer)
+
+    def stats(self: any) -> Mapping[str, float]:
+        """
+        Returns statistics of the background capture thread.
+
+        RETURNS
+        -------
+        Mapping[str, float] - The number of frames captured and dropped (never read before being
+        replaced), the capture rate in frames per second, and the age in seconds of the newest frame.
+        """
+
+        with self.condition:
+            age: float = time.monotonic() - self.buffer[-1][1] if len(self.buffer) > 0 else float('inf')
+            return { 'frames': self.sequence, 'dropped': self.dropped, 'fps': self.fps, 'age': age }
+
+    def table(self: any, sat_mod: int, brightness_mod: int) -> np.ndarray:
+        """
+        Returns the lookup table adding [sat_mod] to the saturation and [brightness_mod] to the value
+        of an HSV image (clipped to 0-255, like `cv2.add`), leaving the hue alone. Tables are cached.
+        """
+
+        key: Tuple[int, int] = (sat_mod, brightness_mod)
+        if key not in self.tables:
+            ramp: np.ndarray = np.arange(256, dtype=np.int16)
+            self.tables[key] = np.clip(np.stack([ramp, ramp + sat_mod, ramp + brightness_mod], axis=-1),
+                                       0, 255).astype(np.uint8).reshape(1, 256, 3)
+
+        return self.tables[key]
+
+    def workspace(self: any, name: str, shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        Returns the scratch buffer [name], reallocated only when the frame size changes.
+        """
+
+        if name not in self.scratch or self.scratch[name].shape != shape: self.scratch[name] = np.empty(shape, dtype=np.uint8)
+        return self.scratch[name]
+
+    def adjust(self: any, img: np.ndarray, scale_factor: float = 1.0, sat_mod: int = -10, brightness_mod: int = 10,
+               rgb: bool = True) -> np.ndarray:
+        """
+        Resizes [img] by [scale_factor] first, then adjusts its saturation and brightness through
+        a lookup table, and converts it straight to RGB (or back to BGR). The intermediate steps
+        write into buffers allocated once per frame size, but the result is always a new array, so
+        a frame handed on (e.g. queued for recognition while the next one is captured) is never
+        overwritten by a later one.
+
+        PARAMETERS
+        ----------
+        img            - The frame, in BGR format.
+        scale_factor   - The factor to resize the frame by.
+        sat_mod        - The saturation modifier, more positive is more saturated.
+        brightness_mod - The brightness modifier, more positive is brighter.
+        rgb            - Whether to return the frame in RGB format rather than BGR.
+
+        RETURNS
+        -------
+        np.ndarray - The resized and adjusted frame.
+        """
+
+        height: int; width: int; height, width = img.shape[:2]
+        size: Tuple[int, int] = (max(int(round(width * scale_factor)), 1), max(int(round(height * scale_factor)), 1))
+        shape: Tuple[int, int, int] = (size[1], size[0], 3)
+
+        with self.lock:
+            small: np.ndarray = img
+            if size != (width, height):
+                with METRICS.time('resize'): small = cv2.resize(img, size, dst=self.workspace('small', shape))
+
+            with METRICS.time('adjust'):
+                hsv: np.ndarray = cv2.cvtColor(small, cv2.COLOR_BGR2HSV, dst=self.workspace('hsv', shape))
+                cv2.LUT(hsv, self.table(sat_mod, brightness_mod), dst=hsv)
+
+                return cv2.cvtColor(hsv, cv2.COLOR_HSV2RGB if rgb else cv2.COLOR_HSV2BGR)
+
+    def prepare_read(self: any, scale_factor: float, sat_mod: int = -10, brightness_mod: int = 10,
+                     timeout: int = 10, fresh: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Reads a frame and prepares it for recognition in one pass, see `adjust`. The frame is only
+        ever touched at full resolution by the resize, so it can be kept as it is for display.
+
+        PARAMETERS
+        ----------
+        scale_factor   - The factor to resize the frame by.
+        sat_mod        - The saturation modifier, more positive is more saturated.
+        brightness_mod - The brightness modifier, more positive is brighter.
+        timeout        - The number of attempts to try to read and adjust the frame.
+        fresh          - Whether to wait for a frame not read before, see `read_image`.
+
+        RETURNS
+        -------
+        Tuple[np.ndarray, np.ndarray] - The frame as read (BGR, full resolution), and the resized,
+        adjusted frame in RGB format.
+        """
+
+        ind: int = 0
+        while ind < timeout:
+            try:
+                with METRICS.time('capture'): self.read_image(fresh=fresh)
+                return self.image, self.adjust(self.image, scale_factor, sat_mod, brightness_mod)
+
+            except cv2.error: ind += 1; time.sleep(0.1); continue
+
+        raise OSError(f'Unable to adjust image after {timeout} attempts.')
+
     def adjust_read(self: any, sat_mod: int = -10, brightness_mod: int = 10, timeout: int = 10) -> np.ndarray:
         """
-        Repeatedly tries to adjust the brightness and saturdation of the current read image.
-        Sourced from the following: https://stackoverflow.com/questions/32609098/how-to-fast-change-image-brightness-with-python-opencv
+        Repeatedly tries to adjust the brightness and saturdation of the current read image, at
+        full resolution. Prefer `prepare_read` when the frame is only recognized at a smaller size.
+        Originally sourced from the following: https://stackoverflow.com/questions/32609098/how-to-fast-change-image-brightness-with-python-opencv
 
         PARAMETERS
         ----------
@@ -77,34 +319,35 @@ class Camera:
         ind: int = 0
         while ind < timeout:
             try:
-                self.read_image()
-                hsv: np.ndarray = cv2.cvtColor(self.image, cv2.COLOR_BGR2HSV)
-
-                result: np.ndarray = np.array(hsv, dtype=hsv.dtype)
-                result[:, :, 1] = cv2.add(hsv[:,:,1], sat_mod)
-                result[:, :, 2] = cv2.add(hsv[:,:,2], brightness_mod)
-
-                rgb: np.ndarray = cv2.cvtColor(result, cv2.COLOR_HSV2BGR)
-                return rgb
+                with METRICS.time('capture'): self.read_image()
+                return self.adjust(self.image, 1.0, sat_mod, brightness_mod, rgb=False)
 
             except cv2.error: ind += 1; time.sleep(0.1); continue
 
         raise OSError(f'Unable to adjust image after {timeout} attempts.')
 
-    def read_image(self: any, attempts: Optional[int] = None) -> None:
+    def read_image(self: any, attempts: Optional[int] = None, fresh: bool = False) -> None:
         """
         Attempts to read in frames from camera until success. This should be called
         in a separate thread, so that the main thread can continue to do other things.
-        Stores the image in the `image` attribute of the class.
+        Stores the image in the `image` attribute of the class. If the background capture
+        thread is running, the freshest frame is taken from it instead.
 
         PARAMETERS
         ----------
         attempts - The number of attempts to try to read in frames from the camera.
+        fresh    - Whether to wait for a frame newer than the last one read, when capturing in
+                   the background (reading the camera directly always waits for the next frame).
+                   A loop reading frames continuously needs this, or it spins on the same frame.
         """
 
         attempts: int = self.attempts if attempts is None else attempts
         fnd: bool = False
 
+        if self.running:
+            seq: int; img: np.ndarray; seq, _, img = self.latest(timeout=attempts * 0.1, after=self.seen if fresh else None)
+            self.seen = seq; self.image = img; return
+
         for _ in range(attempts):
             ret: bool; img: np.ndarray; ret, img = self.device.read()
 
@@ -1,23 +1,29 @@
-import numpy as np, os, face_recognition # Default Python Libraries
-
+import numpy as np, os # Default Python Libraries
+
+from client.store import open_store # Memory-Mapped Encoding Store
+from client.enroll import enroll_files # Parallel Bulk Enrollment
+from client.gallery import Gallery # Matrix Of Known Encodings
+from client.identity import IdentityCache # Reusing Identities Of Faces That Stayed Still
+from client.backend import Backend, open_backend # Face Detection & Encoding Backends
+from client.metrics import METRICS # Stage Timings & Counters
 from client.config import * # Default Configurations
 
-from typing import Mapping, Tuple, List, MutableMapping # Type Hinting
+from typing import Iterator, Mapping, Optional, Tuple, List, MutableMapping # Type Hinting
 
 # Copying Config Values
-ENCODING_MODEL: str    = DEFAULT_ENCODING_MODEL
-FACE_DETECT_MODEL: str = DEFAULT_NN_MODEL
 UNKNOWN_FACE: str      = DEFAULT_UNKNOWN_FACE_ID
-NUM_JITTERS: int       = DEFAULT_NUM_JITTERS
-NUM_UPSAMPLE: int      = DEFAULT_NUM_UPSAMPLE
+LIMIT: int             = DEFAULT_IDENTITY_ENCODINGS
 
 def check_and_add_img(img: np.ndarray, name: str, mappings: MutableMapping, cache: bool = True,
-                      cache_dir: str = DEFAULT_CACHE_DIR) -> None:
+                      cache_dir: str = DEFAULT_CACHE_DIR, encoding: Optional[np.ndarray] = None,
+                      backend: Optional[Backend] = None) -> None:
     """
-    Helper function that checks if the encoding is already cached for an img, and if so
-    adds it to the mappings. Otherwise, it will generate an encoding for the face, and store
-    it in the mappings. File names are important for it to distinguish which user is which.
-    Also caches the encoding if [cache] is True and the encoding is not already cached.
+    Helper function that generates an encoding for the largest face in an img (unless it was
+    already encoded, see `encode_faces`), and adds it to the encodings already in the mappings
+    under [name], so learning the same person again (e.g. in another pose or lighting) gives
+    them another encoding instead of overwriting the last. Only the newest
+    `DEFAULT_IDENTITY_ENCODINGS` encodings of a person are kept. Also caches the person's
+    encodings if [cache] is True.
 
     PARAMETERS
     ----------
@@ -26,27 +32,20 @@ def check_and_add_img(img: np.ndarray, name: str, mappings: MutableMapping, cach
     mappings  - The mappings to update with the added filenames.
     cache     - Whether to cache the files as they are loaded.
     cache_dir - The directory of the `cache` to check, default specified by `DEFAULT_CACHE_DIR`
+    encoding  - The encoding of the person's face if it was already found, so it is not detected again.
+    backend   - The backend that finds and encodes faces, `DEFAULT_BACKEND` if None.
     """
 
-    if cache:
-        try: mappings[name] = get_cached(name, cache_dir)
-
-        except OSError:
-            encodings: List[np.ndarray] = face_recognition.face_encodings(
-                img, num_jitters=NUM_JITTERS, model=ENCODING_MODEL)
-            if (len(encodings) == 0): print(f'No faces found in {name}.'); return
-
-            encoding: np.ndarray = encodings[0]
-            add_cache(name, encoding, cache_dir)
-            mappings[name] = encoding
+    if encoding is None:
+        faces: List[Tuple[Tuple[int, int, int, int], np.ndarray]] = encode_faces(img, backend)
+        if (len(faces) == 0): print(f'No faces found in {name}.'); return
+        encoding = max(faces, key=lambda face: (face[0][2] - face[0][0]) * (face[0][1] - face[0][3]))[1]
 
-    else:
-        encodings: List[np.ndarray] = face_recognition.face_encodings(
-            img, num_jitters=NUM_JITTERS, model=ENCODING_MODEL)
-        if (len(encodings) == 0): print(f'No faces found in {name}.'); return
+    if isinstance(mappings, Gallery): mappings.add(name, encoding)
+    elif name in mappings: mappings[name] = np.vstack([mappings[name], encoding])[-LIMIT:]
+    else: mappings[name] = encoding
 
-        encoding: np.ndarray = encodings[0]
-        mappings[name] = encoding
+    if cache: add_cache(name, mappings[name], cache_dir)
 
 def check_and_add_file(path: str, file: str, mappings: MutableMapping, cache: bool = True,
                        cache_dir: str = DEFAULT_CACHE_DIR) -> None:
@@ -54,7 +53,9 @@ def check_and_add_file(path: str, file: str, mappings: MutableMapping, cache: bo
     Helper function that checks if the encoding is already cached for a file, and if so
     adds it to the mappings. Otherwise, it will generate an encoding for the face, and store
     it in the mappings. File names are important for it to distinguish which user is which.
-    Also caches the encoding if [cache] is True and the encoding is not already cached.
+    Also caches the encoding if [cache] is True and the encoding is not already cached. The
+    cached encoding is only reused if the file's contents and the encoding parameters have
+    not changed since it was cached.
 
     PARAMETERS
     ----------
@@ -65,36 +66,15 @@ def check_and_add_file(path: str, file: str, mappings: MutableMapping, cache: bo
     cache_dir - The directory of the `cache` to check, default specified by `DEFAULT_CACHE_DIR`
     """
 
-    try: filename: str = file[:file.rindex('.')]
-    except ValueError as exc: raise ValueError(f'file named {file} does not contain a ".".') from exc
-
-    if cache:
-        try: mappings[filename] = get_cached(filename, cache_dir)
-
-        except OSError:
-            encodings: List[np.ndarray] = face_recognition.face_encodings(
-                face_recognition.load_image_file(os.path.join(path, file)),
-                num_jitters=NUM_JITTERS, model=ENCODING_MODEL)
-            if (len(encodings) == 0): print(f'No faces found in {file}.'); return
-
-            encoding: np.ndarray = encodings[0]
-            add_cache(filename, encoding, cache_dir)
-            mappings[filename] = encoding
-    else:
-        encodings: List[np.ndarray] = face_recognition.face_encodings(
-            face_recognition.load_image_file(os.path.join(path, file)),
-            num_jitters=NUM_JITTERS, model=ENCODING_MODEL)
-        if (len(encodings) == 0): print(f'No faces found in {file}.'); return
-
-        encoding: np.ndarray = encodings[0]
-        mappings[filename] = encoding
+    enroll_files([os.path.join(path, file)], mappings, cache=cache, cache_dir=cache_dir, workers=1)
 
 def cload_images(path: str, mappings: Mapping[str, np.ndarray] = None, cache: bool = True,
                  cache_dir: str = DEFAULT_CACHE_DIR) -> Mapping[str, np.ndarray]:
     """
     Loads in the image(s) from the given `path` and returns an updating mappings. Only loads
     in images with the extensions specified in `IMG_EXTs`. Can handle both directories and
-    individual files.
+    individual files. Images that are new or changed since they were cached are encoded in parallel
+    (see `client.enroll`), and cached encodings of images deleted from a directory are dropped.
 
     PARAMETERS
     ----------
@@ -110,29 +90,32 @@ def cload_images(path: str, mappings: Mapping[str, np.ndarray] = None, cache: bo
     """
 
     mappings: Mapping[str, np.ndarray] = {} if mappings is None else mappings
+    files: List[str] = []
 
     if os.path.isdir(path):
-        for _, _, files in os.walk(path):
-            for file in files:
-                ext: str = file[file.rindex('.')+1:]
+        for root, _, names in os.walk(path):
+            for file in names:
+                ext: str = file[file.rindex('.')+1:] if '.' in file else ''
 
-                if ext in IMG_EXTs: check_and_add_file(path, file, mappings, cache, cache_dir)
+                if ext in IMG_EXTs: files.append(os.path.join(root, file))
                 else: print(f'Ignoring file: {file}, with extension: {ext} not in {IMG_EXTs}')
 
     elif os.path.isfile(path):
         ext = path[path.rindex('.')+1:]
 
-        if ext not in IMG_EXTs: print('File being loaded, with extension: {ext} not in {IMG_EXTs}')
-        check_and_add_file(*os.path.split(path), mappings, cache, cache_dir)
+        if ext not in IMG_EXTs: print(f'File being loaded, with extension: {ext} not in {IMG_EXTs}')
+        files.append(path)
 
     else: raise RuntimeError(f'The path given ({path}) is not a directory or file.')
 
-    return mappings
+    root: Optional[str] = path if os.path.isdir(path) else None
+    return enroll_files(files, mappings, cache=cache, cache_dir=cache_dir, root=root)
 
 def cload_cache(mappings: Mapping[str, np.ndarray] = None, cache_dir: str = DEFAULT_CACHE_DIR) -> Mapping[str, np.ndarray]:
     """
-    Loads in the encodings from the given `path` and returns an updating mappings. Only loads
-    in encodings with the extension specified in `ENCODING_EXT`. Can only handle directories.
+    Loads in the encodings from the store in [cache_dir] and returns an updating mappings. The
+    store is a single memory-mapped file (see `client.store`), so this is one open regardless of
+    how many encodings are cached. Old `.enc` files are migrated into it the first time.
 
     PARAMETERS
     ----------
@@ -141,77 +124,148 @@ def cload_cache(mappings: Mapping[str, np.ndarray] = None, cache_dir: str = DEFA
 
     RETURNS
     -------
-    Mapping[str, np.ndarray] - A Mapping of names to encodings. The encoding is a numpy array
-    representation of an individual face.
+    Mapping[str, np.ndarray] - A Mapping of names to encodings. The encodings are a (K x 128) numpy
+    array, one representation of an individual face per row.
     """
 
     mappings: Mapping[str, np.ndarray] = {} if mappings is None else mappings
+    people: MutableMapping[str, List[np.ndarray]] = {}
 
-    for _, _, files in os.walk(cache_dir):
-        for file in files:
-            ext: str = file[file.rindex('.')+1:]
-            filename: str = file[:file.rindex('.')]
-
-            if ext == ENCODING_EXT: mappings[filename] = get_cached(filename, cache_dir)
-            else: print(f"Ignoring file: {file}, with extension: {ext} not equal to {ENCODING_EXT}")
-
+    for name, encoding in open_store(cache_dir).items(): people.setdefault(name, []).append(encoding)
+    for name, encodings in people.items(): mappings[name] = np.stack(encodings)[-LIMIT:]
     return mappings
 
 def get_cached(name: str, cache_dir: str = DEFAULT_CACHE_DIR) -> np.ndarray:
     """
-    Gets the cached encoding described by [name] from [cache_dir]. Can only handle files
-    with the extension specified in `ENCODING_EXT`.
+    Gets the cached encodings described by [name] from the store in [cache_dir].
 
     PARAMETERS
     ----------
     name      - The name of the person whose encoding is being gotten.
-    cache_dir - The path as a str of the folder where the cached encodings are located.
+    cache_dir - The path as a str of the folder where the encoding store is located.
 
     RAISES
     ------
-    OSError - Usually raised when the file does not exist or is unable to be accessed.
+    OSError - Usually raised when the encoding is not cached or the store is unable to be accessed.
 
     RETURNS
     -------
-    np.ndarray - The encoding as a np.ndarray.
+    np.ndarray - The encodings as a (K x 128) np.ndarray.
     """
 
-    os.makedirs(cache_dir, exist_ok=True)
-
-    with open(os.path.join(cache_dir, f'{name}.{ENCODING_EXT}'), 'rb') as file:
-        return np.frombuffer(file.read())
+    return open_store(cache_dir).get(name)
 
 def add_cache(name: str, encoding: np.ndarray, cache_dir: str = DEFAULT_CACHE_DIR) -> None:
     """
-    Adds the [encoding] to the [cache_dir] directory under [name]. The encoding is stored as a
-    binary file with the extension specified in `ENCODING_EXT`.
+    Adds the [encoding] to the store in [cache_dir] under [name]. The encoding (or stack of
+    encodings) is appended to the end of the store, replacing (tombstoning) every older encoding
+    under the same name.
 
     PARAMETERS
     ----------
     name      - The name of the person [encoding] is for.
-    encoding  - The encoding for the person, [name].
+    encoding  - The encoding, or (K x 128) stack of encodings, for the person, [name].
     cache_dir - An optional argument of the directory of where the cache is located.
 
     RAISES
     ------
-    OSError - Usually raised when the file is unable to be accessed.
+    OSError - Usually raised when the store is unable to be accessed.
+    """
+
+    open_store(cache_dir).replace(name, encoding)
+
+def remove_cache(name: str, cache_dir: str = DEFAULT_CACHE_DIR) -> bool:
     """
+    Removes every encoding under [name] from the store in [cache_dir]. The records are only
+    marked as deleted, the space is reclaimed by `compact_cache`.
 
-    os.makedirs(cache_dir, exist_ok=True)
+    PARAMETERS
+    ----------
+    name      - The name of the person to remove.
+    cache_dir - An optional argument of the directory of where the cache is located.
+
+    RETURNS
+    -------
+    bool - True if any encoding was removed, false if none was cached under [name].
+    """
+
+    return open_store(cache_dir).remove(name)
+
+def compact_cache(cache_dir: str = DEFAULT_CACHE_DIR) -> int:
+    """
+    Rewrites the store in [cache_dir] without its deleted records.
+
+    PARAMETERS
+    ----------
+    cache_dir - An optional argument of the directory of where the cache is located.
+
+    RETURNS
+    -------
+    int - The number of deleted records that were dropped.
+    """
 
-    with open(os.path.join(cache_dir, f'{name}.{ENCODING_EXT}'), 'wb+') as file:
-        file.seek(0); file.truncate(); file.write(encoding.tobytes())
+    return open_store(cache_dir).compact()
 
-def check_faces(img: np.ndarray, mappings: Mapping[str, np.ndarray]) -> List[Tuple[str, Tuple[int, int, int, int]]]:
+def encode_faces(img: np.ndarray, backend: Optional[Backend] = None) -> List[Tuple[Tuple[int, int, int, int], np.ndarray]]:
+    """
+    Detects the faces in [img] once, and encodes each from a padded crop around it. The result can
+    be used both to enroll a face (see `check_and_add_img`) and to identify the faces (see
+    `match_faces`), so learning and then verifying a face only detects faces once.
+
+    PARAMETERS
+    ----------
+    img     - The img to search for faces in.
+    backend - The backend that finds and encodes faces, `DEFAULT_BACKEND` if None.
+
+    RETURNS
+    -------
+    List[Tuple[Tuple[int, int, int, int], np.ndarray]] - The (top, right, bottom, left) location and
+    encoding of every face.
+    """
+
+    backend: Backend = open_backend() if backend is None else backend
+    with METRICS.time('detect'): locations: List[Tuple[int, int, int, int]] = backend.detect([img])[0]
+    with METRICS.time('encode'): encodings: List[np.ndarray] = backend.encode([img], [locations])[0]
+
+    METRICS.count('faces', len(locations))
+    return list(zip(locations, encodings))
+
+def match_faces(faces: List[Tuple[Tuple[int, int, int, int], np.ndarray]],
+                mappings: Mapping[str, np.ndarray]) -> List[Tuple[str, Tuple[int, int, int, int]]]:
+    """
+    Identifies faces that were already found and encoded by `encode_faces`, without detecting again.
+
+    PARAMETERS
+    ----------
+    faces    - The location and encoding of every face.
+    mappings - The mappings of known people to known facial encodings, ideally a `Gallery`.
+
+    RETURNS
+    -------
+    List[Tuple[str, Tuple[int, int, int, int]]] - A list of name-image location pairs, see `check_faces`.
+    """
+
+    mappings: Gallery = mappings if isinstance(mappings, Gallery) else Gallery(mappings)
+    with METRICS.time('match'): names: List[str] = mappings.match([encoding for _, encoding in faces], tolerance=TOLERANCE)
+
+    METRICS.count('unknowns', names.count(UNKNOWN_FACE))
+    return list(zip(names, [loc for loc, _ in faces]))
+
+def check_faces(img: np.ndarray, mappings: Mapping[str, np.ndarray], identities: Optional[IdentityCache] = None,
+                backend: Optional[Backend] = None) -> List[Tuple[str, Tuple[int, int, int, int]]]:
     """
     Runs the facial recognition algorithm on [img]. All possible responses are keys in [mappings].
     Basically finds faces in images, compares to known faces in mappings, and returns a list of results
-    to be used in displaying the bounding box.
+    to be used in displaying the bounding box. All faces found are matched against the known faces in
+    one batched distance computation, so passing a `Gallery` avoids rebuilding the known encodings.
+    Faces found in [identities] (that have not moved or changed since last seen) are not re-encoded.
 
     PARAMETERS
     ----------
-    img      - The img to search for faces in.
-    mappings - The mappings of known people to known facial encodings.
+    img        - The img to search for faces in.
+    mappings   - The mappings of known people to known facial encodings, ideally a `Gallery`.
+    identities - An optional cache of the identities of recently seen faces.
+    backend    - The backend that finds and encodes faces, `DEFAULT_BACKEND` if None.
 
     RETURNS
     -------
@@ -221,23 +275,53 @@ def check_faces(img: np.ndarray, mappings: Mapping[str, np.ndarray]) -> List[Tup
     location but be marked as Unknown.
     """
 
-    try: ordered_map: List[Tuple[str, np.ndarray]] = list(mappings.items())
-    except AttributeError as exc: raise ValueError(f'Expected a Mapping. Got \'{mappings}\' instead.') from exc
+    return check_faces_batch([img], mappings, identities, backend)[0]
+
+def check_faces_batch(imgs: List[np.ndarray], mappings: Mapping[str, np.ndarray], identities: Optional[IdentityCache] = None,
+                      backend: Optional[Backend] = None) -> List[List[Tuple[str, Tuple[int, int, int, int]]]]:
+    """
+    Runs `check_faces` on many images at once. The faces in every image are found in one call to
+    the backend (which may run them as a single batch), encoded, and matched against the known
+    faces in one batched distance computation.
+
+    PARAMETERS
+    ----------
+    imgs       - The images to search for faces in.
+    mappings   - The mappings of known people to known facial encodings, ideally a `Gallery`.
+    identities - An optional cache of the identities of recently seen faces, for images of a sequence.
+    backend    - The backend that finds and encodes faces, `DEFAULT_BACKEND` if None.
+
+    RETURNS
+    -------
+    List[List[Tuple[str, Tuple[int, int, int, int]]]] - The name-image location pairs of every image,
+    see `check_faces`.
+    """
+
+    if not isinstance(mappings, Gallery):
+        try: mappings: Gallery = Gallery(mappings)
+        except (AttributeError, TypeError) as exc: raise ValueError(f'Expected a Mapping. Got \'{mappings}\' instead.') from exc
+
+    backend: Backend = open_backend() if backend is None else backend
+    with METRICS.time('detect'): locations: List[List[Tuple[int, int, int, int]]] = backend.detect(imgs)
+
+    cached: List[List[Optional[Tuple[str, np.ndarray]]]] = [[None] * len(locs) for locs in locations]
+    if identities is not None: cached = [[identities.lookup(img, loc) for loc in locs] for img, locs in zip(imgs, locations)]
+
+    missed: List[List[int]] = [[i for i, hit in enumerate(hits) if hit is None] for hits in cached]
+    with METRICS.time('encode'):
+        encodings: List[List[np.ndarray]] = backend.encode(imgs, [[locs[i] for i in idxs] for locs, idxs in zip(locations, missed)])
 
-    known_encodings: List[np.ndarray] = list(map(lambda x: x[1], ordered_map))
-    unknown_face_locations: List[any] = face_recognition.face_locations(img,
-        number_of_times_to_upsample=NUM_UPSAMPLE, model=FACE_DETECT_MODEL)
-    unknown_face_encodings: List[any] = face_recognition.face_encodings(img,
-        unknown_face_locations, num_jitters=NUM_JITTERS, model=ENCODING_MODEL)
+    flat: List[np.ndarray] = [encoding for found in encodings for encoding in found]
+    with METRICS.time('match'): matched: Iterator[str] = iter(mappings.match(flat, tolerance=TOLERANCE))
+    results: List[List[Tuple[str, Tuple[int, int, int, int]]]] = []
 
-    identities: List[str] = []
-    for unknown_face in unknown_face_encodings:
-        matches: List[bool] = face_recognition.compare_faces(known_encodings, unknown_face, tolerance=TOLERANCE)
-        face_distances: np.ndarray = face_recognition.face_distance(known_encodings, unknown_face)
+    for img, locs, hits, idxs, found in zip(imgs, locations, cached, missed, encodings):
+        names: List[str] = [hit[0] if hit is not None else None for hit in hits]
+        for i, encoding in zip(idxs, found):
+            names[i] = next(matched)
+            if identities is not None: identities.store(img, locs[i], names[i], encoding)
 
-        idx: int = np.argmin(face_distances) if len(face_distances) > 0 else -1
-        name: str = ordered_map[idx][0] if idx != -1 and matches[idx] else UNKNOWN_FACE
-        identities.append(name)
+        results.append(list(zip(names, locs)))
+        METRICS.count('faces', len(locs)); METRICS.count('unknowns', names.count(UNKNOWN_FACE))
 
-    all_faces: List[Tuple[str, Tuple[int, int, int, int]]] = list(zip(identities, unknown_face_locations))
-    return all_faces
+    return results
@@ -1,11 +1,26 @@
-import numpy as np, time, cv2, os # Default Python Libraries
+import numpy as np, time, sys, cv2, os # Default Python Libraries
 
-from client.classify import check_faces, cload_images # Classification Functions
+from client.classify import check_faces, check_faces_batch, cload_images # Classification Functions
+from client.classify import encode_faces, match_faces # Detecting Once For Learning & Matching
 from client.classify import cload_cache, check_and_add_img # Caching Functions
+from client.classify import remove_cache, compact_cache # Cache Maintenance Functions
+from client.store import open_store, migrate_store # Reading & Migrating The Cache
+from client.snapshot import snapshot_key, load_snapshot, save_snapshot # Warm Starting The Gallery
+from client.gallery import Gallery, parity # Matrix Of Known Encodings
+from client.index import create_index # Exact Or Approximate Gallery Search
 from client.camera import Camera # Class For Activating The Camera
+from client.stream import StreamPipeline # Continuous Recognition Pipeline
+from client.display import Display # Rendering Results Off The Recognition Thread
+from client.batch import collect_images, classify_batch, write_results # Batch Classification
+from client.pool import WorkerPool # Recognition Across Processes
+from client.tracker import FaceTracker # Tracking Faces Between Detections
+from client.identity import IdentityCache # Reusing Identities Of Faces That Stayed Still
+from client.backend import Backend, open_backend # Face Detection & Encoding Backends
+from client.metrics import METRICS # Stage Timings & Counters
+from client.lazy import face_recognition # Models Loaded In The Background
 from client.config import * # Default Configuration Values
 
-from typing import List, Mapping, Tuple, Set # Type Hinting
+from typing import Any, Callable, List, Mapping, MutableMapping, Optional, TextIO, Tuple, Set # Type Hinting
 
 # Copying Config Values
 UNKNOWN_FACE: str = DEFAULT_UNKNOWN_FACE_ID
@@ -19,7 +34,8 @@ class Client:
     def display(self: any, img: np.ndarray, results: List[Tuple[str, Tuple[int, int, int, int]]]) -> None:
         """
         Displays the image with bounding boxes around the faces and the names of the people
-        recognized in the image.
+        recognized in the image. The boxes are drawn and the image rendered on the display's own
+        thread (in one window, or written headless, see `client.display`), so this returns at once.
 
         PARAMETERS
         ----------
@@ -27,18 +43,8 @@ class Client:
         results - The results of the facial recognition.
         """
 
-        for i, (name, (top, right, bottom, left)) in enumerate(results):
-            top = int(top / self.scale_factor);       right = int(right / self.scale_factor)
-            bottom = int(bottom / self.scale_factor); left = int(left / self.scale_factor)
-            color: Tuple[int, int, int] = COLORS[i % len(COLORS)];
-
-            cv2.rectangle(img, (left, top), (right, bottom), color, 2)
-            cv2.putText(img, name, (left, top - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.75, color, 2)
-
-        WINDOW_NAME: str = 'Recognized Faces: Frame ' + str(self.face_number);
-        cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_AUTOSIZE); self.face_number += 1
-        cv2.imshow(WINDOW_NAME, img); cv2.waitKey(0)
-        cv2.waitKey(1); cv2.destroyWindow(WINDOW_NAME); cv2.waitKey(1)
+        if self.viewer is None: self.viewer = Display(self.display_mode, self.display_output)
+        self.viewer.show(img, results, self.scale_factor); self.face_number += 1
 
 
     def classify_image(self: any, file: str, disp: bool = True, prnt: bool = True) -> List[str]:
@@ -61,7 +67,7 @@ class Client:
         try:
             img: np.ndarray = cv2.imread(file)
 
-            if (prnt): print(f'Analyzing image: {img[0][0]}, {img[0][1]}, {img[0][2]}, ...')
+            if (prnt): print(f'Analyzing image: {img.shape[1]}x{img.shape[0]}')
             results: any = self.analyze_faces(img)['matches']
             pruned: any = [(name, loc) for name, loc in results if name != UNKNOWN_FACE]
 
@@ -75,17 +81,69 @@ class Client:
         return names
 
 
-    def learn_face(self: any, names: List[str], disp: bool = True, prnt: bool = True) -> List[str]:
+    def classify_batch(self: any, sources: List[str], output: Optional[str] = None, fmt: str = DEFAULT_BATCH_FORMAT,
+                       workers: int = DEFAULT_BATCH_WORKERS, batch: int = DEFAULT_BACKEND_BATCH,
+                       processes: int = 1, prnt: bool = True) -> Mapping[str, Any]:
+        """
+        Classifies every image in [sources] (directories, globs, files, or `@list.txt` files listing
+        them) and streams the names and boxes found in each image to [output] as it goes. Images
+        are decoded in a pool of threads ahead of recognition, see `client.batch`, and recognized
+        in a pool of [processes] worker processes if more than one, see `client.pool`.
+
+        PARAMETERS
+        ----------
+        sources - The directories, globs, files and file lists to classify.
+        output  - The file to write the results to, stdout if None.
+        fmt     - Either 'jsonl' (one object per image) or 'csv' (one row per face).
+        workers - The number of decoding threads.
+        batch     - The number of images passed to the backend at once.
+        processes - The number of worker processes recognizing images, which load the gallery from the cache.
+        prnt      - Whether or not to print the intermediate results.
+
+        RETURNS
+        -------
+        Mapping[str, Any] - The number of images, faces, unknown faces and failed images, and the
+        number of seconds taken.
+        """
+
+        files: List[str] = collect_images(sources)
+        if (prnt): print(f'Classifying {len(files)} images.')
+
+        pool: Optional[WorkerPool] = None
+        if processes > 1:
+            pool = WorkerPool(workers=processes, cache_dir=self.cache_dir, scale_factor=self.scale_factor, backend=self.backend.name)
+            pool.start(); batch = max(batch, processes * DEFAULT_POOL_AHEAD)
+
+        start: float = time.perf_counter()
+        out: TextIO = sys.stdout if output is None else open(output, 'w', encoding=TEXT_ENCODING, newline='')
+
+        try:
+            records: Any = classify_batch(files, self.analyze_batch if pool is None else pool.analyze_batch,
+                                          scale_factor=self.scale_factor, workers=workers, batch=batch)
+            summary: Mapping[str, Any] = { **write_results(records, out, fmt), 'seconds': round(time.perf_counter() - start, 3) }
+        finally:
+            if output is not None: out.close()
+            if pool is not None: pool.stop()
+
+        if (prnt): print(f'Batch: {summary}')
+        return summary
+
+
+    def learn_face(self: any, names: List[str], disp: bool = True, prnt: bool = True,
+                   img: Optional[np.ndarray] = None) -> List[str]:
         """
         Given a name, will take a picture and create a mapping from that name to the
         approriate facial encodings. Also displays the image with bounding boxes if
-        disp is true, and prints intermediate results if prnt is true.
+        disp is true, and prints intermediate results if prnt is true. Faces are only
+        detected and encoded once, the largest is learned and all of them are then
+        identified from the same encodings.
 
         PARAMETERS
         ----------
         name - Name of the face in the image.
         disp - Whether or not to display the image with bounding boxes.
         prnt - Whether or not to print the intermediate results.
+        img  - The image to learn from, a new picture if None.
 
         RETURNS
         -------
@@ -94,12 +152,22 @@ class Client:
 
         name = ' '.join(names) if len(names) > 0 else "Face Num " + str(self.face_number)
 
-        if (prnt): print('Taking picture and starting analyzation process.')
-        img: np.ndarray = self.camera.adjust_read() if self.open else self.image
+        if img is None:
+            if (prnt): print('Taking picture and starting analyzation process.')
+            img, resized = self.read_frame()
+        else: resized: np.ndarray = self.prepare(img)
+
+        if (prnt): print(f'Analyzing image: {img.shape[1]}x{img.shape[0]}')
+        faces: List[Tuple[Tuple[int, int, int, int], np.ndarray]] = encode_faces(resized, self.backend)
+        METRICS.count('frames')
+
+        if len(faces) > 0:
+            largest: np.ndarray = max(faces, key=lambda face: (face[0][2] - face[0][0]) * (face[0][1] - face[0][3]))[1]
+            check_and_add_img(resized, name, self.encoding_map, cache=self.cache, cache_dir=self.cache_dir, encoding=largest)
+        elif (prnt): print(f'No faces found in {name}.')
 
-        if (prnt): print(f'Analyzing image: {img[0][0]}, {img[0][1]}, {img[0][2]}, ...')
-        check_and_add_img(img, name, self.encoding_map, cache=self.cache, cache_dir=self.cache_dir)
-        results: any = self.analyze_faces(img)['matches']
+        if self.identities is not None: self.identities.clear()
+        results: any = match_faces(faces, self.encoding_map)
         pruned: any = [(name, loc) for name, loc in results if name != UNKNOWN_FACE]
 
         if (disp): self.display(img, results)
@@ -110,7 +178,7 @@ class Client:
         return names
 
 
-    def forget_face(self: any, prnt: bool = True) -> None:
+    def forget_face(self: any, prnt: bool = True, img: Optional[np.ndarray] = None) -> Set[str]:
         """
         Will take a picture and search the mapping for your name which
         is used to delete your face from the vector mapping and delete
@@ -119,9 +187,15 @@ class Client:
         PARAMETERS
         ----------
         prnt - Whether or not to print the intermediate results.
+        img  - The image to search, a new picture if None.
+
+        RETURNS
+        -------
+        Set[str] - The names of the people forgotten.
         """
-        img: np.ndarray = self.camera.adjust_read() if self.open else self.image
-        results: any = self.analyze_faces(img)['matches']
+        prepared: bool = img is None
+        if prepared: _, img = self.read_frame()
+        results: any = self.analyze_faces(img, prepared=prepared)['matches']
         pruned: any = [(name, loc) for name, loc in results if name != UNKNOWN_FACE]
         names: Set[str] = {name for name, _ in pruned}
 
@@ -130,7 +204,237 @@ class Client:
                 print(f"Forgetting {name}")
                 time.sleep(1)
             self.encoding_map.pop(name)
-            os.remove(f"{DEFAULT_CACHE_DIR}/{name}.enc")
+            if (self.cache): remove_cache(name, self.cache_dir)
+
+        if self.identities is not None: self.identities.clear()
+        return names
+
+
+    def run_stream(self: any, duration: Optional[float] = None, frames: Optional[int] = None,
+                   callback: Optional[Callable[[int, np.ndarray, List[Tuple[str, Tuple[int, int, int, int]]]], None]] = None,
+                   prnt: bool = True) -> Mapping[str, int]:
+        """
+        Runs recognition continuously over camera frames until [duration] seconds pass, [frames]
+        frames are recognized, or Ctrl-C is pressed. Capture, recognition and publishing run as
+        separate stages that drop stale frames, so results always describe the latest frame.
+        Faces are tracked between detections if the client was created with [track], and every
+        result is displayed if it was created with [disp].
+
+        PARAMETERS
+        ----------
+        duration - The number of seconds to run for, forever if None.
+        frames   - The number of frames to recognize before stopping, unlimited if None.
+        callback - Called with the sequence number, frame and matches of every recognized frame,
+                   by default prints the names recognized whenever they change.
+        prnt     - Whether or not to print the intermediate results.
+
+        RETURNS
+        -------
+        Mapping[str, int] - How many frames each stage handled and how many were dropped.
+        """
+
+        if not self.open: raise OSError('The camera must be open to stream.')
+        previous: List[Set[str]] = [set()]
+
+        def publish(seq: int, img: np.ndarray, results: List[Tuple[str, Tuple[int, int, int, int]]]) -> None:
+            names: Set[str] = {name for name, _ in results if name != UNKNOWN_FACE}
+            if (prnt and names != previous[0]): print(f"Frame {seq}, Recognized: [{', '.join(names)}]")
+            previous[0] = names
+
+        deliver: Callable = publish if callback is None else callback
+        def show(seq: int, frame: Tuple[np.ndarray, np.ndarray], results: List[Tuple[str, Tuple[int, int, int, int]]]) -> None:
+            if (self.disp): self.display(frame[0], results)
+            deliver(seq, frame[0], results)
+
+        pipeline: StreamPipeline = StreamPipeline(lambda: self.read_frame(fresh=True),
+            lambda frame: self.analyze_faces(frame[1], track=True, prepared=True)['matches'], show)
+        if self.tracker is not None: self.tracker.reset()
+
+        if (prnt): print('Streaming, press Ctrl-C to stop.')
+        stats: Mapping[str, int] = pipeline.run(duration=duration, frames=frames)
+        if (prnt): print(f'Stream: {stats}')
+
+        METRICS.dump()
+        return stats
+
+
+    def compact_cache(self: any, prnt: bool = True) -> int:
+        """
+        Rewrites the encoding store without the encodings removed by `forget_face`.
+
+        PARAMETERS
+        ----------
+        prnt - Whether or not to print the intermediate results.
+
+        RETURNS
+        -------
+        int - The number of removed encodings that were dropped from the store.
+        """
+
+        dropped: int = compact_cache(self.cache_dir)
+        if (prnt): print(f'Compacted cache, dropped {dropped} removed encodings.')
+        return dropped
+
+
+    def migrate_cache(self: any, prnt: bool = True) -> int:
+        """
+        Moves any old one-file-per-person `.enc` encodings in the cache directory into the
+        encoding store, and adds them to the mappings.
+
+        PARAMETERS
+        ----------
+        prnt - Whether or not to print the intermediate results.
+
+        RETURNS
+        -------
+        int - The number of encodings migrated.
+        """
+
+        migrated: int = migrate_store(self.cache_dir)
+        self.load_cache()
+
+        if (prnt): print(f'Migrated {migrated} encodings into the cache.')
+        return migrated
+
+
+    def camera_stats(self: any, prnt: bool = True) -> Mapping[str, float]:
+        """
+        Returns the statistics of the camera's background capture thread (frames captured and
+        dropped, capture rate and age of the newest frame).
+
+        PARAMETERS
+        ----------
+        prnt - Whether or not to print the intermediate results.
+
+        RETURNS
+        -------
+        Mapping[str, float] - The capture statistics, empty if the camera is not open.
+        """
+
+        stats: Mapping[str, float] = self.camera.stats() if self.open else {}
+        if (prnt): print(f"Camera: {stats}")
+        return stats
+
+
+    def identity_stats(self: any, prnt: bool = True) -> Mapping[str, float]:
+        """
+        Returns the hit and miss counters of the identity cache used when streaming.
+
+        PARAMETERS
+        ----------
+        prnt - Whether or not to print the intermediate results.
+
+        RETURNS
+        -------
+        Mapping[str, float] - The cache statistics, empty if the identity cache is disabled.
+        """
+
+        stats: Mapping[str, float] = self.identities.stats() if self.identities is not None else {}
+        if (prnt): print(f"Identities: {stats}")
+        return stats
+
+
+    def detector_stats(self: any, prnt: bool = True) -> Mapping[str, Any]:
+        """
+        Returns what the detection backend measured about itself, e.g. the time spent in every
+        stage of the detection cascade and how often it escalated.
+
+        PARAMETERS
+        ----------
+        prnt - Whether or not to print the intermediate results.
+
+        RETURNS
+        -------
+        Mapping[str, Any] - The backend statistics, empty if the backend records none.
+        """
+
+        stats: Mapping[str, Any] = self.backend.stats()
+        if (prnt): print(f"Detector ({self.backend.name}): {stats}")
+        return stats
+
+
+    def display_stats(self: any, prnt: bool = True) -> Mapping[str, Any]:
+        """
+        Returns the frames handed to the display, rendered and dropped because rendering fell behind.
+
+        PARAMETERS
+        ----------
+        prnt - Whether or not to print the intermediate results.
+
+        RETURNS
+        -------
+        Mapping[str, Any] - The display statistics, empty if nothing was displayed yet.
+        """
+
+        stats: Mapping[str, Any] = self.viewer.stats() if self.viewer is not None else {}
+        if (prnt): print(f"Display: {stats}")
+        return stats
+
+
+    def close(self: any) -> None:
+        """
+        Closes the display, rendering the last frame handed to it first.
+        """
+
+        if self.viewer is not None: self.viewer.close(); self.viewer = None
+
+
+    def metrics_stats(self: any, path: Optional[str] = DEFAULT_METRICS_FILE, prnt: bool = True) -> Mapping[str, Any]:
+        """
+        Returns the latency of every pipeline stage (capture, adjust, resize, detect, encode, match,
+        display) and the frame, face and unknown face counters, and writes them to [path].
+
+        PARAMETERS
+        ----------
+        path - The file to write the metrics to (JSON if it ends in `.json`, Prometheus text otherwise),
+               `DEFAULT_METRICS_FILE` by default. Nothing is written if None.
+        prnt - Whether or not to print the intermediate results.
+
+        RETURNS
+        -------
+        Mapping[str, Any] - The uptime, counters and per-stage latency summaries in milliseconds.
+        """
+
+        stats: Mapping[str, Any] = METRICS.snapshot()
+        written: Optional[str] = METRICS.dump(path)
+
+        if (prnt):
+            print(f"Counters: {stats['counters']}")
+            for stage, summary in stats['stages'].items(): print(f"{stage}: {summary}")
+            if written is not None: print(f'Metrics written to {written}')
+        return stats
+
+
+    def startup_stats(self: any, prnt: bool = True) -> Mapping[str, Any]:
+        """
+        Returns how long the client took to start: opening the camera, opening the backend, loading
+        the gallery (and whether it came from the snapshot, and how far a lossy gallery dtype strays
+        from float64), the whole of `__init__`, importing the face models in the background, and from
+        creation until the first image was recognized.
+
+        PARAMETERS
+        ----------
+        prnt - Whether or not to print the intermediate results.
+
+        RETURNS
+        -------
+        Mapping[str, Any] - The startup timings in milliseconds, a timing is missing if that step has
+        not happened yet.
+        """
+
+        stats: MutableMapping[str, Any] = dict(self.startup)
+        if face_recognition.seconds is not None: stats['models_ms'] = round(face_recognition.seconds * 1000, 3)
+        if (prnt): print(f"Startup: {stats}")
+        return stats
+
+
+    @staticmethod
+    def elapsed(start: float) -> float:
+        """
+        Returns the milliseconds since [start] (from `time.perf_counter`), rounded to microseconds.
+        """
+
+        return round((time.perf_counter() - start) * 1000, 3)
 
 
     def take_attendance(self: any, disp: bool = True, prnt: bool = True) -> List[str]:
@@ -150,10 +454,10 @@ class Client:
         """
 
         if (prnt): print('Taking picture and starting analyzation process.')
-        img: np.ndarray = self.camera.adjust_read() if self.open else self.image
+        img: np.ndarray; resized: np.ndarray; img, resized = self.read_frame()
 
-        if (prnt): print(f'Analyzing image: {img[0][0]}, {img[0][1]}, {img[0][2]}, ...')
-        results: any = self.analyze_faces(img)['matches']
+        if (prnt): print(f'Analyzing image: {img.shape[1]}x{img.shape[0]}')
+        results: any = self.analyze_faces(resized, prepared=True)['matches']
         pruned: any = [(name, loc) for name, loc in results if name != UNKNOWN_FACE]
 
         if (disp): self.display(img, results)
@@ -167,9 +471,13 @@ class Client:
     def __init__(self: any, path: str = DEFAULT_PATH, open: bool = DEFAULT_OPEN, load: bool = DEFAULT_LOAD,
                  disp: bool = DEFAULT_DISP, prnt: bool = DEFAULT_PRINT, cache: bool = DEFAULT_CACHE,
                  cache_dir: str = DEFAULT_CACHE_DIR, mappings = None, camera: str = DEFAULT_CAMERA,
-                 scale_factor: float = DEFAULT_SCALE_FACTOR,) -> 'Client':
+                 scale_factor: float = DEFAULT_SCALE_FACTOR, threaded: bool = DEFAULT_THREADED_CAMERA,
+                 track: bool = DEFAULT_TRACK, backend: str = DEFAULT_BACKEND, snapshot: bool = DEFAULT_SNAPSHOT,
+                 display: str = DEFAULT_DISPLAY, display_output: Optional[str] = DEFAULT_DISPLAY_OUTPUT) -> 'Client':
         """
-        Initializes an instance of client with a lot of default values and configurations.
+        Initializes an instance of client with a lot of default values and configurations. The
+        face models are imported in the background meanwhile, and how long each step took is kept
+        for `startup_stats`.
 
         PARAMETERS
         ----------
@@ -180,19 +488,39 @@ class Client:
         prnt         - Whether or not to print the results of the facial recognition.
         cache        - Whether or not to load encodings from the specified cache directory.
         cache_dir    - The directory to load encodings from.
-        mappings     - The mappings to update with the added filenames.
+        mappings     - The mappings to update with the added filenames, copied into a `Gallery`.
         camera       - The camera to use.
         scale_factor - The scale factor to use when resizing images.
+        threaded     - Whether or not the camera captures frames continuously in the background.
+        track        - Whether or not to track faces between detections when streaming.
+        backend      - The backend that finds and encodes faces, either 'dlib', 'cascade', 'opencv' or 'onnx'.
+        snapshot     - Whether or not to load the gallery from a snapshot in the cache directory when
+                       nothing changed since it was taken, see `load_gallery`.
+        display        - How results are displayed, either 'window', 'mjpeg', 'frames' or 'none', see `client.display`.
+        display_output - The file or pipe 'mjpeg' frames are written to, or the directory for 'frames'.
         """
 
+        self.started: float = time.perf_counter(); face_recognition.prefetch()
+        self.startup: MutableMapping[str, Any] = {}
+
         self.open = open; self.path: str = path; self.load: bool = load;
         self.disp: bool = disp; self.prnt: bool = prnt
-        self.camera = Camera(camera) if self.open else None
+        self.camera = Camera(camera, threaded=threaded) if self.open else None
+        self.startup['camera_ms'] = self.elapsed(self.started)
         self.image: np.ndarray = None;
         self.cache: bool = cache; self.cache_dir: str = cache_dir
         self.face_number: int = 0; self.stall: float = 0.5
-        self.encoding_map = mappings if mappings is not None else {}
+        self.encoding_map: Gallery = mappings if isinstance(mappings, Gallery) else \
+            Gallery(mappings, index=create_index(DEFAULT_INDEX, cache_dir if cache else None))
         self.scale_factor = DEFAULT_SCALE_FACTOR if scale_factor is None else scale_factor
+        self.tracker: FaceTracker = FaceTracker() if track else None
+        self.identities: IdentityCache = IdentityCache() if DEFAULT_IDENTITY_CACHE else None
+        self.snapshot: bool = snapshot
+        self.display_mode: str = display; self.display_output: Optional[str] = display_output
+        self.viewer: Optional[Display] = None # Created On First Display
+
+        start: float = time.perf_counter(); self.backend: Backend = open_backend(backend)
+        self.startup['backend_ms'] = self.elapsed(start)
 
         self.task_map = {
             'classify': (lambda files: self.classify_image(files[0], disp=disp, prnt=prnt)),
@@ -206,10 +534,28 @@ class Client:
 
             'forget': (lambda _: self.forget_face(prnt=prnt)),
             'f': (lambda _: self.forget_face(prnt=prnt)),
+
+            'batch': (lambda sources: self.classify_batch(sources, prnt=prnt)),
+            'b': (lambda sources: self.classify_batch(sources, prnt=prnt)),
+
+            'compact': (lambda _: self.compact_cache(prnt=prnt)),
+            'migrate': (lambda _: self.migrate_cache(prnt=prnt)),
+
+            'camera': (lambda _: self.camera_stats(prnt=prnt)),
+            'identities': (lambda _: self.identity_stats(prnt=prnt)),
+            'detector': (lambda _: self.detector_stats(prnt=prnt)),
+            'display': (lambda _: self.display_stats(prnt=prnt)),
+            'stats': (lambda args: self.metrics_stats(args[0] if len(args) > 0 and args[0] else DEFAULT_METRICS_FILE, prnt=prnt)),
+            'startup': (lambda _: self.startup_stats(prnt=prnt)),
+
+            'stream': (lambda args: self.run_stream(float(args[0]) if len(args) > 0 and args[0] else None, prnt=prnt)),
+            's': (lambda args: self.run_stream(float(args[0]) if len(args) > 0 and args[0] else None, prnt=prnt)),
         }
 
-        if (load): self.load_images()
-        if (cache): self.load_cache()
+        start = time.perf_counter()
+        if (load or cache): self.load_gallery(load=load, cache=cache)
+        self.startup['gallery_ms'] = self.elapsed(start)
+        self.startup['init_ms'] = self.elapsed(self.started)
 
 
     def interpret_task(self: any, task: str) -> any:
@@ -229,13 +575,51 @@ class Client:
         return self.task_map[task]
 
 
-    def analyze_faces(self: any, img: np.ndarray) -> Mapping[str, List[Tuple[str, Tuple[int, int, int, int]]]]:
+    def prepare(self: any, img: np.ndarray) -> np.ndarray:
+        """
+        Resizes [img] by the scale factor and converts it from BGR to RGB, the order `face_recognition`
+        (and the encodings in the cache) expect. Resizing first keeps the conversion cheap.
+        """
+
+        with METRICS.time('resize'):
+            resized: np.ndarray = cv2.resize(img, (0, 0), fx=self.scale_factor, fy=self.scale_factor)
+            return cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+
+
+    def read_frame(self: any, fresh: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Takes a picture, returning it at full resolution (for display) and prepared for recognition
+        (resized, colour adjusted and in RGB, see `Camera.prepare_read`). Uses the last image given
+        if the camera is not open.
+
+        PARAMETERS
+        ----------
+        fresh - Whether to wait for a picture not taken before, see `Camera.read_image`.
+
+        RETURNS
+        -------
+        Tuple[np.ndarray, np.ndarray] - The picture in BGR format, and the prepared picture.
         """
-        Resizes the current image and classifies it to a face if possible.
+
+        if self.open: return self.camera.prepare_read(self.scale_factor, fresh=fresh)
+        return self.image, self.prepare(self.image)
+
+
+    def analyze_faces(self: any, img: np.ndarray, track: bool = False,
+                      prepared: bool = False) -> Mapping[str, List[Tuple[str, Tuple[int, int, int, int]]]]:
+        """
+        Resizes the current image (converting it to RGB, see `prepare`) unless it is already [prepared],
+        and classifies it to a face if possible. If [track] is true and
+        tracking is enabled, full detection only runs every `DEFAULT_DETECT_INTERVAL` frames or
+        when a track is lost, and the faces are followed by OpenCV trackers in between. Faces that
+        stayed still across frames also reuse their cached identity instead of being re-encoded.
 
         PARAMETERS
         ----------
-        img - The image to classify.
+        img      - The image to classify, in BGR format unless [prepared], in which case it is the
+                   resized RGB image returned by `prepare` or `Camera.prepare_read`.
+        track    - Whether or not [img] is the next frame of a sequence that can be tracked.
+        prepared - Whether or not [img] was already resized and converted to RGB, see `prepare`.
 
         RETURNS
         -------
@@ -243,8 +627,112 @@ class Client:
         list of locations of the faces in the image.
         """
 
-        resized: np.ndarray = cv2.resize(img, (0, 0), fx=self.scale_factor, fy=self.scale_factor)
-        return { 'matches': check_faces(resized, self.encoding_map), 'face_locations': [] }
+        resized: np.ndarray = img if prepared else self.prepare(img)
+        METRICS.count('frames')
+
+        identities: IdentityCache = self.identities if track else None
+        detect: Callable = lambda frame: check_faces(frame, self.encoding_map, identities, self.backend)
+
+        if track and self.tracker is not None: matches: Any = self.tracker.update(resized, detect)
+        else: matches = detect(resized)
+
+        self.startup.setdefault('first_recognition_ms', self.elapsed(self.started))
+        return { 'matches': matches, 'face_locations': [] }
+
+
+    def analyze_batch(self: any, imgs: List[np.ndarray]) -> List[List[Tuple[str, Tuple[int, int, int, int]]]]:
+        """
+        Resizes and classifies many unrelated images at once, passing them to the backend as one
+        batch. Unlike `analyze_faces`, the images are not treated as frames of a sequence.
+
+        PARAMETERS
+        ----------
+        imgs - The images to classify.
+
+        RETURNS
+        -------
+        List[List[Tuple[str, Tuple[int, int, int, int]]]] - The name-location pairs of every image.
+        """
+
+        resized: List[np.ndarray] = [self.prepare(img) for img in imgs]
+
+        METRICS.count('frames', len(imgs))
+        results: List[List[Tuple[str, Tuple[int, int, int, int]]]] = check_faces_batch(resized, self.encoding_map, backend=self.backend)
+
+        self.startup.setdefault('first_recognition_ms', self.elapsed(self.started))
+        return results
+
+
+    def load_gallery(self: any, load: bool = True, cache: bool = True) -> int:
+        """
+        Loads the gallery in a single pass: images from the specified path are enrolled (encoding
+        only the new or changed ones, see `client.enroll`), the cache is read once for the people
+        not among them, and everyone is copied into the gallery as one block. If snapshots are
+        enabled and the images, manifest and cache are unchanged since the last load, the gallery
+        is instead read back from the snapshot taken then, without enrolling or opening the cache.
+
+        PARAMETERS
+        ----------
+        load  - Whether or not to load images from the specified path.
+        cache - Whether or not to load encodings from the specified cache directory.
+
+        RETURNS
+        -------
+        int - The number of people in the gallery.
+        """
+
+        gallery: Gallery = self.encoding_map
+        key: Optional[str] = None; loaded: Optional[Tuple[List[str], np.ndarray]] = None
+
+        # The Snapshot Holds The Whole Gallery, So It Is Only Used When Starting Empty
+        if self.snapshot and self.cache and len(gallery) == 0:
+            key = snapshot_key(self.path if load else None, self.cache_dir)
+            loaded = load_snapshot(key, self.cache_dir)
+        self.startup['snapshot'] = 'off' if key is None else 'miss' if loaded is None else 'hit'
+
+        if loaded is None:
+            people: MutableMapping[str, np.ndarray] = {}
+            if (load): cload_images(self.path, people, cache=self.cache, cache_dir=self.cache_dir)
+
+            if (cache):
+                cached: MutableMapping[str, List[np.ndarray]] = {}
+                for name, encoding in open_store(self.cache_dir).items():
+                    if name not in people: cached.setdefault(name, []).append(encoding)
+                people.update((name, np.stack(encodings)) for name, encodings in cached.items())
+
+            stacks: Mapping[str, np.ndarray] = { name: gallery.check(encodings)[-gallery.limit:] for name, encodings in people.items() }
+            names: List[str] = [name for name, stack in stacks.items() if name not in gallery for _ in stack]
+            encodings: np.ndarray = np.concatenate([stacks[name] for name in dict.fromkeys(names)]) if names else None
+            for name in stacks.keys() & set(gallery): gallery[name] = stacks[name]
+        else: names, encodings = loaded
+
+        if names: gallery.extend(names, encodings)
+        if key is not None and loaded is None: save_snapshot(gallery, snapshot_key(self.path if load else None, self.cache_dir), self.cache_dir)
+        if names and gallery.dtype != 'float64': self.check_parity(encodings)
+        return len(gallery)
+
+
+    def check_parity(self: any, encodings: np.ndarray, rows: int = 1024, queries: int = 256) -> Mapping[str, Any]:
+        """
+        Checks that the gallery's lossy dtype finds the same distances as float64 would, on a sample
+        of up to [rows] of the loaded [encodings] searched for [queries] of them slightly perturbed,
+        warning if the error is over `DEFAULT_PARITY_TOLERANCE`.
+
+        RETURNS
+        -------
+        Mapping[str, Any] - The parity report, see `client.gallery.parity`.
+        """
+
+        rng: np.random.Generator = np.random.default_rng(0)
+        sample: np.ndarray = encodings[rng.choice(len(encodings), min(rows, len(encodings)), replace=False)]
+        probes: np.ndarray = sample[:queries] + rng.normal(0.0, 0.02, (min(queries, len(sample)), sample.shape[1]))
+
+        report: Mapping[str, Any] = parity(sample, self.encoding_map.dtype, probes)
+        self.startup['parity_error'] = round(report['max_error'], 6)
+        if report['max_error'] > DEFAULT_PARITY_TOLERANCE:
+            print(f"Warning: the {report['dtype']} gallery strays up to {report['max_error']:.4f} from float64, over the "
+                  f"tolerance of {DEFAULT_PARITY_TOLERANCE}. Set DEFAULT_GALLERY_DTYPE to 'float64' or 'float32'.")
+        return report
 
 
     def load_images(self: any) -> bool:
@@ -11,8 +11,77 @@ DEFAULT_PRINT: bool     = os.getenv('DEFAULT_PRINT', True) # Decides Whether To
 DEFAULT_CACHE: bool     = os.getenv('DEFAULT_CACHE', True) # Decides Whether To Cache Images
 DEFAULT_CACHE_DIR: str  = os.getenv('DEFAULT_CACHE_DIR', '.cache') # Path To Cache Directory
 DEFAULT_CAMERA: int     = os.getenv('DEFAULT_CAMERA', None) # Camera Index / Identifier
+DEFAULT_SNAPSHOT: bool  = os.getenv('DEFAULT_SNAPSHOT', False) # Decides Whether To Warm Start From A Gallery Snapshot
 MAC_MODE: bool          = False  # True if on a Mac, false on Linux.
 
+# Camera Config.
+DEFAULT_THREADED_CAMERA: bool = os.getenv('DEFAULT_THREADED_CAMERA', False) # Decides Whether To Capture In The Background
+DEFAULT_FRAME_BUFFER: int     = 4 # Number Of Recent Frames Kept By The Background Capture
+
+# Frame Ring Config.
+DEFAULT_RING_NAME: str    = os.getenv('DEFAULT_RING_NAME', 'facial_recognition_frames') # Shared Memory Name Of The Camera's Frame Ring
+DEFAULT_RING_SLOTS: int   = 6 # Number Of Frames Held, At Least Readers + 2
+DEFAULT_RING_READERS: int = 4 # Number Of Processes That Can Read Frames At Once
+DEFAULT_RING_POLL: float  = 0.002 # Seconds Between Checks For A New Frame
+
+# Streaming Config.
+DEFAULT_STREAM_QUEUE_SIZE: int = 1 # Number Of Items Queued Between Stages Before Dropping The Oldest
+DEFAULT_STREAM_MAX_AGE: float  = 1.0 # Seconds After Which A Captured Frame Is Too Stale To Analyze
+
+# Tracking Config.
+DEFAULT_TRACK: bool           = os.getenv('DEFAULT_TRACK', False) # Decides Whether To Track Faces Between Detections
+DEFAULT_DETECT_INTERVAL: int  = 5 # Number Of Frames Between Full Detections (K)
+DEFAULT_TRACK_LOSS: int       = 2 # Consecutive Failed Tracker Updates Before A Track Is Lost
+DEFAULT_TRACKER: str          = 'kcf' # OpenCV Tracker Kind, Falls Back To 'mil' If Unavailable
+
+# Identity Cache Config.
+DEFAULT_IDENTITY_CACHE: bool       = os.getenv('DEFAULT_IDENTITY_CACHE', True) # Decides Whether To Reuse Identities When Streaming
+DEFAULT_IDENTITY_TTL: float        = 2.0 # Seconds A Cached Identity Is Reused Before Re-Encoding
+DEFAULT_IDENTITY_SIZE: int         = 32 # Maximum Number Of Cached Faces Before Evicting The Least Recently Used
+DEFAULT_IDENTITY_IOU: float        = 0.6 # Minimum Overlap With The Last Location To Count As Not Moved
+DEFAULT_IDENTITY_SIMILARITY: float = 0.9 # Minimum Appearance Similarity To Count As Not Drifted
+
+# Batch Config.
+DEFAULT_BATCH_WORKERS: int = 4 # Number Of Threads Decoding Images Ahead Of Recognition
+DEFAULT_BATCH_AHEAD: int   = 16 # Maximum Number Of Images Decoded Ahead Of Recognition
+DEFAULT_BATCH_FORMAT: str  = 'jsonl' # Either 'jsonl' or 'csv'
+
+# Backend Config.
+DEFAULT_BACKEND: str             = os.getenv('DEFAULT_BACKEND', 'dlib') # Either 'dlib', 'cascade', 'opencv' or 'onnx'
+DEFAULT_BACKEND_BATCH: int       = 8 # Number Of Images Detected At Once By Backends That Batch
+DEFAULT_DETECT_CONFIDENCE: float = 0.5 # Minimum Confidence Of A Face For The 'opencv' And 'onnx' Detectors
+DEFAULT_CROP_PADDING: float      = 0.5 # Fraction Of A Face's Size Kept Around It In The Crop It Is Encoded From
+DEFAULT_OPENCV_MODEL: str        = os.getenv('DEFAULT_OPENCV_MODEL', 'resources/models/res10_300x300_ssd_iter_140000.caffemodel')
+DEFAULT_OPENCV_CONFIG: str       = os.getenv('DEFAULT_OPENCV_CONFIG', 'resources/models/deploy.prototxt')
+DEFAULT_ONNX_MODEL: str          = os.getenv('DEFAULT_ONNX_MODEL', 'resources/models/version-RFB-320.onnx')
+
+# Detection Cascade Config.
+DEFAULT_CASCADE_SCALE: float      = 0.5 # Scale Of The First, Cheap HOG Pass Relative To The Analyzed Image
+DEFAULT_CASCADE_CONFIDENCE: float = 0.5 # HOG Score Below Which A Face Is Verified By The CNN
+DEFAULT_CASCADE_CNN: bool         = True # Whether The Cascade Falls Back To / Verifies With The CNN
+DEFAULT_CASCADE_PADDING: float    = 0.5 # Fraction Of A Face's Size Added Around It When Verifying It
+
+# Worker Pool Config.
+DEFAULT_POOL_WORKERS: int   = os.cpu_count() or 1 # Number Of Recognition Processes
+DEFAULT_POOL_AHEAD: int     = 2 # Frames Per Worker Submitted Ahead Of The Results Handed Out
+DEFAULT_POOL_TIMEOUT: float = 120.0 # Seconds To Wait For Workers To Load Or Answer
+
+# Service Config.
+DEFAULT_SERVICE_ADDRESS: str   = os.getenv('DEFAULT_SERVICE_ADDRESS', 'tcp://127.0.0.1:5555') # ZeroMQ Endpoint (tcp:// Or ipc://)
+DEFAULT_SERVICE_WINDOW: float  = 0.005 # Seconds To Wait For More Requests To Batch With The First
+DEFAULT_SERVICE_BATCH: int     = 8 # Maximum Number Of Images Recognized In One Pass
+DEFAULT_SERVICE_TIMEOUT: float = 30.0 # Seconds A Service Client Waits For A Reply
+
+# Display Config.
+DEFAULT_DISPLAY: str          = os.getenv('DEFAULT_DISPLAY', 'window') # Either 'window', 'mjpeg', 'frames' Or 'none'
+DEFAULT_DISPLAY_OUTPUT: str   = os.getenv('DEFAULT_DISPLAY_OUTPUT', None) # File Or Pipe ('-' For stdout) For 'mjpeg', Directory For 'frames'
+DEFAULT_WINDOW_NAME: str      = 'Recognized Faces' # Title Of The Display Window
+DEFAULT_DISPLAY_QUALITY: int  = 80 # JPEG Quality Of Headless Frames
+DEFAULT_DISPLAY_POLL: float   = 0.03 # Seconds Between Handling Window Events While No Frame Arrives
+
+# Metrics Config.
+DEFAULT_METRICS_FILE: str = os.getenv('DEFAULT_METRICS_FILE', None) # Metrics Dump (.json For JSON, Prometheus Text Otherwise)
+
 # Facial Recognition Config.
 COLORS: List[Tuple[int, int, int]] = [(0, 0, 255), (0, 255, 0), (255, 0, 0)] # Bounding Box Colors
 DEFAULT_SCALE_FACTOR: float        = 0.5 # Scale Factor For Image Resizing
@@ -25,5 +94,24 @@ TOLERANCE: float                   = 0.5 # Tolerance For Matching Faces
 IMG_EXTs: List[str]                = ['jpg', 'jpeg', 'png'] # Allowed Image Extensions
 ENCODING_EXT: str                  = 'enc' # Encoding File Extension
 TEXT_ENCODING: str                 = 'utf-8' # Text Encoding Format
+DEFAULT_ENCODING_DIM: int          = 128 # Length Of A Facial Encoding
+DEFAULT_GALLERY_CAPACITY: int      = 64 # Initial Number Of Rows Allocated For The Gallery
+DEFAULT_IDENTITY_ENCODINGS: int    = 8 # Maximum Encodings Kept Per Person, The Oldest Is Evicted First
+DEFAULT_AGGREGATION: str           = 'min' # Either 'min', 'centroid' or 'topk' (Mean Of The K Closest)
+DEFAULT_TOP_K: int                 = 3 # Number Of Closest Encodings Averaged By 'topk' Aggregation
+DEFAULT_STORE_CAPACITY: int        = 64 # Initial Number Of Records Allocated In The Encoding Store
+DEFAULT_STORE_NAME_BYTES: int      = 64 # Bytes Reserved For Each Name In The Encoding Store
+DEFAULT_STORE_DTYPE: str           = 'float32' # Either 'float32' or 'float64', Encodings As Stored On Disk
+DEFAULT_GALLERY_DTYPE: str         = 'float32' # Either 'float64', 'float32' or 'int8', Encodings As Held In Memory
+DEFAULT_PARITY_TOLERANCE: float    = 0.01 # Largest Distance Error Allowed For A Lossy Gallery dtype Against float64
+STORE_FILENAME: str                = 'encodings.store' # Encoding Store File Name (In Cache Directory)
+MANIFEST_FILENAME: str             = 'sources.json' # Source Image Manifest File Name (In Cache Directory)
+INDEX_FILENAME: str                = 'index.npz' # Approximate Index File Name (In Cache Directory)
+SNAPSHOT_FILENAME: str             = 'snapshot.npz' # Gallery Snapshot File Name (In Cache Directory)
+DEFAULT_INDEX: str                 = 'brute' # Either 'brute' (Exact) Or 'ivf' (Approximate)
+DEFAULT_IVF_LISTS: int             = 0 # Number Of Clusters In The Approximate Index, 0 For Square Root Of Size
+DEFAULT_IVF_PROBES: int            = 8 # Number Of Nearest Clusters Searched Per Face
+DEFAULT_IVF_MIN_SIZE: int          = 6000 # Gallery Size From Which The Approximate Index Is Used (Brute Force Is Faster Below)
+DEFAULT_ENROLL_WORKERS: int        = os.getenv('DEFAULT_ENROLL_WORKERS', None) # Enrollment Processes, None For One Per Core
 
 del sys, os, logging # Remove From Namespace
@@ -0,0 +1,191 @@
+import numpy as np, threading, queue, sys, os, cv2 # Default Python Libraries
+
+from client.stream import LatestQueue # Slot Holding Only The Latest Result
+from client.metrics import METRICS # Stage Timings
+from client.config import * # Default Configurations
+
+from typing import Any, BinaryIO, List, Mapping, MutableMapping, Optional, Tuple # Type Hinting
+
+# Copying Config Values
+DISPLAY: str        = DEFAULT_DISPLAY
+DISPLAY_OUTPUT: str = DEFAULT_DISPLAY_OUTPUT
+WINDOW_NAME: str    = DEFAULT_WINDOW_NAME
+JPEG_QUALITY: int   = DEFAULT_DISPLAY_QUALITY
+DISPLAY_POLL: float = DEFAULT_DISPLAY_POLL
+MODES: List[str]    = ['window', 'mjpeg', 'frames', 'none']
+Results = List[Tuple[str, Tuple[int, int, int, int]]]
+
+def annotate(img: np.ndarray, results: Results, scale_factor: float = 1.0) -> np.ndarray:
+    """
+    Draws a bounding box and name for every face in [results] onto [img], in place.
+
+    PARAMETERS
+    ----------
+    img          - The image, in BGR format.
+    results      - The names and (top, right, bottom, left) locations of the faces.
+    scale_factor - The factor the image was resized by before the faces were found, so locations
+                   are divided by it.
+
+    RETURNS
+    -------
+    np.ndarray - The annotated image.
+    """
+
+    for i, (name, (top, right, bottom, left)) in enumerate(results):
+        top = int(top / scale_factor);       right = int(right / scale_factor)
+        bottom = int(bottom / scale_factor); left = int(left / scale_factor)
+        color: Tuple[int, int, int] = COLORS[i % len(COLORS)]
+
+        cv2.rectangle(img, (left, top), (right, bottom), color, 2)
+        cv2.putText(img, name, (left, top - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.75, color, 2)
+
+    return img
+
+class Display:
+    """
+    Shows annotated frames without ever holding up recognition. `show` only drops the frame into
+    a slot holding the latest one (replacing any not yet drawn) and returns, and a dedicated thread
+    draws the boxes and renders the newest frame: into one persistent window that is reused for
+    every frame, or headless, as a stream of JPEGs (MJPEG, e.g. for `ffplay -f mjpeg`) written to a
+    file or pipe, or as numbered JPEG files in a directory.
+
+    On a Mac, OpenCV windows can only be used from the main thread, so windows are rendered by
+    `show` itself there (still without waiting for a key).
+    """
+
+    def __init__(self: any, mode: str = DISPLAY, output: Optional[str] = DISPLAY_OUTPUT, name: str = WINDOW_NAME,
+                 quality: int = JPEG_QUALITY, threaded: Optional[bool] = None) -> 'Display':
+        """
+        Initializes the display and starts its thread.
+
+        PARAMETERS
+        ----------
+        mode     - Either 'window', 'mjpeg' (JPEGs written one after another to [output]), 'frames'
+                   (a JPEG file per frame in the directory [output]) or 'none'.
+        output   - The file or pipe ('-' for stdout) for 'mjpeg', or the directory for 'frames'.
+        name     - The title of the window.
+        quality  - The JPEG quality of headless frames, 0 to 100.
+        threaded - Whether or not frames are rendered on a dedicated thread, always except for
+                   windows on a Mac if None.
+
+        RAISES
+        ------
+        ValueError - Raised when [mode] is not a known mode, or a headless mode has no [output].
+        """
+
+        if mode not in MODES: raise ValueError(f'Expected one of {MODES}. Got \'{mode}\' instead.')
+        if mode in ('mjpeg', 'frames') and not output: raise ValueError(f'The \'{mode}\' display needs an output.')
+
+        self.mode: str = mode; self.output: Optional[str] = output; self.name: str = name
+        self.params: List[int] = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+        self.threaded: bool = not (MAC_MODE and mode == 'window') if threaded is None else threaded
+        self.slot: LatestQueue = LatestQueue(1)
+        self.stream: Optional[BinaryIO] = None; self.opened: bool = False
+        self.counts: MutableMapping[str, int] = { 'shown': 0, 'rendered': 0 }
+        self.error: Optional[str] = None
+
+        # Qt Aborts The Whole Process When It Has No Screen, So That Is Checked Before Any Window Opens
+        if mode == 'window' and sys.platform.startswith('linux') and not (os.getenv('DISPLAY') or os.getenv('WAYLAND_DISPLAY')):
+            self.error = 'No screen to open a window on, set DEFAULT_DISPLAY to a headless mode instead.'
+
+        self.running: threading.Event = threading.Event(); self.thread: Optional[threading.Thread] = None
+        if self.threaded and mode != 'none' and self.error is None:
+            self.running.set()
+            self.thread = threading.Thread(target=self.loop, name='display', daemon=True); self.thread.start()
+
+    def __enter__(self: any) -> 'Display':
+        return self
+
+    def __exit__(self: any, exc_type: any, exc_val: any, exc_tb: any) -> None:
+        self.close()
+
+    def show(self: any, img: np.ndarray, results: Results, scale_factor: float = 1.0) -> None:
+        """
+        Hands [img] and its [results] to the display, replacing the frame waiting to be rendered if
+        the display has fallen behind. Returns straight away.
+
+        PARAMETERS
+        ----------
+        img          - The image, in BGR format. It is copied, so the caller may reuse it.
+        results      - The names and locations of the faces recognized in [img].
+        scale_factor - The factor [img] was resized by before the faces were found.
+        """
+
+        if self.mode == 'none' or self.error is not None: return
+        self.counts['shown'] += 1
+
+        frame: Tuple[np.ndarray, Results, float] = (img.copy(), list(results), scale_factor)
+        if self.threaded: self.slot.put(frame)
+        else: self.render(*frame); cv2.waitKey(1)
+
+    def loop(self: any) -> None:
+        """
+        The display thread, rendering the latest frame whenever there is one. An idle window still
+        has its events handled every `DEFAULT_DISPLAY_POLL` seconds, so it stays responsive.
+        """
+
+        while self.running.is_set():
+            try: frame: Tuple[np.ndarray, Results, float] = self.slot.get(timeout=DISPLAY_POLL)
+            except queue.Empty: frame = None
+
+            if frame is not None: self.render(*frame)
+            if self.mode == 'window' and self.opened: cv2.waitKey(1)
+
+    def render(self: any, img: np.ndarray, results: Results, scale_factor: float) -> None:
+        """
+        Annotates [img] and renders it in the display's mode. An output that fails (e.g. the reader
+        of a pipe went away, or there is no screen for the window) stops the display instead of
+        failing recognition.
+        """
+
+        with METRICS.time('display'):
+            annotate(img, results, scale_factor)
+
+            try:
+                if self.mode == 'window':
+                    if not self.opened: cv2.namedWindow(self.name, cv2.WINDOW_AUTOSIZE); self.opened = True
+                    cv2.imshow(self.name, img)
+                elif self.mode == 'mjpeg': self.write(self.encode(img))
+                else:
+                    os.makedirs(self.output, exist_ok=True)
+                    with open(os.path.join(self.output, f'frame_{self.counts["rendered"] + 1:06}.jpg'), 'wb') as file: file.write(self.encode(img))
+            except (OSError, ValueError, cv2.error) as exc:
+                self.error = f'{type(exc).__name__}: {exc}'; self.running.clear(); return
+
+        self.counts['rendered'] += 1
+
+    def encode(self: any, img: np.ndarray) -> bytes:
+        ok: bool; data: np.ndarray; ok, data = cv2.imencode('.jpg', img, self.params)
+        if not ok: raise ValueError('Unable to encode the frame as a JPEG.')
+        return data.tobytes()
+
+    def write(self: any, data: bytes) -> None:
+        """
+        Appends one JPEG to the MJPEG output, opening it first if needed.
+        """
+
+        if self.stream is None: self.stream = sys.stdout.buffer if self.output == '-' else open(self.output, 'wb')
+        self.stream.write(data); self.stream.flush()
+
+    def stats(self: any) -> Mapping[str, Any]:
+        """
+        Returns the mode, the frames shown and rendered, the frames dropped because the display fell
+        behind, and the error that stopped a headless output, if any.
+        """
+
+        return { 'mode': self.mode, **self.counts, 'dropped': self.slot.dropped, 'error': self.error }
+
+    def close(self: any) -> None:
+        """
+        Renders the frame still waiting, stops the thread, and closes the window or output.
+        """
+
+        if self.thread is not None:
+            self.running.clear(); self.thread.join(timeout=5.0); self.thread = None
+            try:
+                if self.error is None: self.render(*self.slot.get(timeout=0))
+            except queue.Empty: pass
+
+        if self.opened: cv2.destroyWindow(self.name); cv2.waitKey(1); self.opened = False
+        if self.stream is not None and self.stream is not sys.stdout.buffer: self.stream.close()
+        self.stream = None
@@ -0,0 +1,234 @@
+import numpy as np, os, cv2 # Default Python Libraries
+
+from client.lazy import face_recognition # Imported On First Use
+from client.store import open_store # Memory-Mapped Encoding Store
+from client.manifest import Manifest # Sources Of Cached Encodings
+from client.backend import encode_face # Encoding Faces From Crops
+from client.config import * # Default Configurations
+
+from concurrent.futures import ProcessPoolExecutor, as_completed # Process Pool
+from typing import Any, List, Mapping, MutableMapping, Optional, Tuple, Union # Type Hinting
+
+# Copying Config Values
+WORKERS: int        = DEFAULT_ENROLL_WORKERS
+LIMIT: int          = DEFAULT_IDENTITY_ENCODINGS
+
+def prepare_image(source: Union[str, bytes, np.ndarray], size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+    """
+    Decodes an image in memory and resizes it to exactly [size], so images downloaded or read
+    from disk can be passed straight into enrollment without temporary files.
+
+    PARAMETERS
+    ----------
+    source - The path to the image, its encoded (e.g. JPEG) bytes, or the image as an RGB np.ndarray.
+    size   - The (width, height) to resize to, ignoring the aspect ratio. Not resized if None.
+
+    RAISES
+    ------
+    ValueError - Raised when the bytes can not be decoded as an image.
+
+    RETURNS
+    -------
+    np.ndarray - The image in RGB format.
+    """
+
+    if isinstance(source, str): img: np.ndarray = face_recognition.load_image_file(source)
+    elif isinstance(source, (bytes, bytearray)):
+        img: np.ndarray = cv2.imdecode(np.frombuffer(source, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None: raise ValueError('unable to decode image bytes.')
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    else: img: np.ndarray = source
+
+    if size is not None and (img.shape[1], img.shape[0]) != tuple(size):
+        img = cv2.resize(img, tuple(size), interpolation=cv2.INTER_AREA)
+    return img
+
+def encode_image(name: str, source: Union[str, bytes, np.ndarray],
+                 size: Optional[Tuple[int, int]] = None) -> Tuple[str, Optional[np.ndarray], Optional[str]]:
+    """
+    Decodes and resizes (if needed) and encodes a single image. Runs inside the worker processes,
+    so it catches every error and returns it instead, one bad image never stops the others.
+
+    PARAMETERS
+    ----------
+    name   - The name of the person in the image.
+    source - The path to the image, its encoded bytes, or the image itself as an RGB np.ndarray.
+    size   - The (width, height) to resize to before encoding, see `prepare_image`.
+
+    RETURNS
+    -------
+    Tuple[str, Optional[np.ndarray], Optional[str]] - The name, the encoding of the largest face
+    found (None on failure), and the error message (None on success).
+    """
+
+    try:
+        img: np.ndarray = prepare_image(source, size)
+        locations: List[Tuple[int, int, int, int]] = face_recognition.face_locations(img)
+        if len(locations) == 0: return name, None, f'No faces found in {name}.'
+
+        largest: Tuple[int, int, int, int] = max(locations, key=lambda loc: (loc[2] - loc[0]) * (loc[1] - loc[3]))
+        return name, encode_face(img, largest), None
+
+    except Exception as exc: return name, None, f'Unable to encode {name}: {exc}'
+
+def enroll(jobs: List[Tuple[str, Union[str, bytes, np.ndarray]]], workers: Optional[int] = WORKERS,
+           size: Optional[Tuple[int, int]] = None, prnt: bool = True) -> Tuple[Mapping[str, np.ndarray], Mapping[str, List[str]]]:
+    """
+    Decodes, resizes and encodes every image in [jobs] in a pool of processes, one per available
+    core by default. Images that fail are reported and skipped without affecting the rest. A name
+    may appear in several jobs, each of its images giving it another encoding.
+
+    PARAMETERS
+    ----------
+    jobs    - The name of the person in each image, paired with its path, encoded bytes or RGB np.ndarray.
+    workers - The number of processes to use, the number of cores if None. Runs in this process
+              if 1 or if there is only one image.
+    size    - The (width, height) to resize every image to before encoding, not resized if None.
+    prnt    - Whether or not to print progress as images are encoded.
+
+    RETURNS
+    -------
+    Tuple[Mapping[str, np.ndarray], Mapping[str, List[str]]] - The (K x 128) stacked encodings of
+    the images that succeeded, in the order of [jobs], and the errors of the images that failed,
+    both by name.
+    """
+
+    jobs: List[Tuple[str, Union[str, bytes, np.ndarray]]] = list(jobs)
+    workers: int = min((os.cpu_count() or 1) if workers is None else int(workers), max(len(jobs), 1))
+
+    results: MutableMapping[int, Tuple[str, np.ndarray]] = {}
+    errors: MutableMapping[str, List[str]] = {}
+
+    def record(done: int, job: int, name: str, encoding: Optional[np.ndarray], error: Optional[str]) -> None:
+        if error is None: results[job] = (name, encoding)
+        else: errors.setdefault(name, []).append(error)
+
+        if (prnt): print(f'Encoded {done:03}/{len(jobs):03}: {name}' if error is None else f'Failed {done:03}/{len(jobs):03}: {error}')
+
+    if workers <= 1:
+        for done, (name, source) in enumerate(jobs, 1): record(done, done - 1, *encode_image(name, source, size))
+    else:
+        face_recognition.load() # Finished Before Forking, So No Worker Inherits A Half-Done Background Import
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures: Mapping = { pool.submit(encode_image, name, source, size): job for job, (name, source) in enumerate(jobs) }
+            for done, future in enumerate(as_completed(futures), 1): record(done, futures[future], *future.result())
+
+    grouped: MutableMapping[str, List[np.ndarray]] = {}
+    for job in sorted(results): grouped.setdefault(results[job][0], []).append(results[job][1])
+
+    return { name: np.stack(encodings) for name, encodings in grouped.items() }, errors
+
+def commit(encodings: Mapping[str, np.ndarray], cache_dir: str = DEFAULT_CACHE_DIR) -> None:
+    """
+    Writes every encoding to the store in [cache_dir] in one batched append, replacing the older
+    encodings of the same names. Only the newest `DEFAULT_IDENTITY_ENCODINGS` of each are kept.
+
+    PARAMETERS
+    ----------
+    encodings - The (K x 128) stacked encodings to cache, by name.
+    cache_dir - The directory of the `cache`, default specified by `DEFAULT_CACHE_DIR`.
+    """
+
+    pairs: List[Tuple[str, np.ndarray]] = [(name, encoding) for name, stack in encodings.items() for encoding in stack[-LIMIT:]]
+    open_store(cache_dir).extend(pairs, replace=True)
+
+def enroll_images(jobs: List[Tuple[str, Union[str, bytes, np.ndarray]]],
+                  mappings: Optional[MutableMapping[str, np.ndarray]] = None, cache: bool = True,
+                  cache_dir: str = DEFAULT_CACHE_DIR, workers: Optional[int] = WORKERS,
+                  size: Optional[Tuple[int, int]] = None, root: Optional[str] = None,
+                  prnt: bool = True) -> MutableMapping[str, np.ndarray]:
+    """
+    Enrolls every image in [jobs] under its name, a person with several images getting one
+    encoding per image. A person whose images' content hashes and encoding parameters match the
+    manifest (see `client.manifest`) is loaded from the cache, the rest are encoded in parallel
+    and cached all at once. If [root] is given, the encodings of people whose images used to be
+    inside [root] but have since disappeared are dropped.
+
+    PARAMETERS
+    ----------
+    jobs      - The name of the person in each image, paired with its path, encoded bytes or RGB np.ndarray.
+    mappings  - The mappings to update with the added names.
+    cache     - Whether to check and update the cache.
+    cache_dir - The directory of the `cache`, default specified by `DEFAULT_CACHE_DIR`.
+    workers   - The number of processes to use, the number of cores if None.
+    size      - The (width, height) to resize every image to before encoding, not resized if None.
+    root      - The directory the images were found in, used to drop encodings of deleted images.
+    prnt      - Whether or not to print progress as images are encoded.
+
+    RETURNS
+    -------
+    MutableMapping[str, np.ndarray] - The updated mappings of names to encodings.
+    """
+
+    mappings: MutableMapping[str, np.ndarray] = {} if mappings is None else mappings
+    pending: List[Tuple[str, Union[str, bytes, np.ndarray]]] = []
+
+    if not cache:
+        encodings: Mapping[str, np.ndarray]; encodings, _ = enroll(jobs, workers=workers, size=size, prnt=prnt)
+        mappings.update(encodings)
+        return mappings
+
+    store: Any = open_store(cache_dir)
+    manifest: Manifest = Manifest(cache_dir)
+    entries: MutableMapping[str, Mapping[str, Any]] = {}
+    people: MutableMapping[str, List[Union[str, bytes, np.ndarray]]] = {}
+
+    for name, source in jobs: people.setdefault(name, []).append(source)
+
+    for name, sources in people.items():
+        try: entry: Mapping[str, Any] = manifest.fingerprint(name, sources, size)
+        except OSError as exc: print(f'Unable to read {name}: {exc}'); continue
+
+        if name in store and manifest.unchanged(name, entry): mappings[name] = store.get(name); manifest.record(name, entry)
+        else: pending += [(name, source) for source in sources]; entries[name] = entry
+
+    encodings: Mapping[str, np.ndarray]; errors: Mapping[str, List[str]]
+    encodings, errors = enroll(pending, workers=workers, size=size, prnt=prnt)
+    commit(encodings, cache_dir)
+
+    for name in encodings: manifest.record(name, entries[name])
+    stale: List[str] = [name for name in errors if name not in encodings and name in manifest.entries]
+    if root is not None: stale += [name for name in manifest.missing(root) if name not in people]
+
+    for name in stale:
+        if (prnt): print(f'Dropping cached encoding of {name}, its source changed or was removed.')
+        store.remove(name); manifest.drop(name); mappings.pop(name, None)
+
+    manifest.save()
+    mappings.update(encodings)
+    return mappings
+
+def enroll_files(files: List[str], mappings: Optional[MutableMapping[str, np.ndarray]] = None, cache: bool = True,
+                 cache_dir: str = DEFAULT_CACHE_DIR, workers: Optional[int] = WORKERS, root: Optional[str] = None,
+                 prnt: bool = True) -> MutableMapping[str, np.ndarray]:
+    """
+    Enrolls every image file in [files] under its file name (without extension), see `enroll_images`.
+    Files in a subdirectory of [root] are instead enrolled under the name of that subdirectory, so
+    a person can be given several images (e.g. `people/Name/front.jpg` and `people/Name/side.jpg`).
+
+    PARAMETERS
+    ----------
+    files     - The paths to the images.
+    mappings  - The mappings to update with the added names.
+    cache     - Whether to check and update the cache.
+    cache_dir - The directory of the `cache`, default specified by `DEFAULT_CACHE_DIR`.
+    workers   - The number of processes to use, the number of cores if None.
+    root      - The directory the files were found in, used to drop encodings of deleted files.
+    prnt      - Whether or not to print progress as images are encoded.
+
+    RETURNS
+    -------
+    MutableMapping[str, np.ndarray] - The updated mappings of names to encodings.
+    """
+
+    jobs: List[Tuple[str, str]] = []
+
+    for file in files:
+        base: str = os.path.basename(file); folder: str = os.path.dirname(os.path.abspath(file))
+        if root is not None and os.path.isdir(root) and folder != os.path.abspath(root):
+            jobs.append((os.path.basename(folder), file)); continue
+
+        try: jobs.append((base[:base.rindex('.')], file))
+        except ValueError as exc: raise ValueError(f'file named {base} does not contain a ".".') from exc
+
+    return enroll_images(jobs, mappings, cache=cache, cache_dir=cache_dir, workers=workers, root=root, prnt=prnt)
@@ -0,0 +1,473 @@
+import numpy as np # Default Python Libraries
+
+from client.index import Index, BruteForceIndex, squared_distances # Searching The Known Encodings
+from client.config import * # Default Configurations
+
+from typing import Any, Iterator, List, Mapping, MutableMapping, Optional, Tuple # Type Hinting
+
+# Copying Config Values
+UNKNOWN_FACE: str        = DEFAULT_UNKNOWN_FACE_ID
+ENCODING_DIM: int        = DEFAULT_ENCODING_DIM
+GALLERY_CAPACITY: int    = DEFAULT_GALLERY_CAPACITY
+IDENTITY_ENCODINGS: int  = DEFAULT_IDENTITY_ENCODINGS
+AGGREGATION: str         = DEFAULT_AGGREGATION
+TOP_K: int               = DEFAULT_TOP_K
+AGGREGATIONS: List[str]  = ['min', 'centroid', 'topk']
+GALLERY_DTYPE: str       = DEFAULT_GALLERY_DTYPE
+DTYPES: Mapping[str, type] = { 'float64': np.float64, 'float32': np.float32, 'int8': np.int8 }
+
+class Gallery(MutableMapping):
+    """
+    A persistent gallery of known faces, stored as a contiguous (N x 128) matrix of encodings
+    with precomputed squared norms and parallel arrays of names and identity labels. The matrix
+    is float32 by default, half the memory of float64 for distances that differ by about 1e-6,
+    or int8 with a scale per row, an eighth of the memory for distances that differ by about 1e-3
+    (see `parity`), at the cost of converting the matrix back to floats on every search.
+    Each person may have several encodings (e.g. different poses or lighting), up to [limit],
+    after which the oldest is evicted. Behaves like the old `encoding_map`, a mapping of names
+    to their (K x 128) stack of encodings, but keeps the matrix up to date on every insert and
+    delete so matching never has to rebuild it.
+    """
+
+    def __init__(self: any, mappings: Optional[Mapping[str, np.ndarray]] = None, dim: int = ENCODING_DIM,
+                 capacity: int = GALLERY_CAPACITY, index: Optional[Index] = None, limit: int = IDENTITY_ENCODINGS,
+                 aggregate: str = AGGREGATION, top_k: int = TOP_K, dtype: str = GALLERY_DTYPE) -> 'Gallery':
+        """
+        Initializes an empty gallery with room for [capacity] encodings, and adds the
+        encodings in [mappings] if given.
+
+        PARAMETERS
+        ----------
+        mappings  - An optional mapping of names to encodings (or stacks of encodings) to start with.
+        dim       - The dimension of each encoding.
+        capacity  - The number of rows to preallocate, grown by doubling when full.
+        index     - The index used to search the gallery, exact brute force if None.
+        limit     - The maximum number of encodings kept for each person.
+        aggregate - How the distances to a person's encodings are combined when matching, see `scores`.
+        top_k     - The number of closest encodings averaged by the 'topk' aggregation.
+        dtype     - How the matrix holds encodings, either 'float64', 'float32' or 'int8'.
+        """
+
+        if aggregate not in AGGREGATIONS: raise ValueError(f'Expected one of {AGGREGATIONS}. Got \'{aggregate}\' instead.')
+        if dtype not in DTYPES: raise ValueError(f'Expected one of {list(DTYPES)}. Got \'{dtype}\' instead.')
+
+        self.dim: int                             = dim
+        self.size: int                            = 0
+        self.limit: int                           = max(limit, 1)
+        self.aggregate: str                       = aggregate
+        self.top_k: int                           = max(top_k, 1)
+        self.dtype: str                           = dtype
+        self.matrix: np.ndarray                   = np.zeros((max(capacity, 1), dim), dtype=DTYPES[dtype])
+        self.scales: Optional[np.ndarray]         = np.ones(max(capacity, 1), dtype=np.float32) if dtype == 'int8' else None
+        self.norms: np.ndarray                    = np.zeros(max(capacity, 1), dtype=np.float64)
+        self.names: np.ndarray                    = np.empty(max(capacity, 1), dtype=object)
+        self.labels: np.ndarray                   = np.zeros(max(capacity, 1), dtype=np.int64)
+        self.rows: MutableMapping[str, List[int]] = {}
+        self.ids: MutableMapping[str, int]        = {}
+        self.identities: List[str]                = []
+        self.centroids: np.ndarray                = np.zeros((max(capacity, 1), dim), dtype=np.float64)
+        self.groups: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        self.index: Index                         = BruteForceIndex() if index is None else index
+
+        self.index.bind(self)
+        if mappings is not None: self.update(mappings)
+
+    def __getitem__(self: any, name: str) -> np.ndarray:
+        return self.vectors(self.rows[name])
+
+    def __setitem__(self: any, name: str, encodings: np.ndarray) -> None:
+        """
+        Replaces every encoding for [name] with [encodings], keeping the newest [limit] of them.
+
+        PARAMETERS
+        ----------
+        name      - The name of the person [encodings] are for.
+        encodings - A single encoding, or a (K x 128) stack of encodings, for the person, [name].
+        """
+
+        encodings: np.ndarray = self.check(encodings)[-self.limit:]
+
+        if name in self.rows:
+            rows: List[int] = self.rows[name]
+            while rows: self.remove_row(rows.pop())
+        else: self.add_identity(name)
+
+        for encoding in encodings: self.insert_row(name, encoding)
+        self.refresh(name)
+
+    def __delitem__(self: any, name: str) -> None:
+        """
+        Removes every encoding for [name] by moving the last rows into their slots, so the
+        matrix stays contiguous without shifting every row after them.
+
+        PARAMETERS
+        ----------
+        name - The name of the person to remove.
+        """
+
+        rows: List[int] = self.rows[name]
+        while rows: self.remove_row(rows.pop())
+
+        del self.rows[name]
+        ident: int = self.ids.pop(name); last: int = len(self.identities) - 1
+        moved: str = self.identities.pop()
+
+        if ident != last:
+            self.identities[ident] = moved; self.ids[moved] = ident
+            self.centroids[ident] = self.centroids[last]; self.labels[self.rows[moved]] = ident
+
+        self.groups = None
+
+    def __iter__(self: any) -> Iterator[str]:
+        return iter(list(self.identities))
+
+    def __len__(self: any) -> int:
+        return len(self.identities)
+
+    def check(self: any, encodings: np.ndarray) -> np.ndarray:
+        """
+        Returns [encodings] as a (K x dim) float64 array, raising a ValueError if they are not
+        encodings of the gallery's dimension.
+        """
+
+        encodings: np.ndarray = np.asarray(encodings, dtype=np.float64)
+        if encodings.ndim > 2 or encodings.shape[-1] != self.dim or encodings.size == 0:
+            raise ValueError(f'Expected encodings of length {self.dim}. Got shape {encodings.shape} instead.')
+        return encodings.reshape(-1, self.dim)
+
+    def quantize(self: any, encodings: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Returns the (K x dim) float64 [encodings] as the matrix holds them, and for int8 the scale of
+        every row (its largest magnitude over 127, so each row uses the whole int8 range).
+        """
+
+        if self.scales is None: return encodings.astype(self.matrix.dtype), None
+
+        scales: np.ndarray = np.abs(encodings).max(axis=1) / 127.0; scales[scales == 0.0] = 1.0
+        return np.rint(encodings / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+    def vectors(self: any, rows: Any) -> np.ndarray:
+        """
+        Returns the encodings in [rows] (anything that indexes the matrix) as float64, as they are
+        held, so scaled back from int8.
+        """
+
+        vectors: np.ndarray = self.matrix[rows].astype(np.float64)
+        if self.scales is not None: vectors *= self.scales[rows][..., None]
+        return vectors
+
+    def store(self: any, start: int, encodings: np.ndarray) -> None:
+        """
+        Writes the (K x dim) float64 [encodings] into the rows from [start] on, with their norms.
+        """
+
+        end: int = start + len(encodings)
+        codes: np.ndarray; scales: Optional[np.ndarray]; codes, scales = self.quantize(encodings)
+        self.matrix[start:end] = codes
+        if scales is not None: self.scales[start:end] = scales
+
+        # The Norms Are Those Of The Encodings As Held, So Distances Stay Consistent
+        held: np.ndarray = self.vectors(slice(start, end))
+        self.norms[start:end] = np.einsum('ij,ij->i', held, held)
+
+    def add(self: any, name: str, encoding: np.ndarray) -> int:
+        """
+        Adds another encoding for [name] without replacing the ones it already has, evicting its
+        oldest encodings if it now has more than [limit].
+
+        PARAMETERS
+        ----------
+        name     - The name of the person [encoding] is for.
+        encoding - The new encoding (or stack of encodings) for the person, [name].
+
+        RETURNS
+        -------
+        int - The number of older encodings that were evicted.
+        """
+
+        encodings: np.ndarray = self.check(encoding)
+        if name not in self.rows: self.add_identity(name)
+
+        for encoding in encodings: self.insert_row(name, encoding)
+        evicted: int = self.evict(name)
+        self.refresh(name)
+        return evicted
+
+    def extend(self: any, names: List[str], encodings: np.ndarray) -> None:
+        """
+        Adds many new encodings at once, copying them into the matrix as one block. A name may
+        appear several times, giving that person several encodings (the newest [limit] are kept).
+
+        PARAMETERS
+        ----------
+        names     - The names of the people, none of which may be in the gallery already.
+        encodings - A (len(names) x 128) array of their encodings.
+        """
+
+        encodings: np.ndarray = np.asarray(encodings, dtype=np.float64).reshape(len(names), self.dim)
+        if any(name in self.rows for name in names): raise ValueError('Names added in bulk must be new.')
+
+        start: int = self.size; end: int = start + len(names)
+        while end > self.matrix.shape[0]: self.grow()
+
+        added: List[str] = list(dict.fromkeys(names)); first: int = len(self.identities)
+        self.reserve(first + len(added))
+        self.ids.update(zip(added, range(first, first + len(added))))
+        self.identities += added; self.rows.update((name, []) for name in added)
+
+        self.store(start, encodings)
+        self.names[start:end] = names; self.labels[start:end] = [self.ids[name] for name in names]
+        self.size = end; self.groups = None
+
+        for row, name in enumerate(names, start): self.rows[name].append(row)
+        self.index.extend(start, end)
+        for name in added:
+            if len(self.rows[name]) > self.limit: self.evict(name)
+        self.refresh()
+
+    def add_identity(self: any, name: str) -> None:
+        """
+        Gives [name] the next identity label, with no encodings yet.
+        """
+
+        self.reserve(len(self.identities) + 1)
+        self.ids[name] = len(self.identities); self.identities.append(name); self.rows[name] = []
+
+    def reserve(self: any, count: int) -> None:
+        """
+        Grows the centroids by doubling until there is room for [count] people.
+        """
+
+        capacity: int = self.centroids.shape[0]
+        while capacity < count: capacity *= 2
+        if capacity == self.centroids.shape[0]: return
+
+        centroids: np.ndarray = np.zeros((capacity, self.dim), dtype=np.float64)
+        centroids[:len(self.identities)] = self.centroids[:len(self.identities)]; self.centroids = centroids
+
+    def insert_row(self: any, name: str, encoding: np.ndarray) -> None:
+        """
+        Appends [encoding] as a new row for [name], whose identity must already exist.
+        """
+
+        if self.size == self.matrix.shape[0]: self.grow()
+        row: int = self.size; self.size += 1
+
+        self.store(row, encoding[None])
+        self.names[row] = name; self.labels[row] = self.ids[name]
+        self.rows[name].append(row); self.groups = None
+        self.index.add(row)
+
+    def remove_row(self: any, row: int) -> None:
+        """
+        Removes [row], which must already have been taken out of its person's rows, by moving the
+        last row into its slot.
+        """
+
+        last: int = self.size - 1
+        self.index.remove(row)
+
+        if row != last:
+            self.matrix[row] = self.matrix[last]; self.norms[row] = self.norms[last]
+            if self.scales is not None: self.scales[row] = self.scales[last]
+            self.names[row] = self.names[last]; self.labels[row] = self.labels[last]
+
+            rows: List[int] = self.rows[self.names[row]]
+            rows[rows.index(last)] = row
+            self.index.move(last, row)
+
+        self.names[last] = None; self.size = last; self.groups = None
+
+    def evict(self: any, name: str) -> int:
+        """
+        Removes the oldest encodings of [name] until it has at most [limit].
+
+        RETURNS
+        -------
+        int - The number of encodings evicted.
+        """
+
+        rows: List[int] = self.rows[name]
+        evicted: int = max(len(rows) - self.limit, 0)
+
+        for _ in range(evicted):
+            row: int = rows.pop(0)
+            self.remove_row(row)
+
+        return evicted
+
+    def refresh(self: any, name: Optional[str] = None) -> None:
+        """
+        Recomputes the centroid of [name] from its encodings, or of every person if None.
+        """
+
+        if name is not None:
+            self.centroids[self.ids[name]] = self.vectors(self.rows[name]).mean(axis=0); return
+
+        if len(self.identities) == 0: return
+        order, starts, sizes = self.grouping()
+        totals: np.ndarray = np.zeros((self.size + 1, self.dim), dtype=np.float64)
+        np.cumsum(self.vectors(order), axis=0, out=totals[1:])
+        self.centroids[:len(self.identities)] = (totals[starts + sizes] - totals[starts]) / sizes[:, None]
+
+    def grow(self: any) -> None:
+        """
+        Doubles the capacity of the matrix, norms, names and labels, copying the existing rows over.
+        """
+
+        capacity: int = self.matrix.shape[0] * 2
+
+        matrix: np.ndarray = np.zeros((capacity, self.dim), dtype=self.matrix.dtype)
+        norms: np.ndarray = np.zeros(capacity, dtype=np.float64)
+        names: np.ndarray = np.empty(capacity, dtype=object)
+        labels: np.ndarray = np.zeros(capacity, dtype=np.int64)
+
+        matrix[:self.size] = self.matrix[:self.size]; norms[:self.size] = self.norms[:self.size]
+        names[:self.size] = self.names[:self.size]; labels[:self.size] = self.labels[:self.size]
+        self.matrix = matrix; self.norms = norms; self.names = names; self.labels = labels
+
+        if self.scales is not None:
+            scales: np.ndarray = np.ones(capacity, dtype=np.float32)
+            scales[:self.size] = self.scales[:self.size]; self.scales = scales
+
+    def distances(self: any, encodings: np.ndarray) -> np.ndarray:
+        """
+        Computes the euclidean distance between every given encoding and every known encoding
+        in one batched pass, using |a - b|^2 = |a|^2 + |b|^2 - 2 a.b with the precomputed norms.
+
+        PARAMETERS
+        ----------
+        encodings - A (M x 128) array of encodings to compare against the gallery.
+
+        RETURNS
+        -------
+        np.ndarray - A (M x N) array of distances, where N is the number of known encodings.
+        """
+
+        encodings: np.ndarray = np.asarray(encodings, dtype=np.float64).reshape(-1, self.dim)
+        scales: Optional[np.ndarray] = self.scales[:self.size] if self.scales is not None else None
+        return np.sqrt(squared_distances(encodings, self.matrix[:self.size], self.norms[:self.size], scales))
+
+    def grouping(self: any) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the rows ordered by identity, where each identity's run starts, and how long each
+        run is. Cached until the gallery next changes.
+        """
+
+        if self.groups is None:
+            order: np.ndarray = np.argsort(self.labels[:self.size], kind='stable')
+            sizes: np.ndarray = np.bincount(self.labels[:self.size], minlength=len(self.identities))
+            starts: np.ndarray = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+            self.groups = (order, starts, sizes)
+
+        return self.groups
+
+    def scores(self: any, encodings: np.ndarray, aggregate: Optional[str] = None) -> np.ndarray:
+        """
+        Computes the distance from every given encoding to every known person in one vectorized
+        pass, combining the distances to each person's encodings with [aggregate]:
+
+        'min'      - The distance to their closest encoding.
+        'centroid' - The distance to the mean of their encodings.
+        'topk'     - The mean distance to their [top_k] closest encodings.
+
+        PARAMETERS
+        ----------
+        encodings - A (M x 128) array of encodings to compare against the gallery.
+        aggregate - How to combine the distances, the gallery's [aggregate] if None.
+
+        RETURNS
+        -------
+        np.ndarray - A (M x P) array of distances, where P is the number of known people, in the
+        order of [identities].
+        """
+
+        aggregate: str = self.aggregate if aggregate is None else aggregate
+        encodings: np.ndarray = np.asarray(encodings, dtype=np.float64).reshape(-1, self.dim)
+        count: int = len(self.identities)
+
+        if aggregate == 'centroid': return np.sqrt(squared_distances(encodings, self.centroids[:count]))
+        if aggregate not in AGGREGATIONS: raise ValueError(f'Expected one of {AGGREGATIONS}. Got \'{aggregate}\' instead.')
+
+        order, starts, sizes = self.grouping()
+        distances: np.ndarray = self.distances(encodings)[:, order]
+        if aggregate == 'min': return np.minimum.reduceat(distances, starts, axis=1)
+
+        # Sorting With Each Identity's Label As An Offset Sorts Within Runs Without Mixing Them
+        offsets: np.ndarray = self.labels[order] * (float(distances.max(initial=0.0)) + 1.0)
+        distances = np.sort(distances + offsets, axis=1) - offsets
+
+        ranks: np.ndarray = np.arange(self.size) - np.repeat(starts, sizes)
+        closest: np.ndarray = np.where(ranks < self.top_k, distances, 0.0)
+        return np.add.reduceat(closest, starts, axis=1) / np.minimum(sizes, self.top_k)
+
+    def match(self: any, encodings: List[np.ndarray], tolerance: float = TOLERANCE,
+              aggregate: Optional[str] = None) -> List[str]:
+        """
+        Matches every given encoding against the whole gallery at once, returning the name of the
+        closest known person for each, or the unknown identifier if none are within [tolerance].
+        With 'min' aggregation the gallery's index is searched for the closest encoding, otherwise
+        the distances to each person are aggregated, see `scores`.
+
+        PARAMETERS
+        ----------
+        encodings - The encodings of the faces to identify.
+        tolerance - The maximum distance for two encodings to be considered the same face.
+        aggregate - How to combine the distances to each person's encodings, the gallery's if None.
+
+        RETURNS
+        -------
+        List[str] - The identity of each encoding, in the same order as [encodings].
+        """
+
+        aggregate: str = self.aggregate if aggregate is None else aggregate
+
+        if len(encodings) == 0: return []
+        if self.size == 0: return [UNKNOWN_FACE] * len(encodings)
+
+        queries: np.ndarray = np.asarray(np.stack(encodings), dtype=np.float64)
+
+        if aggregate == 'min':
+            best: np.ndarray; idxs: np.ndarray
+            best, idxs = self.index.search(queries)
+            return [self.names[idx] if dist <= tolerance else UNKNOWN_FACE for idx, dist in zip(idxs, best)]
+
+        scores: np.ndarray = self.scores(queries, aggregate)
+        idxs: np.ndarray = np.argmin(scores, axis=1)
+        best: np.ndarray = scores[np.arange(len(idxs)), idxs]
+        return [self.identities[idx] if dist <= tolerance else UNKNOWN_FACE for idx, dist in zip(idxs, best)]
+
+def parity(encodings: np.ndarray, dtype: str = GALLERY_DTYPE, queries: Optional[np.ndarray] = None,
+           tolerance: float = TOLERANCE) -> Mapping[str, Any]:
+    """
+    Measures how far a gallery holding [encodings] as [dtype] strays from one holding them as
+    float64, by searching both for every query.
+
+    PARAMETERS
+    ----------
+    encodings - The (N x 128) encodings to hold.
+    dtype     - The gallery dtype to compare against float64.
+    queries   - The (M x 128) encodings to search for, [encodings] themselves if None.
+    tolerance - The maximum distance for two encodings to be considered the same face.
+
+    RETURNS
+    -------
+    Mapping[str, Any] - The largest and mean absolute error of the distances, the fraction of
+    queries matched to the same encoding (or to none) by both, and the bytes of each matrix.
+    """
+
+    encodings: np.ndarray = np.asarray(encodings, dtype=np.float64).reshape(-1, ENCODING_DIM)
+    queries: np.ndarray = encodings if queries is None else np.asarray(queries, dtype=np.float64).reshape(-1, ENCODING_DIM)
+    names: List[str] = [str(i) for i in range(len(encodings))]
+
+    exact: Gallery = Gallery(capacity=len(encodings), dtype='float64'); exact.extend(names, encodings)
+    lossy: Gallery = Gallery(capacity=len(encodings), dtype=dtype); lossy.extend(names, encodings)
+
+    expected: np.ndarray = exact.distances(queries); actual: np.ndarray = lossy.distances(queries)
+    errors: np.ndarray = np.abs(actual - expected)
+    matches: Tuple[List[str], List[str]] = (exact.match(list(queries), tolerance), lossy.match(list(queries), tolerance))
+
+    return { 'dtype': dtype, 'max_error': float(errors.max(initial=0.0)), 'mean_error': float(errors.mean()) if errors.size else 0.0,
+             'agreement': float(np.mean([a == b for a, b in zip(*matches)])) if len(queries) else 1.0,
+             'bytes': int(lossy.matrix.nbytes + (0 if lossy.scales is None else lossy.scales.nbytes)),
+             'float64_bytes': int(exact.matrix.nbytes) }
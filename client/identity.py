@@ -0,0 +1,162 @@
+import numpy as np, time, cv2 # Default Python Libraries
+
+from client.config import * # Default Configurations
+
+from collections import OrderedDict # Least Recently Used Ordering
+from typing import Mapping, MutableMapping, Optional, Tuple # Type Hinting
+
+# Copying Config Values
+IDENTITY_TTL: float        = DEFAULT_IDENTITY_TTL
+IDENTITY_SIZE: int         = DEFAULT_IDENTITY_SIZE
+IDENTITY_IOU: float        = DEFAULT_IDENTITY_IOU
+IDENTITY_SIMILARITY: float = DEFAULT_IDENTITY_SIMILARITY
+THUMBNAIL: int             = 16
+
+def overlap(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> float:
+    """
+    Returns the intersection over union of two (top, right, bottom, left) locations.
+
+    PARAMETERS
+    ----------
+    a - The first location.
+    b - The second location.
+
+    RETURNS
+    -------
+    float - The intersection over union, between 0 (disjoint) and 1 (identical).
+    """
+
+    height: int = min(a[2], b[2]) - max(a[0], b[0])
+    width: int = min(a[1], b[1]) - max(a[3], b[3])
+    if height <= 0 or width <= 0: return 0.0
+
+    inter: float = float(height * width)
+    union: float = (a[2] - a[0]) * (a[1] - a[3]) + (b[2] - b[0]) * (b[1] - b[3]) - inter
+    return inter / union if union > 0 else 0.0
+
+def thumbnail(img: np.ndarray, location: Tuple[int, int, int, int]) -> np.ndarray:
+    """
+    Returns a small normalized grayscale patch of the face at [location], used to check whether
+    the face still looks the same. Its dot product with another thumbnail is their normalized
+    cross-correlation, 1 being identical.
+
+    PARAMETERS
+    ----------
+    img      - The image the face is in.
+    location - The location of the face in (top, right, bottom, left) format.
+
+    RETURNS
+    -------
+    np.ndarray - The flattened, zero-mean, unit-norm patch.
+    """
+
+    top, right, bottom, left = location
+    crop: np.ndarray = img[max(top, 0):bottom, max(left, 0):right]
+    if crop.size == 0: return np.zeros(THUMBNAIL * THUMBNAIL, dtype=np.float32)
+
+    if crop.ndim == 3: crop = cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY)
+    patch: np.ndarray = cv2.resize(crop, (THUMBNAIL, THUMBNAIL), interpolation=cv2.INTER_AREA).astype(np.float32).ravel()
+
+    patch -= patch.mean()
+    norm: float = float(np.linalg.norm(patch))
+    return patch / norm if norm > 0 else patch
+
+class IdentityCache:
+    """
+    A short-lived cache of the identities of faces seen in recent frames. A face that barely
+    moved since it was last seen and still looks the same reuses its last identity and encoding,
+    so it is not re-encoded. Entries expire after a time to live, and the least recently used
+    entry is evicted when the cache is full, so faces are re-encoded on expiry or drift.
+    """
+
+    def __init__(self: any, ttl: float = IDENTITY_TTL, size: int = IDENTITY_SIZE, iou: float = IDENTITY_IOU,
+                 similarity: float = IDENTITY_SIMILARITY) -> 'IdentityCache':
+        """
+        Initializes an empty cache.
+
+        PARAMETERS
+        ----------
+        ttl        - The number of seconds an identity is reused before the face is re-encoded.
+        size       - The maximum number of faces cached before evicting the least recently used.
+        iou        - The minimum overlap with the last location for a face to count as not moved.
+        similarity - The minimum appearance similarity with the encoded face to count as the same.
+        """
+
+        self.ttl: float = ttl; self.size: int = max(size, 1)
+        self.iou: float = iou; self.similarity: float = similarity
+
+        self.entries: MutableMapping[int, Tuple[float, Tuple[int, int, int, int], np.ndarray, str, np.ndarray]] = OrderedDict()
+        self.next: int = 0; self.hits: int = 0; self.misses: int = 0; self.evictions: int = 0
+
+    def clear(self: any) -> None:
+        """
+        Drops every cached identity, e.g. after the known faces change.
+        """
+
+        self.entries.clear()
+
+    def lookup(self: any, img: np.ndarray, location: Tuple[int, int, int, int]) -> Optional[Tuple[str, np.ndarray]]:
+        """
+        Returns the cached identity and encoding of the face at [location], if a cached face
+        overlaps it enough, looks similar enough, and has not expired.
+
+        PARAMETERS
+        ----------
+        img      - The image the face is in.
+        location - The location of the face in (top, right, bottom, left) format.
+
+        RETURNS
+        -------
+        Optional[Tuple[str, np.ndarray]] - The name and encoding of the face, or None on a miss.
+        """
+
+        now: float = time.monotonic()
+        for key in [key for key, entry in self.entries.items() if now - entry[0] > self.ttl]: del self.entries[key]
+
+        best: Optional[int] = None; best_iou: float = self.iou
+        for key, (_, last, _, _, _) in self.entries.items():
+            score: float = overlap(location, last)
+            if score >= best_iou: best = key; best_iou = score
+
+        if best is not None:
+            created, _, patch, name, encoding = self.entries[best]
+            if float(patch @ thumbnail(img, location)) >= self.similarity:
+                self.entries[best] = (created, location, patch, name, encoding)
+                self.entries.move_to_end(best); self.hits += 1
+                return name, encoding
+
+            del self.entries[best]
+
+        self.misses += 1
+        return None
+
+    def store(self: any, img: np.ndarray, location: Tuple[int, int, int, int], name: str, encoding: np.ndarray) -> None:
+        """
+        Caches the identity and encoding of the face at [location], evicting the least recently
+        used face if the cache is full.
+
+        PARAMETERS
+        ----------
+        img      - The image the face is in.
+        location - The location of the face in (top, right, bottom, left) format.
+        name     - The identity of the face.
+        encoding - The encoding of the face.
+        """
+
+        self.entries[self.next] = (time.monotonic(), location, thumbnail(img, location), name, encoding)
+        self.next += 1
+
+        while len(self.entries) > self.size: self.entries.popitem(last=False); self.evictions += 1
+
+    def stats(self: any) -> Mapping[str, float]:
+        """
+        Returns the hit and miss counters of the cache.
+
+        RETURNS
+        -------
+        Mapping[str, float] - The hits, misses, hit rate, evictions and current number of entries.
+        """
+
+        total: int = self.hits + self.misses
+        return { 'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0,
+                 'evictions': self.evictions, 'entries': len(self.entries) }
@@ -0,0 +1,434 @@
+import numpy as np, time, sys, os # Default Python Libraries
+
+from client.config import * # Default Configurations
+
+from typing import Any, Callable, List, Mapping, MutableMapping, Optional, Tuple # Type Hinting
+
+# Copying Config Values
+INDEX_KIND: str   = DEFAULT_INDEX
+IVF_LISTS: int    = DEFAULT_IVF_LISTS
+IVF_PROBES: int   = DEFAULT_IVF_PROBES
+IVF_MIN_SIZE: int = DEFAULT_IVF_MIN_SIZE
+
+def squared_distances(queries: np.ndarray, vectors: np.ndarray, norms: Optional[np.ndarray] = None,
+                      scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Computes the squared euclidean distance between every query and every vector in one pass.
+    The products run in the precision of [vectors], float32 unless they are float64.
+
+    PARAMETERS
+    ----------
+    queries - A (M x D) array of queries.
+    vectors - A (N x D) array of vectors, float or int8.
+    norms   - The precomputed squared norms of [vectors] (after scaling), computed if None.
+    scales  - The scale of every row of [vectors], if they are int8 (see `Gallery.quantize`).
+
+    RETURNS
+    -------
+    np.ndarray - A (M x N) array of squared distances, clipped at zero.
+    """
+
+    if norms is None:
+        held: np.ndarray = vectors if scales is None else vectors * scales[:, None]
+        norms = np.einsum('ij,ij->i', held, held)
+
+    products: np.ndarray = queries.astype(np.float64 if vectors.dtype == np.float64 else np.float32) @ vectors.T
+    if scales is not None: products *= scales[None, :]
+
+    squared: np.ndarray = np.einsum('ij,ij->i', queries, queries)[:, None] + norms[None, :]
+    squared -= 2.0 * products
+    return np.maximum(squared, 0.0, out=squared)
+
+def exact_search(gallery: Any, queries: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the nearest row of [gallery] to every query, comparing against every row.
+
+    PARAMETERS
+    ----------
+    gallery - The gallery to search.
+    queries - A (M x D) array of encodings.
+
+    RETURNS
+    -------
+    Tuple[np.ndarray, np.ndarray] - The distance to and index of the nearest row for every query.
+    """
+
+    size: int = gallery.size
+    scales: Optional[np.ndarray] = gallery.scales[:size] if gallery.scales is not None else None
+    squared: np.ndarray = squared_distances(queries, gallery.matrix[:size], gallery.norms[:size], scales)
+    rows: np.ndarray = np.argmin(squared, axis=1)
+    return np.sqrt(squared[np.arange(len(rows)), rows]), rows
+
+class Index:
+    """
+    The interface between a `Gallery` and the search over its rows. The gallery owns the
+    encodings, and tells its index whenever a row is added, removed, or moved (when a removal
+    fills the hole with the last row), so indexes can keep their own structure up to date
+    incrementally instead of being rebuilt.
+    """
+
+    def bind(self: any, gallery: Any) -> None:
+        """
+        Attaches the index to [gallery] and indexes every row it already has.
+
+        PARAMETERS
+        ----------
+        gallery - The gallery whose rows are searched.
+        """
+
+        self.gallery: Any = gallery
+        for row in range(gallery.size): self.add(row)
+
+    def add(self: any, row: int) -> None:
+        """
+        Called after [row] of the gallery is added or overwritten.
+        """
+
+    def extend(self: any, start: int, stop: int) -> None:
+        """
+        Called after the rows from [start] up to [stop] are added to the gallery in bulk.
+        """
+
+        for row in range(start, stop): self.add(row)
+
+    def remove(self: any, row: int) -> None:
+        """
+        Called before [row] of the gallery is removed.
+        """
+
+    def move(self: any, old: int, new: int) -> None:
+        """
+        Called after the gallery copies row [old] into row [new].
+        """
+
+    def search(self: any, queries: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the nearest gallery row to every query.
+
+        PARAMETERS
+        ----------
+        queries - A (M x D) array of encodings.
+
+        RETURNS
+        -------
+        Tuple[np.ndarray, np.ndarray] - The distance to and index of the nearest row for every query.
+        """
+
+        raise NotImplementedError
+
+    def save(self: any) -> None:
+        """
+        Persists the index next to the encoding cache, if it has anything worth persisting.
+        """
+
+class BruteForceIndex(Index):
+    """
+    Exact search, comparing every query against every row of the gallery in one batched pass.
+    """
+
+    def search(self: any, queries: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return exact_search(self.gallery, queries)
+
+class IVFIndex(Index):
+    """
+    Approximate search with an inverted file: the encodings are clustered with k-means, and a
+    query is only compared against the rows of the [probes] clusters whose centroids are nearest
+    to it. The index keeps its own copy of the rows sorted by cluster, so every cluster is one
+    contiguous slice and all queries are compared against the clusters they probe in one pass.
+
+    Rows added since the copy was laid out are kept aside and searched exactly, and removed rows
+    are masked out, so inserts and deletes stay cheap; the copy is laid out again once enough of
+    either have built up. Until the gallery reaches [min_size] rows, search is exact. Training
+    (and laying out) only ever happens as rows are added, when the gallery first reaches
+    [min_size] rows or has grown fourfold since the last training, never while searching. The
+    centroids are persisted at [path], so they are not retrained on every start.
+    """
+
+    def __init__(self: any, path: Optional[str] = None, lists: int = IVF_LISTS, probes: int = IVF_PROBES,
+                 min_size: int = IVF_MIN_SIZE) -> 'IVFIndex':
+        """
+        Initializes the index, loading its centroids from [path] if they were saved there.
+
+        PARAMETERS
+        ----------
+        path     - The file the centroids are persisted in, not persisted if None.
+        lists    - The number of clusters, the square root of the gallery size if 0.
+        probes   - The number of nearest clusters searched per query.
+        min_size - The gallery size from which clustering is used instead of exact search.
+        """
+
+        self.path: Optional[str]             = path
+        self.lists: int                      = lists
+        self.probes: int                     = max(probes, 1)
+        self.min_size: int                   = min_size
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_size: int               = 0
+
+        if path is not None and os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    self.centroids = data['centroids']; self.trained_size = int(data['trained_size'])
+            except (OSError, KeyError, ValueError): self.centroids = None
+
+    def bind(self: any, gallery: Any) -> None:
+        if self.centroids is not None and self.centroids.shape[1] != gallery.dim: self.centroids = None
+        self.gallery: Any = gallery
+        self.clear(); self.extend(0, gallery.size)
+
+    def clear(self: any) -> None:
+        """
+        Empties the sorted copy, so every row of the gallery is pending.
+        """
+
+        capacity: int = self.gallery.matrix.shape[0]
+        self.assign: np.ndarray                = np.full(capacity, -1, dtype=np.int64)
+        self.position: np.ndarray              = np.full(capacity, -1, dtype=np.int64)
+        self.vectors: Optional[np.ndarray]     = None
+        self.norms: Optional[np.ndarray]       = None
+        self.scales: Optional[np.ndarray]      = None
+        self.order: np.ndarray                 = np.zeros(0, dtype=np.int64)
+        self.offsets: Optional[np.ndarray]     = None
+        self.pending: MutableMapping[int, None] = dict.fromkeys(range(self.gallery.size))
+        self.dead: int                         = 0
+
+    def nearest(self: any, vectors: np.ndarray, count: int = 1, chunk: int = 8192) -> np.ndarray:
+        """
+        Returns the [count] nearest centroids of every vector, nearest first, [chunk] vectors at a time.
+        """
+
+        if len(vectors) > chunk: return np.concatenate([self.nearest(vectors[i:i + chunk], count, chunk) for i in range(0, len(vectors), chunk)])
+
+        squared: np.ndarray = squared_distances(vectors, self.centroids)
+        if count == 1: return np.argmin(squared, axis=1)[:, None]
+
+        count: int = min(count, squared.shape[1])
+        nearest: np.ndarray = np.argpartition(squared, count - 1, axis=1)[:, :count]
+        order: np.ndarray = np.argsort(np.take_along_axis(squared, nearest, axis=1), axis=1)
+        return np.take_along_axis(nearest, order, axis=1)
+
+    def train(self: any, iterations: int = 10, seed: int = 0) -> None:
+        """
+        Clusters the gallery's rows with k-means (on a sample of at most 64 rows per cluster),
+        then lays every row out by its nearest centroid and saves the centroids.
+
+        PARAMETERS
+        ----------
+        iterations - The number of k-means iterations.
+        seed       - The seed for sampling and initialization.
+        """
+
+        size: int = self.gallery.size
+        lists: int = self.lists if self.lists > 0 else max(int(np.sqrt(size)), 1)
+        rng: np.random.Generator = np.random.default_rng(seed)
+
+        sample: np.ndarray = self.gallery.vectors(rng.choice(size, min(size, 64 * lists), replace=False))
+        centroids: np.ndarray = sample[rng.choice(len(sample), min(lists, len(sample)), replace=False)].copy()
+
+        for _ in range(iterations):
+            labels: np.ndarray = np.argmin(squared_distances(sample, centroids), axis=1)
+            sums: np.ndarray = np.zeros_like(centroids); np.add.at(sums, labels, sample)
+            counts: np.ndarray = np.bincount(labels, minlength=len(centroids))
+            filled: np.ndarray = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+
+        self.centroids = centroids; self.trained_size = size
+        self.clear(); self.layout(); self.save()
+
+    def layout(self: any) -> None:
+        """
+        Assigns the pending rows to their nearest centroids, and copies every live row into one
+        array sorted by cluster, with the offset at which each cluster starts.
+        """
+
+        size: int = self.gallery.size
+        pending: np.ndarray = np.fromiter(self.pending, dtype=np.int64, count=len(self.pending))
+        if len(pending) > 0: self.assign[pending] = self.nearest(self.gallery.vectors(pending))[:, 0]
+
+        self.order = np.argsort(self.assign[:size], kind='stable')
+        self.vectors = self.gallery.matrix[self.order]; self.norms = self.gallery.norms[self.order]
+        self.scales = self.gallery.scales[self.order] if self.gallery.scales is not None else None
+        self.offsets = np.searchsorted(self.assign[self.order], np.arange(len(self.centroids) + 1))
+
+        self.position[:] = -1; self.position[self.order] = np.arange(size)
+        self.pending = {}; self.dead = 0
+
+    def maintain(self: any) -> None:
+        """
+        Trains the index when the gallery first reaches [min_size] rows or has grown fourfold since
+        it was trained, and lays it out again once the rows pending or removed since the last layout
+        are more than a sixteenth of it.
+        """
+
+        size: int = self.gallery.size
+        if size < self.min_size: return
+        if self.centroids is None or size > 4 * self.trained_size: self.train(); return
+        if self.offsets is None or len(self.pending) + self.dead > max(len(self.order) // 16, 64): self.layout()
+
+    def grow(self: any) -> None:
+        """
+        Makes room for every row the gallery has capacity for.
+        """
+
+        capacity: int = self.gallery.matrix.shape[0]
+        if capacity <= len(self.assign): return
+
+        extra: np.ndarray = np.full(capacity - len(self.assign), -1, dtype=np.int64)
+        self.assign = np.concatenate([self.assign, extra]); self.position = np.concatenate([self.position, extra])
+
+    def discard(self: any, row: int) -> None:
+        """
+        Takes [row] out of the index, masking it out of the sorted copy or dropping it from the pending rows.
+        """
+
+        self.pending.pop(row, None)
+        position: int = int(self.position[row])
+        if position < 0: return
+
+        self.norms[position] = np.inf; self.order[position] = -1
+        self.position[row] = -1; self.dead += 1
+
+    def add(self: any, row: int) -> None:
+        self.grow(); self.discard(row)
+        self.assign[row] = -1; self.pending[row] = None
+        self.maintain()
+
+    def extend(self: any, start: int, stop: int) -> None:
+        self.grow()
+        self.assign[start:stop] = -1; self.pending.update(dict.fromkeys(range(start, stop)))
+        self.maintain()
+
+    def remove(self: any, row: int) -> None:
+        self.discard(row); self.assign[row] = -1
+
+    def move(self: any, old: int, new: int) -> None:
+        self.assign[new] = self.assign[old]; self.assign[old] = -1
+
+        if old in self.pending: del self.pending[old]; self.pending[new] = None; return
+        position: int = int(self.position[old])
+        if position >= 0: self.order[position] = new; self.position[new] = position; self.position[old] = -1
+
+    def search(self: any, queries: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self.gallery.size < self.min_size or self.offsets is None: return exact_search(self.gallery, queries)
+
+        # Every Cluster Probed By Any Query Is One Slice Of The Sorted Copy, Compared Against Every
+        # Query Without Copying It, And The Clusters A Query Did Not Probe Are Masked Out
+        probes: np.ndarray = self.nearest(queries, self.probes)
+        clusters: np.ndarray = np.unique(probes)
+        starts: np.ndarray = self.offsets[clusters]; sizes: np.ndarray = self.offsets[clusters + 1] - starts
+        spans: List[slice] = [slice(start, start + size) for start, size in zip(starts.tolist(), sizes.tolist()) if size > 0]
+
+        gather: Callable[[np.ndarray], np.ndarray] = lambda array: np.concatenate([array[span] for span in spans]) if spans else array[:0]
+        cast: np.ndarray = queries.astype(np.float64 if self.vectors.dtype == np.float64 else np.float32)
+        products: np.ndarray = np.concatenate([cast @ self.vectors[span].T for span in spans], axis=1) if spans else np.zeros((len(queries), 0))
+        if self.scales is not None: products *= gather(self.scales)[None, :]
+
+        rows: np.ndarray = gather(self.order)
+        squared: np.ndarray = np.einsum('ij,ij->i', queries, queries)[:, None] + gather(self.norms)[None, :] - 2.0 * products
+        np.maximum(squared, 0.0, out=squared)
+
+        if len(queries) > 1:
+            probed: np.ndarray = np.zeros((len(queries), len(self.centroids)), dtype=bool)
+            probed[np.arange(len(queries))[:, None], probes] = True
+            squared[~probed[:, np.repeat(clusters, sizes)]] = np.inf
+
+        # Rows Added Since The Layout Are Few, And Compared Exactly
+        if self.pending:
+            pending: np.ndarray = np.fromiter(self.pending, dtype=np.int64, count=len(self.pending))
+            scales: Optional[np.ndarray] = self.gallery.scales[pending] if self.gallery.scales is not None else None
+            rows = np.concatenate([rows, pending])
+            squared = np.hstack([squared, squared_distances(queries, self.gallery.matrix[pending], self.gallery.norms[pending], scales)])
+
+        if len(rows) == 0: return exact_search(self.gallery, queries)
+        best: np.ndarray = np.argmin(squared, axis=1)
+        distances: np.ndarray = squared[np.arange(len(queries)), best]; found: np.ndarray = rows[best]
+
+        # Queries Whose Probed Clusters Held No Live Row Are Searched Exactly
+        missed: np.ndarray = ~np.isfinite(distances)
+        if missed.any():
+            exact: Tuple[np.ndarray, np.ndarray] = exact_search(self.gallery, queries[missed])
+            distances[missed] = exact[0] ** 2; found[missed] = exact[1]
+
+        return np.sqrt(distances), found
+
+    def save(self: any) -> None:
+        if self.path is None or self.centroids is None: return
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path + '.tmp', 'wb') as file: np.savez(file, centroids=self.centroids, trained_size=self.trained_size)
+        os.replace(self.path + '.tmp', self.path)
+
+def create_index(kind: str = INDEX_KIND, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> Index:
+    """
+    Creates an index of the given kind, persisted in [cache_dir] if it has state to persist.
+
+    PARAMETERS
+    ----------
+    kind      - Either 'brute' (exact) or 'ivf' (approximate).
+    cache_dir - The directory of the `cache`, or None to not persist the index.
+
+    RAISES
+    ------
+    ValueError - Raised when [kind] is not a known kind of index.
+
+    RETURNS
+    -------
+    Index - The index.
+    """
+
+    if kind == 'brute': return BruteForceIndex()
+    if kind == 'ivf': return IVFIndex(os.path.join(cache_dir, INDEX_FILENAME) if cache_dir is not None else None)
+    raise ValueError(f'Unknown index kind: {kind}, expected \'brute\' or \'ivf\'.')
+
+def benchmark(sizes: List[int] = (1000, 10000, 100000), queries: int = 200, clusters: int = 500,
+              index: Optional[Callable[[], Index]] = None, seed: int = 0) -> List[Mapping[str, float]]:
+    """
+    Measures the recall and latency of an approximate index against brute force, on synthetic
+    galleries of clustered random encodings (people's encodings cluster, so uniform noise would
+    be unrealistically hard). The queries are noisy copies of gallery rows.
+
+    PARAMETERS
+    ----------
+    sizes    - The gallery sizes to measure.
+    queries  - The number of queries per gallery size.
+    clusters - The number of clusters the synthetic encodings are drawn around.
+    index    - A function returning a fresh index to compare, an unpersisted `IVFIndex` if None.
+    seed     - The seed for generating the synthetic galleries.
+
+    RETURNS
+    -------
+    List[Mapping[str, float]] - For every size, the recall at 1 of the index, and the mean
+    per-query latency in milliseconds of brute force and of the index.
+    """
+
+    from client.gallery import Gallery # Imported Here, As The Gallery Imports This Module
+
+    rng: np.random.Generator = np.random.default_rng(seed)
+    results: List[Mapping[str, float]] = []
+
+    for size in sizes:
+        centers: np.ndarray = rng.normal(0.0, 0.1, (clusters, DEFAULT_ENCODING_DIM))
+        data: np.ndarray = centers[rng.integers(0, clusters, size)] + rng.normal(0.0, 0.03, (size, DEFAULT_ENCODING_DIM))
+        picks: np.ndarray = rng.integers(0, size, queries)
+        query: np.ndarray = data[picks] + rng.normal(0.0, 0.01, (queries, DEFAULT_ENCODING_DIM))
+
+        timings: MutableMapping = {}; found: MutableMapping = {}
+        for name, fresh in [('brute', BruteForceIndex()), ('index', index() if index is not None else IVFIndex(None))]:
+            gallery: Gallery = Gallery(capacity=size, index=fresh)
+            gallery.extend([str(i) for i in range(size)], data)
+            gallery.index.search(query[:1])
+
+            start: float = time.perf_counter()
+            found[name] = np.concatenate([gallery.index.search(query[i:i + 1])[1] for i in range(queries)])
+            timings[name] = (time.perf_counter() - start) * 1000 / queries
+
+        results.append({ 'size': size, 'recall': float(np.mean(found['brute'] == found['index'])),
+                         'brute_ms': timings['brute'], 'index_ms': timings['index'] })
+
+    return results
+
+if __name__ == '__main__':
+    # Benchmark The Approximate Index Against Brute Force, Optionally On Given Gallery Sizes
+    sizes: List[int] = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    for result in benchmark(sizes):
+        print(f"size {result['size']:>7}: recall {result['recall']:.3f}, "
+              f"brute {result['brute_ms']:.3f} ms, ivf {result['index_ms']:.3f} ms")
@@ -0,0 +1,66 @@
+import importlib, threading, time # Default Python Libraries
+
+from typing import Any, Optional # Type Hinting
+
+class LazyModule:
+    """
+    Stands in for a module that is slow to import, importing it the first time one of its
+    attributes is used. `face_recognition` loads dlib and every model's weights when imported,
+    which takes seconds on the robot, so importing the client does not pay for it until a face
+    is actually detected or encoded. `prefetch` starts the import in the background instead, so it
+    overlaps with opening the camera and loading the gallery.
+    """
+
+    def __init__(self: any, name: str) -> 'LazyModule':
+        """
+        PARAMETERS
+        ----------
+        name - The name of the module to import.
+        """
+
+        self._name: str = name; self._module: Optional[Any] = None
+        self._lock: threading.Lock = threading.Lock(); self._seconds: Optional[float] = None
+
+    def load(self: any) -> Any:
+        """
+        Returns the module, importing it if no one has yet. Safe to call from several threads.
+        """
+
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    start: float = time.perf_counter()
+                    module: Any = importlib.import_module(self._name)
+                    self._seconds = time.perf_counter() - start; self._module = module
+
+        return self._module
+
+    def prefetch(self: any) -> None:
+        """
+        Imports the module on a background thread, unless it is already imported. Failures are left
+        for the first real use to raise.
+        """
+
+        def load() -> None:
+            try: self.load()
+            except ImportError: pass
+
+        if self._module is None: threading.Thread(target=load, name=f'import-{self._name}', daemon=True).start()
+
+    @property
+    def loaded(self: any) -> bool:
+        return self._module is not None
+
+    @property
+    def seconds(self: any) -> Optional[float]:
+        """
+        The number of seconds the import took, None if it has not happened yet.
+        """
+
+        return self._seconds
+
+    def __getattr__(self: any, attr: str) -> Any:
+        return getattr(self.load(), attr)
+
+# Modules Imported On First Use
+face_recognition: LazyModule = LazyModule('face_recognition')
@@ -0,0 +1,163 @@
+import numpy as np, hashlib, json, os # Default Python Libraries
+
+from client.config import * # Default Configurations
+
+from typing import Any, List, Mapping, MutableMapping, Optional, Tuple, Union # Type Hinting
+
+# Copying Config Values
+ENCODING_MODEL: str = DEFAULT_ENCODING_MODEL
+NUM_JITTERS: int    = DEFAULT_NUM_JITTERS
+
+def content_hash(source: Union[str, bytes, np.ndarray]) -> str:
+    """
+    Returns a hash of the contents of an image, whether it is a file, encoded bytes or an array.
+
+    PARAMETERS
+    ----------
+    source - The path to the image, its encoded bytes, or the image as a np.ndarray.
+
+    RETURNS
+    -------
+    str - The hex digest of the contents.
+    """
+
+    digest: Any = hashlib.blake2b(digest_size=20)
+
+    if isinstance(source, str):
+        with open(source, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''): digest.update(chunk)
+    elif isinstance(source, (bytes, bytearray)): digest.update(source)
+    else: digest.update(np.ascontiguousarray(source).tobytes())
+
+    return digest.hexdigest()
+
+class Manifest:
+    """
+    A record of the source images behind every person's cached encodings: their paths, sizes,
+    modification times and content hashes, along with the encoding parameters used. Lets enrollment tell which
+    images are new or changed (and so need encoding) and which sources have disappeared, so a
+    restart after a small roster edit only re-encodes what changed. Stored as JSON next to the
+    encoding store.
+    """
+
+    def __init__(self: any, cache_dir: str = DEFAULT_CACHE_DIR) -> 'Manifest':
+        """
+        Loads the manifest from [cache_dir], starting empty if it does not exist or is unreadable.
+
+        PARAMETERS
+        ----------
+        cache_dir - The directory of the `cache`, default specified by `DEFAULT_CACHE_DIR`.
+        """
+
+        self.path: str = os.path.join(cache_dir, MANIFEST_FILENAME)
+        self.entries: MutableMapping[str, Mapping[str, Any]] = {}
+        self.dirty: bool = False
+
+        try:
+            with open(self.path, 'r', encoding=TEXT_ENCODING) as file: self.entries = json.load(file)
+        except (OSError, ValueError): self.entries = {}
+
+    @staticmethod
+    def params(size: Optional[Tuple[int, int]] = None) -> Mapping[str, Any]:
+        """
+        Returns the encoding parameters an encoding depends on besides its source.
+
+        PARAMETERS
+        ----------
+        size - The (width, height) the source is resized to before encoding, if any.
+
+        RETURNS
+        -------
+        Mapping[str, Any] - The encoding model, number of jitters and resize geometry.
+        """
+
+        return { 'model': ENCODING_MODEL, 'jitters': NUM_JITTERS, 'size': list(size) if size is not None else None }
+
+    def fingerprint(self: any, name: str, sources: List[Union[str, bytes, np.ndarray]],
+                    size: Optional[Tuple[int, int]] = None) -> Mapping[str, Any]:
+        """
+        Returns the entry describing the [sources] of [name] as they are now. For files the content
+        is only hashed again if their size or modification time changed since the recorded entry.
+
+        PARAMETERS
+        ----------
+        name    - The name the sources are enrolled under.
+        sources - The paths to the images, their encoded bytes, or the images as np.ndarrays.
+        size    - The (width, height) the sources are resized to before encoding, if any.
+
+        RETURNS
+        -------
+        Mapping[str, Any] - The parameters, and the path (files only), file size and time and
+        content hash of every source.
+        """
+
+        old: Mapping[str, Mapping[str, Any]] = { source.get('path'): source for source in self.entries.get(name, {}).get('sources', []) }
+        entry: MutableMapping[str, Any] = { **Manifest.params(size), 'sources': [] }
+
+        for source in sources:
+            described: MutableMapping[str, Any] = { 'path': None, 'bytes': None, 'mtime': None }
+
+            if isinstance(source, str):
+                stat: os.stat_result = os.stat(source)
+                described.update(path=os.path.abspath(source), bytes=stat.st_size, mtime=stat.st_mtime_ns)
+
+                last: Mapping[str, Any] = old.get(described['path'], {})
+                same: bool = all(last.get(key) == described[key] for key in ('bytes', 'mtime'))
+                described['hash'] = last['hash'] if same and 'hash' in last else content_hash(source)
+
+            else: described['hash'] = content_hash(source)
+            entry['sources'].append(described)
+
+        return entry
+
+    def unchanged(self: any, name: str, entry: Mapping[str, Any]) -> bool:
+        """
+        Returns whether the recorded entry for [name] has the same sources and parameters as [entry].
+        """
+
+        old: Mapping[str, Any] = self.entries.get(name, {})
+        hashes = lambda entry: [source.get('hash') for source in entry.get('sources', [])] or None
+        return hashes(old) == hashes(entry) and all(old.get(key) == entry[key] for key in ('model', 'jitters', 'size'))
+
+    def record(self: any, name: str, entry: Mapping[str, Any]) -> None:
+        """
+        Records [entry] as the sources of the encodings cached under [name].
+        """
+
+        if self.entries.get(name) != entry: self.entries[name] = dict(entry); self.dirty = True
+
+    def drop(self: any, name: str) -> None:
+        """
+        Forgets the sources of the encodings cached under [name].
+        """
+
+        if self.entries.pop(name, None) is not None: self.dirty = True
+
+    def missing(self: any, root: str) -> List[str]:
+        """
+        Returns the names with a recorded source file inside [root] that no longer exists.
+
+        PARAMETERS
+        ----------
+        root - The directory (or file) that was enrolled.
+
+        RETURNS
+        -------
+        List[str] - The names whose sources disappeared.
+        """
+
+        root: str = os.path.abspath(root)
+        inside = lambda path: path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+        gone = lambda path: path is not None and inside(path) and not os.path.exists(path)
+        return [name for name, entry in self.entries.items() if any(gone(source.get('path')) for source in entry.get('sources', []))]
+
+    def save(self: any) -> None:
+        """
+        Writes the manifest if it changed, replacing the old file atomically.
+        """
+
+        if not self.dirty: return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        with open(self.path + '.tmp', 'w', encoding=TEXT_ENCODING) as file: json.dump(self.entries, file, indent=1)
+        os.replace(self.path + '.tmp', self.path); self.dirty = False
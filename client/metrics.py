@@ -0,0 +1,168 @@
+import numpy as np, threading, json, time, os # Default Python Libraries
+
+from client.config import * # Default Configurations
+
+from contextlib import contextmanager # Timing Blocks Of Code
+from typing import Any, Iterator, List, Mapping, MutableMapping, Optional # Type Hinting
+
+# Copying Config Values
+METRICS_FILE: Optional[str] = DEFAULT_METRICS_FILE
+METRICS_PREFIX: str         = 'facial_recognition'
+BUCKETS: List[float]        = [0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0] # Seconds
+
+class Histogram:
+    """
+    A histogram of durations with fixed bucket bounds (in seconds), cheap enough to update on
+    every frame. Keeps the count, sum, minimum and maximum, and estimates quantiles from the
+    buckets, in the same layout as a Prometheus histogram.
+    """
+
+    def __init__(self: any, buckets: List[float] = BUCKETS) -> 'Histogram':
+        """
+        Initializes an empty histogram.
+
+        PARAMETERS
+        ----------
+        buckets - The increasing upper bounds of the buckets, in seconds. A last bucket holds the rest.
+        """
+
+        self.bounds: np.ndarray = np.asarray(buckets, dtype=np.float64)
+        self.buckets: np.ndarray = np.zeros(len(buckets) + 1, dtype=np.int64)
+        self.count: int = 0; self.sum: float = 0.0
+        self.min: float = float('inf'); self.max: float = 0.0
+
+    def observe(self: any, seconds: float) -> None:
+        """
+        Adds a duration of [seconds] to the histogram.
+        """
+
+        self.buckets[int(np.searchsorted(self.bounds, seconds))] += 1
+        self.count += 1; self.sum += seconds
+        self.min = min(self.min, seconds); self.max = max(self.max, seconds)
+
+    def quantile(self: any, q: float) -> float:
+        """
+        Estimates the [q] quantile (e.g. 0.99), interpolating linearly within its bucket.
+        """
+
+        if self.count == 0: return 0.0
+
+        rank: float = q * self.count; cumulative: np.ndarray = np.cumsum(self.buckets)
+        i: int = int(np.searchsorted(cumulative, rank))
+        lower: float = self.bounds[i - 1] if i > 0 else 0.0
+        upper: float = self.bounds[i] if i < len(self.bounds) else self.max
+        below: int = int(cumulative[i - 1]) if i > 0 else 0
+
+        estimate: float = lower + (upper - lower) * (rank - below) / max(int(self.buckets[i]), 1)
+        return float(min(max(estimate, self.min), self.max))
+
+    def summary(self: any) -> Mapping[str, float]:
+        """
+        Returns the count and the total, mean, minimum, median, 99th percentile and maximum in milliseconds.
+        """
+
+        ms = lambda seconds: round(seconds * 1000, 3)
+        return { 'count': self.count, 'total_ms': ms(self.sum), 'mean_ms': ms(self.sum / self.count) if self.count else 0.0,
+                 'min_ms': ms(self.min) if self.count else 0.0, 'p50_ms': ms(self.quantile(0.5)),
+                 'p99_ms': ms(self.quantile(0.99)), 'max_ms': ms(self.max) }
+
+class Metrics:
+    """
+    Per-stage latency histograms and event counters for the recognition pipeline. Safe to update
+    from the stream's threads at once. Read with `snapshot`, or exported as Prometheus text or
+    JSON with `dump`.
+    """
+
+    def __init__(self: any) -> 'Metrics':
+        self.lock: threading.Lock = threading.Lock()
+        self.timers: MutableMapping[str, Histogram] = {}
+        self.counters: MutableMapping[str, int] = {}
+        self.started: float = time.time()
+
+    def observe(self: any, stage: str, seconds: float) -> None:
+        """
+        Records that [stage] took [seconds].
+        """
+
+        with self.lock:
+            if stage not in self.timers: self.timers[stage] = Histogram()
+            self.timers[stage].observe(seconds)
+
+    def count(self: any, name: str, amount: int = 1) -> None:
+        """
+        Adds [amount] to the counter [name].
+        """
+
+        with self.lock: self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def time(self: any, stage: str) -> Iterator[None]:
+        """
+        Times the block it wraps as one run of [stage], e.g. `with METRICS.time('detect'): ...`.
+        """
+
+        start: float = time.perf_counter()
+        try: yield
+        finally: self.observe(stage, time.perf_counter() - start)
+
+    def reset(self: any) -> None:
+        """
+        Clears every timer and counter.
+        """
+
+        with self.lock: self.timers.clear(); self.counters.clear(); self.started = time.time()
+
+    def snapshot(self: any) -> Mapping[str, Any]:
+        """
+        Returns the counters and a summary of every stage's latencies, see `Histogram.summary`.
+        """
+
+        with self.lock:
+            return { 'uptime': round(time.time() - self.started, 3), 'counters': dict(self.counters),
+                     'stages': { stage: timer.summary() for stage, timer in self.timers.items() } }
+
+    def prometheus(self: any) -> str:
+        """
+        Returns every timer and counter in the Prometheus text exposition format.
+        """
+
+        lines: List[str] = []
+        with self.lock:
+            for name, value in sorted(self.counters.items()):
+                lines += [f'# TYPE {METRICS_PREFIX}_{name}_total counter', f'{METRICS_PREFIX}_{name}_total {value}']
+
+            metric: str = f'{METRICS_PREFIX}_stage_seconds'
+            if self.timers: lines.append(f'# TYPE {metric} histogram')
+
+            for stage, timer in sorted(self.timers.items()):
+                for bound, cumulative in zip(list(timer.bounds) + [float('inf')], np.cumsum(timer.buckets)):
+                    label: str = '+Inf' if bound == float('inf') else f'{bound:g}'
+                    lines.append(f'{metric}_bucket{{stage="{stage}",le="{label}"}} {int(cumulative)}')
+                lines += [f'{metric}_sum{{stage="{stage}"}} {timer.sum:.6f}', f'{metric}_count{{stage="{stage}"}} {timer.count}']
+
+        return '\n'.join(lines) + '\n'
+
+    def dump(self: any, path: Optional[str] = METRICS_FILE) -> Optional[str]:
+        """
+        Writes the metrics to [path], as JSON if it ends in `.json` and as Prometheus text otherwise
+        (e.g. for the node exporter's textfile collector). The file is replaced atomically.
+
+        PARAMETERS
+        ----------
+        path - The file to write to, `DEFAULT_METRICS_FILE` by default. Nothing is written if None.
+
+        RETURNS
+        -------
+        Optional[str] - The path written to, if any.
+        """
+
+        if path is None: return None
+        text: str = json.dumps(self.snapshot(), indent=1) if path.endswith('.json') else self.prometheus()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path + '.tmp', 'w', encoding=TEXT_ENCODING) as file: file.write(text)
+        os.replace(path + '.tmp', path)
+        return path
+
+# The Metrics Of This Process, Shared By Every Stage Of The Pipeline
+METRICS: Metrics = Metrics()
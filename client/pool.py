@@ -0,0 +1,243 @@
+import numpy as np, multiprocessing, argparse, queue, json, time, cv2 # Default Python Libraries
+
+from client.config import * # Default Configurations
+
+from typing import Any, Iterable, Iterator, List, Mapping, MutableMapping, Optional, Tuple # Type Hinting
+
+# Copying Config Values
+POOL_WORKERS: int     = DEFAULT_POOL_WORKERS
+POOL_AHEAD: int       = DEFAULT_POOL_AHEAD
+POOL_TIMEOUT: float   = DEFAULT_POOL_TIMEOUT
+Matches = List[Tuple[str, Tuple[int, int, int, int]]]
+
+def work(index: int, tasks: multiprocessing.Queue, results: multiprocessing.Queue, options: Mapping[str, Any]) -> None:
+    """
+    The loop run by every worker process. Loads the gallery once from the memory-mapped store
+    through its own `Client`, then runs `analyze_faces` on every frame it takes until it takes None.
+    Every result is tagged with the frame's sequence number, since workers finish out of order.
+
+    PARAMETERS
+    ----------
+    index   - The worker's index.
+    tasks   - The queue of (sequence number, frame) pairs, shared by every worker.
+    results - The queue results are put on: first ('ready', index, identities) once the gallery is
+              loaded, then ('result', sequence number, matches, error, index) for every frame.
+    options - The keyword arguments of the worker's `Client`.
+    """
+
+    from client.client import Client # Imported Here, So Only Workers Load The Recognition Stack
+
+    try: client: Client = Client(open=False, load=False, disp=False, prnt=False, track=False, **options)
+    except Exception as exc: results.put(('failed', index, f'{type(exc).__name__}: {exc}')); return
+    results.put(('ready', index, len(client.encoding_map)))
+
+    while True:
+        task: Optional[Tuple[int, np.ndarray]] = tasks.get()
+        if task is None: break
+
+        sequence: int; img: np.ndarray; sequence, img = task
+        try: results.put(('result', sequence, client.analyze_faces(img)['matches'], None, index))
+        except Exception as exc: results.put(('result', sequence, [], f'{type(exc).__name__}: {exc}', index))
+
+class WorkerPool:
+    """
+    Recognizes frames in several processes at once, so detection and encoding use every core.
+    Every worker loads the gallery once, from the memory-mapped encoding store in [cache_dir], and
+    takes frames from a shared queue as it becomes free. Results come back tagged with the frame's
+    sequence number and are handed out in the order the frames were submitted.
+
+    The workers see the gallery as it was when they started, so the pool should be restarted after
+    learning or forgetting faces.
+    """
+
+    def __init__(self: any, workers: int = POOL_WORKERS, ahead: int = POOL_AHEAD, cache_dir: str = DEFAULT_CACHE_DIR,
+                 scale_factor: float = DEFAULT_SCALE_FACTOR, backend: str = DEFAULT_BACKEND) -> 'WorkerPool':
+        """
+        Initializes the pool. No process starts until `start` is called (or the `with` block is entered).
+
+        PARAMETERS
+        ----------
+        workers      - The number of worker processes.
+        ahead        - The number of frames per worker submitted ahead of the results handed out.
+        cache_dir    - The directory of the encoding store the workers load the gallery from.
+        scale_factor - The factor workers resize frames by before detecting.
+        backend      - The backend that finds and encodes faces in the workers.
+        """
+
+        self.workers: int = max(workers, 1); self.ahead: int = max(ahead, 1)
+        self.options: Mapping[str, Any] = { 'cache': True, 'cache_dir': cache_dir, 'scale_factor': scale_factor, 'backend': backend }
+        self.context: Any = multiprocessing.get_context('spawn') # dlib & OpenCV Threads Do Not Survive A Fork
+        self.processes: List[multiprocessing.Process] = []
+        self.tasks: Optional[multiprocessing.Queue] = None; self.results: Optional[multiprocessing.Queue] = None
+        self.done: MutableMapping[int, Tuple[Matches, Optional[str]]] = {}
+        self.submitted: int = 0; self.returned: int = 0
+        self.handled: List[int] = [0] * self.workers; self.identities: int = 0
+
+    def __enter__(self: any) -> 'WorkerPool':
+        self.start(); return self
+
+    def __exit__(self: any, exc_type: any, exc_val: any, exc_tb: any) -> None:
+        self.stop()
+
+    def start(self: any, timeout: float = POOL_TIMEOUT) -> None:
+        """
+        Starts the workers and waits until every one has loaded the gallery.
+
+        PARAMETERS
+        ----------
+        timeout - The number of seconds to wait for the workers to load.
+
+        RAISES
+        ------
+        RuntimeError - Raised when a worker fails to load or does not load within [timeout] seconds.
+        """
+
+        if self.processes: return
+        self.tasks = self.context.Queue(); self.results = self.context.Queue()
+
+        for index in range(self.workers):
+            process: multiprocessing.Process = self.context.Process(target=work, name=f'recognition-worker-{index}',
+                args=(index, self.tasks, self.results, self.options), daemon=True)
+            process.start(); self.processes.append(process)
+
+        for _ in range(self.workers):
+            try: message: Tuple = self.results.get(timeout=timeout)
+            except queue.Empty: self.stop(); raise RuntimeError(f'Workers did not load within {timeout} seconds.')
+
+            if message[0] == 'failed': self.stop(); raise RuntimeError(f'Worker {message[1]} failed to load: {message[2]}')
+            self.identities = message[2]
+
+    def stop(self: any) -> None:
+        """
+        Stops the workers after the frames already submitted, waiting briefly for each to exit.
+        """
+
+        for process in self.processes:
+            if process.is_alive(): self.tasks.put(None)
+
+        for process in self.processes:
+            process.join(timeout=5.0)
+            if process.is_alive(): process.terminate()
+
+        self.processes = []; self.done.clear()
+        self.submitted = self.returned
+
+    def submit(self: any, img: np.ndarray) -> int:
+        """
+        Queues [img] for the next free worker, returning its sequence number.
+        """
+
+        if not self.processes: raise RuntimeError('The worker pool is not started.')
+        self.submitted += 1; self.tasks.put((self.submitted, img))
+        return self.submitted
+
+    def next(self: any, timeout: Optional[float] = POOL_TIMEOUT) -> Tuple[int, Matches, Optional[str]]:
+        """
+        Returns the result of the oldest frame not yet returned, waiting for it if a later frame
+        finished first.
+
+        PARAMETERS
+        ----------
+        timeout - The number of seconds to wait for any result, waits forever if None.
+
+        RAISES
+        ------
+        LookupError  - Raised when every submitted frame was already returned.
+        RuntimeError - Raised when no result arrived within [timeout] seconds.
+
+        RETURNS
+        -------
+        Tuple[int, Matches, Optional[str]] - The sequence number, the matches of `analyze_faces`,
+        and the error (None on success).
+        """
+
+        if self.returned >= self.submitted: raise LookupError('Every submitted frame was already returned.')
+        wanted: int = self.returned + 1
+
+        while wanted not in self.done:
+            try: message: Tuple = self.results.get(timeout=timeout)
+            except queue.Empty: raise RuntimeError(f'No result from the workers within {timeout} seconds.')
+
+            if message[0] != 'result': continue
+            _, sequence, matches, error, index = message
+            self.done[sequence] = (matches, error); self.handled[index] += 1
+
+        matches, error = self.done.pop(wanted); self.returned = wanted
+        return wanted, matches, error
+
+    def map(self: any, imgs: Iterable[np.ndarray]) -> Iterator[Tuple[int, Matches, Optional[str]]]:
+        """
+        Recognizes every image of [imgs] across the workers, yielding the results in order while
+        keeping up to [ahead] frames per worker in flight, see `next`.
+        """
+
+        limit: int = self.workers * self.ahead
+        for img in imgs:
+            self.submit(img)
+            if self.submitted - self.returned >= limit: yield self.next()
+
+        while self.returned < self.submitted: yield self.next()
+
+    def analyze_batch(self: any, imgs: List[np.ndarray]) -> List[Matches]:
+        """
+        Like `Client.analyze_batch`, but spread across the workers, raising a RuntimeError if any
+        image failed.
+        """
+
+        results: List[Matches] = []
+        for _, matches, error in self.map(imgs):
+            if error is not None: raise RuntimeError(error)
+            results.append(matches)
+
+        return results
+
+    def stats(self: any) -> Mapping[str, Any]:
+        """
+        Returns the number of workers, identities they loaded, frames submitted and returned, and
+        frames every worker recognized.
+        """
+
+        return { 'workers': self.workers, 'identities': self.identities, 'submitted': self.submitted,
+                 'returned': self.returned, 'handled': list(self.handled) }
+
+def scaling(images: List[np.ndarray], counts: List[int], repeats: int = 3, **options: Any) -> Iterator[Mapping[str, Any]]:
+    """
+    Measures the images per second of pools of every size in [counts] over [images], repeated
+    [repeats] times after one warm-up pass, and the speedup over a single worker.
+
+    PARAMETERS
+    ----------
+    images  - The images to recognize.
+    counts  - The numbers of workers to measure.
+    repeats - The number of passes over the images.
+    options - The other arguments of every `WorkerPool`.
+
+    RETURNS
+    -------
+    Iterator[Mapping[str, Any]] - For every pool size, the images run, the images per second, the
+    speedup and the efficiency (speedup per worker).
+    """
+
+    base: Optional[float] = None
+
+    for count in counts:
+        with WorkerPool(workers=count, **options) as pool:
+            pool.analyze_batch(images * -(-count // len(images))) # Every Worker Warms Up
+            start: float = time.perf_counter(); pool.analyze_batch(images * repeats)
+            fps: float = len(images) * repeats / (time.perf_counter() - start)
+
+        base = fps if base is None else base
+        yield { 'workers': count, 'images': len(images) * repeats, 'fps': round(fps, 3), 'speedup': round(fps / base, 3),
+                'efficiency': round(fps / base / (count / counts[0]), 3) }
+
+if __name__ == '__main__':
+    from client.bench import load_examples, EXAMPLES_DIR # Reusing The Benchmark Images
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description='Measures how recognition scales across worker processes.')
+    parser.add_argument('counts', type=int, nargs='*', default=sorted({1, 2, POOL_WORKERS}), help='numbers of workers to measure')
+    parser.add_argument('--folder', default=EXAMPLES_DIR, help='folder of images to run')
+    parser.add_argument('--repeats', type=int, default=3, help='passes over the images')
+    args: argparse.Namespace = parser.parse_args()
+
+    images: List[np.ndarray] = [cv2.resize(img, (640, 480)) for img in load_examples(args.folder)]
+    for result in scaling(images, args.counts, repeats=args.repeats): print(json.dumps(result))
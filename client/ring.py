@@ -0,0 +1,301 @@
+import numpy as np, time, sys # Default Python Libraries
+
+from client.config import * # Default Configurations
+
+from multiprocessing import shared_memory, resource_tracker # Shared Frames (Python 3.8+)
+from typing import Any, Mapping, Optional, Tuple # Type Hinting
+
+# Copying Config Values
+RING_NAME: str    = DEFAULT_RING_NAME
+RING_SLOTS: int   = DEFAULT_RING_SLOTS
+RING_READERS: int = DEFAULT_RING_READERS
+RING_POLL: float  = DEFAULT_RING_POLL
+MAGIC: int        = 0x46524D52 # 'FRMR'
+VERSION: int      = 1
+HEADER: int       = 16 # Number Of int64 Header Fields
+
+# Header Fields
+F_MAGIC, F_VERSION, F_SLOTS, F_READERS, F_HEIGHT, F_WIDTH, F_CHANNELS, F_LATEST, F_SLOT, F_CLOSED = range(10)
+
+class FrameRing:
+    """
+    A ring of fixed-size frame slots in shared memory, so frames can be handed to other processes
+    without pickling or copying them. One process writes (usually `Camera`, see `Camera.share`)
+    and up to [readers] processes read, each through its own `FrameReader` with its own cursor.
+
+    Every written frame gets the next sequence number. Writing never waits for readers: the
+    writer takes the next slot that no reader is holding, so a slow reader only ever skips frames,
+    and a frame a reader holds is never overwritten until it reads the next one. This needs at
+    least two more slots than readers.
+
+    The memory holds a header, then for every slot its sequence number and capture time, then for
+    every reader its cursor (the last sequence number it read), the slot it holds and the frames
+    it skipped, and finally the frames themselves.
+    """
+
+    def __init__(self: any, memory: shared_memory.SharedMemory, owner: bool) -> 'FrameRing':
+        """
+        Maps the arrays of the ring onto [memory]. Use `create` or `attach` instead.
+
+        RAISES
+        ------
+        ValueError - Raised when the memory does not hold a frame ring of this version.
+        """
+
+        self.memory: shared_memory.SharedMemory = memory; self.owner: bool = owner
+        self.header: np.ndarray = np.ndarray((HEADER,), dtype=np.int64, buffer=memory.buf)
+
+        if self.header[F_MAGIC] != MAGIC or self.header[F_VERSION] != VERSION:
+            raise ValueError(f'Shared memory {memory.name} does not hold a version {VERSION} frame ring.')
+
+        slots: int = int(self.header[F_SLOTS]); readers: int = int(self.header[F_READERS])
+        self.shape: Tuple[int, int, int] = (int(self.header[F_HEIGHT]), int(self.header[F_WIDTH]), int(self.header[F_CHANNELS]))
+
+        offset: int = HEADER * 8
+        def view(shape: Tuple[int, ...], dtype: Any) -> np.ndarray:
+            nonlocal offset
+            array: np.ndarray = np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=offset)
+            offset += array.nbytes; return array
+
+        self.sequences: np.ndarray = view((slots,), np.int64) # 0 While Being Written
+        self.times: np.ndarray = view((slots,), np.float64)
+        self.cursors: np.ndarray = view((readers,), np.int64)
+        self.held: np.ndarray = view((readers,), np.int64) # -1 If None
+        self.skipped: np.ndarray = view((readers,), np.int64)
+        self.frames: np.ndarray = view((slots,) + self.shape, np.uint8)
+        self.next: int = 0
+
+    @staticmethod
+    def size(shape: Tuple[int, int, int], slots: int, readers: int) -> int:
+        """
+        Returns the number of bytes a ring of [slots] frames of [shape] for [readers] readers takes.
+        """
+
+        return HEADER * 8 + slots * 16 + readers * 24 + slots * int(np.prod(shape))
+
+    @classmethod
+    def create(cls: type, shape: Tuple[int, ...], slots: int = RING_SLOTS, readers: int = RING_READERS,
+               name: Optional[str] = RING_NAME) -> 'FrameRing':
+        """
+        Creates a ring in new shared memory. The creating process is the only writer, and removes
+        the memory when it closes the ring.
+
+        PARAMETERS
+        ----------
+        shape   - The (height, width[, channels]) of every frame, as 8-bit pixels.
+        slots   - The number of frames held, at least [readers] + 2.
+        readers - The number of readers that can read at once.
+        name    - The name of the shared memory, for readers to attach to; a random one if None.
+
+        RAISES
+        ------
+        ValueError      - Raised when there are too few slots for the readers.
+        FileExistsError - Raised when shared memory called [name] already exists.
+
+        RETURNS
+        -------
+        FrameRing - The ring, with no frames yet.
+        """
+
+        shape = tuple(int(v) for v in shape) + ((1,) if len(shape) == 2 else ())
+        if slots < readers + 2: raise ValueError(f'A ring for {readers} readers needs at least {readers + 2} slots, got {slots}.')
+
+        memory: shared_memory.SharedMemory = shared_memory.SharedMemory(name=name, create=True, size=cls.size(shape, slots, readers))
+        header: np.ndarray = np.ndarray((HEADER,), dtype=np.int64, buffer=memory.buf); header[:] = 0
+        header[[F_SLOTS, F_READERS, F_HEIGHT, F_WIDTH, F_CHANNELS]] = [slots, readers, *shape]
+        header[F_SLOT] = -1; header[F_VERSION] = VERSION; header[F_MAGIC] = MAGIC
+
+        ring: FrameRing = cls(memory, owner=True)
+        ring.sequences[:] = -1; ring.held[:] = -1
+        return ring
+
+    @classmethod
+    def attach(cls: type, name: str = RING_NAME) -> 'FrameRing':
+        """
+        Attaches to the ring in the shared memory called [name], created by another process.
+
+        RAISES
+        ------
+        FileNotFoundError - Raised when no shared memory is called [name].
+        ValueError        - Raised when the memory does not hold a frame ring.
+        """
+
+        # Processes Not Started By The Owner Have Their Own Resource Tracker, Which Would Remove The
+        # Memory When They Exit, So It Is Told To Forget It (Children Share The Owner's Tracker)
+        tracked: bool = getattr(getattr(resource_tracker, '_resource_tracker', None), '_fd', None) is None
+        memory: shared_memory.SharedMemory = shared_memory.SharedMemory(name=name)
+        if tracked and sys.version_info < (3, 13): resource_tracker.unregister(memory._name, 'shared_memory')
+
+        try: return cls(memory, owner=False)
+        except ValueError: memory.close(); raise
+
+    def __enter__(self: any) -> 'FrameRing':
+        return self
+
+    def __exit__(self: any, exc_type: any, exc_val: any, exc_tb: any) -> None:
+        self.close()
+
+    @property
+    def name(self: any) -> str:
+        return self.memory.name
+
+    @property
+    def latest(self: any) -> int:
+        """
+        The sequence number of the newest frame, 0 if none was written yet.
+        """
+
+        return int(self.header[F_LATEST])
+
+    @property
+    def closed(self: any) -> bool:
+        """
+        Whether the writer has closed the ring, so no more frames will come.
+        """
+
+        return bool(self.header[F_CLOSED])
+
+    def write(self: any, img: np.ndarray, timestamp: Optional[float] = None) -> int:
+        """
+        Copies [img] into the next slot no reader holds, and publishes it as the newest frame.
+
+        PARAMETERS
+        ----------
+        img       - The frame, of the ring's shape.
+        timestamp - The capture time of the frame, now (`time.monotonic`) if None.
+
+        RAISES
+        ------
+        ValueError - Raised when the frame does not have the ring's shape.
+
+        RETURNS
+        -------
+        int - The sequence number of the frame.
+        """
+
+        if img.shape != self.shape and img.shape + (1,) != self.shape:
+            raise ValueError(f'Expected a frame of shape {self.shape}. Got {img.shape} instead.')
+
+        slots: int = len(self.sequences)
+        for step in range(slots):
+            slot: int = (self.next + step) % slots
+            if slot == self.header[F_SLOT] or slot in self.held: continue
+
+            # Claimed Before Checking The Readers Again, So A Reader Holding It Now Sees It Change
+            previous: int = int(self.sequences[slot]); self.sequences[slot] = 0
+            if slot in self.held: self.sequences[slot] = previous; continue
+            break
+        else: raise RuntimeError('Every slot is held by a reader.') # Unreachable With slots >= readers + 2
+
+        sequence: int = self.latest + 1
+        self.frames[slot].reshape(img.shape)[...] = img
+        self.times[slot] = time.monotonic() if timestamp is None else timestamp
+        self.sequences[slot] = sequence
+
+        self.header[F_SLOT] = slot; self.header[F_LATEST] = sequence
+        self.next = (slot + 1) % slots
+        return sequence
+
+    def stats(self: any) -> Mapping[str, Any]:
+        """
+        Returns the newest sequence number and, for every reader, its cursor and the frames it skipped.
+        """
+
+        return { 'latest': self.latest, 'slots': len(self.sequences), 'shape': self.shape,
+                 'cursors': self.cursors.tolist(), 'skipped': self.skipped.tolist() }
+
+    def close(self: any) -> None:
+        """
+        Detaches from the ring. The writer also marks it closed and removes the shared memory, which
+        is freed once every reader has detached.
+        """
+
+        if self.memory is None: return
+        if self.owner: self.header[F_CLOSED] = 1
+
+        # The Views Must Go Before The Memory Can Be Closed
+        del self.header, self.sequences, self.times, self.cursors, self.held, self.skipped, self.frames
+        self.memory.close()
+        if self.owner: self.memory.unlink()
+        self.memory = None
+
+class FrameReader:
+    """
+    One reader of a `FrameRing`, reading the newest frame as a read-only view straight into shared
+    memory. The frame stays valid (and unwritten) until the reader reads again or releases it, so a
+    reader should copy anything it keeps longer. Every reader needs its own [index] below the
+    number of readers the ring was created for.
+    """
+
+    def __init__(self: any, ring: FrameRing, index: int) -> 'FrameReader':
+        """
+        PARAMETERS
+        ----------
+        ring  - The ring, usually from `FrameRing.attach`.
+        index - The reader's index, each reader of a ring must have a different one.
+
+        RAISES
+        ------
+        ValueError - Raised when the ring has no reader [index].
+        """
+
+        if not 0 <= index < len(ring.cursors): raise ValueError(f'The ring has readers 0 to {len(ring.cursors) - 1}, got {index}.')
+        self.ring: FrameRing = ring; self.index: int = index
+        self.ring.held[index] = -1
+
+    def __enter__(self: any) -> 'FrameReader':
+        return self
+
+    def __exit__(self: any, exc_type: any, exc_val: any, exc_tb: any) -> None:
+        self.release()
+
+    def read(self: any, timeout: Optional[float] = None, poll: float = RING_POLL) -> Tuple[int, float, np.ndarray]:
+        """
+        Returns the newest frame this reader has not read yet, waiting up to [timeout] seconds for one.
+        Frames written since the last read that were not the newest are counted as skipped.
+
+        PARAMETERS
+        ----------
+        timeout - The number of seconds to wait for a new frame, waits forever if None.
+        poll    - The number of seconds between checks for a new frame.
+
+        RAISES
+        ------
+        TimeoutError - Raised when no new frame was written within [timeout] seconds.
+        EOFError     - Raised when the writer closed the ring.
+
+        RETURNS
+        -------
+        Tuple[int, float, np.ndarray] - The sequence number, capture time and frame (a read-only view).
+        """
+
+        ring: FrameRing = self.ring; i: int = self.index
+        end: float = float('inf') if timeout is None else time.monotonic() + timeout
+        self.release()
+
+        while True:
+            latest: int = ring.latest; slot: int = int(ring.header[F_SLOT])
+
+            if latest > ring.cursors[i] and slot >= 0:
+                ring.held[i] = slot
+                if ring.sequences[slot] == latest: break # Still The Frame Published, So The Writer Will Skip It
+                ring.held[i] = -1; continue
+
+            if ring.closed: raise EOFError(f'Frame ring {ring.name} was closed.')
+            if time.monotonic() >= end: raise TimeoutError(f'No new frame after {timeout} seconds.')
+            time.sleep(poll)
+
+        ring.skipped[i] += latest - ring.cursors[i] - 1 if ring.cursors[i] > 0 else 0
+        ring.cursors[i] = latest
+
+        frame: np.ndarray = ring.frames[slot]
+        frame = frame[:, :, 0] if frame.shape[2] == 1 else frame
+        frame.flags.writeable = False
+        return latest, float(ring.times[slot]), frame
+
+    def release(self: any) -> None:
+        """
+        Lets the writer reuse the slot of the last frame read, whose view must not be used afterwards.
+        """
+
+        self.ring.held[self.index] = -1
@@ -0,0 +1,455 @@
+import numpy as np, threading, argparse, json, time, sys, cv2, zmq, os # Default Python Libraries
+
+from client.config import * # Default Configurations
+from client.metrics import METRICS # Stage Timings & Counters
+
+from contextlib import nullcontext # Serving Without A Camera
+from typing import Any, List, Mapping, MutableMapping, Optional, Tuple, Union # Type Hinting
+
+# Copying Config Values
+SERVICE_ADDRESS: str   = DEFAULT_SERVICE_ADDRESS
+SERVICE_WINDOW: float  = DEFAULT_SERVICE_WINDOW
+SERVICE_BATCH: int     = DEFAULT_SERVICE_BATCH
+SERVICE_TIMEOUT: float = DEFAULT_SERVICE_TIMEOUT
+UNKNOWN_FACE: str      = DEFAULT_UNKNOWN_FACE_ID
+COMMANDS: List[str]    = ['classify', 'attendance', 'learn', 'forget', 'stats']
+BATCHED: List[str]     = ['classify', 'attendance'] # Commands Recognized Together In One Pass
+
+def encode_payload(img: Union[np.ndarray, bytes], ext: str = '.jpg') -> bytes:
+    """
+    Returns [img] encoded as an image file ([ext]) for sending, unchanged if it is already bytes.
+
+    RAISES
+    ------
+    ValueError - Raised when the image can not be encoded.
+    """
+
+    if isinstance(img, (bytes, bytearray, memoryview)): return bytes(img)
+
+    ok: bool; data: np.ndarray; ok, data = cv2.imencode(ext, img)
+    if not ok: raise ValueError(f'Unable to encode image as {ext}.')
+    return data.tobytes()
+
+def decode_payload(payload: bytes) -> np.ndarray:
+    """
+    Decodes an image file received as [payload] in BGR format, like `cv2.imread`.
+
+    RAISES
+    ------
+    ValueError - Raised when the payload is not an image.
+    """
+
+    img: Optional[np.ndarray] = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None: raise ValueError('Payload is not an encoded image.')
+    return img
+
+class Request:
+    """
+    A request received by the service: the ZeroMQ routing frames to reply through, its JSON
+    header, its decoded image (if it sent one) and the error that made it invalid (if any).
+    """
+
+    def __init__(self: any, route: List[bytes], header: Mapping[str, Any], img: Optional[np.ndarray] = None,
+                 error: Optional[str] = None) -> 'Request':
+        self.route: List[bytes] = route; self.header: Mapping[str, Any] = header
+        self.img: Optional[np.ndarray] = img; self.error: Optional[str] = error
+        self.command: str = str(header.get('command', '')).lower()
+        self.received: float = time.perf_counter()
+
+class RecognitionService:
+    """
+    Serves a `Client` to other processes over a ZeroMQ ROUTER socket. Every request is a JSON
+    header (`{"command": ..., "names": [...]}`) optionally followed by an encoded image, and gets one
+    JSON reply. Classify and attendance requests that arrive within [window] seconds of each other
+    are recognized together in a single pass of the backend (and attendance requests without an
+    image share one camera frame), while learn and forget requests run in the order they arrived.
+    The client is only ever used from the thread running `serve`.
+    """
+
+    def __init__(self: any, client: 'Client', address: str = SERVICE_ADDRESS, window: float = SERVICE_WINDOW,
+                 batch: int = SERVICE_BATCH, context: Optional[zmq.Context] = None) -> 'RecognitionService':
+        """
+        PARAMETERS
+        ----------
+        client  - The client recognizing and learning the faces.
+        address - The endpoint to bind to, e.g. 'tcp://127.0.0.1:5555', 'tcp://127.0.0.1:*' (any free
+                  port, see `bind`) or 'ipc:///tmp/faces'.
+        window  - The number of seconds to wait for more requests to batch with the first.
+        batch   - The maximum number of images recognized in one pass.
+        context - The ZeroMQ context, the process' shared one if None.
+        """
+
+        self.client: 'Client' = client; self.address: str = address
+        self.window: float = window; self.batch: int = max(batch, 1)
+        self.context: zmq.Context = context if context is not None else zmq.Context.instance()
+        self.socket: Optional[zmq.Socket] = None
+        self.stopped: threading.Event = threading.Event()
+        self.counts: MutableMapping[str, int] = { 'requests': 0, 'errors': 0, 'batches': 0, 'batched': 0 }
+
+    def bind(self: any) -> str:
+        """
+        Binds the service's socket, returning the endpoint it is reachable at (with the port chosen
+        if the address asked for any free one).
+        """
+
+        if self.socket is None:
+            self.socket = self.context.socket(zmq.ROUTER); self.socket.setsockopt(zmq.LINGER, 0)
+            self.socket.bind(self.address)
+            self.address = self.socket.getsockopt_string(zmq.LAST_ENDPOINT)
+
+        return self.address
+
+    def stop(self: any) -> None:
+        """
+        Makes `serve` return after the requests it is handling, from any thread.
+        """
+
+        self.stopped.set()
+
+    def stats(self: any) -> Mapping[str, Any]:
+        """
+        Returns the number of requests, errors, batched passes and images recognized in them, and
+        the mean number of images per pass.
+        """
+
+        return { **self.counts, 'mean_batch': round(self.counts['batched'] / self.counts['batches'], 3) if self.counts['batches'] else 0.0 }
+
+    def serve(self: any, duration: Optional[float] = None) -> Mapping[str, Any]:
+        """
+        Answers requests until `stop` is called, [duration] seconds pass, or Ctrl-C is pressed.
+
+        PARAMETERS
+        ----------
+        duration - The number of seconds to serve for, forever if None.
+
+        RETURNS
+        -------
+        Mapping[str, Any] - The service statistics, see `stats`.
+        """
+
+        self.bind(); self.stopped.clear()
+        poller: zmq.Poller = zmq.Poller(); poller.register(self.socket, zmq.POLLIN)
+        end: float = float('inf') if duration is None else time.perf_counter() + duration
+
+        try:
+            while not self.stopped.is_set() and time.perf_counter() < end:
+                if not poller.poll(100): continue
+                self.handle(self.gather(poller))
+
+        except KeyboardInterrupt: pass
+        finally: self.socket.close(); self.socket = None
+
+        return self.stats()
+
+    def receive(self: any) -> Request:
+        """
+        Receives one request, which must be waiting on the socket.
+        """
+
+        frames: List[bytes] = self.socket.recv_multipart()
+        split: int = frames.index(b'') + 1 if b'' in frames else 1
+        route: List[bytes] = frames[:split]; body: List[bytes] = frames[split:]
+        self.counts['requests'] += 1; METRICS.count('requests')
+
+        try:
+            header: Mapping[str, Any] = json.loads(body[0].decode(TEXT_ENCODING)) if body else {}
+            if not isinstance(header, dict): raise ValueError('Header is not a JSON object.')
+        except ValueError as exc: return Request(route, {}, error=f'Invalid header: {exc}')
+
+        request: Request = Request(route, header)
+        if request.command not in COMMANDS: request.error = f'Unknown command \'{request.command}\', expected one of {COMMANDS}.'
+        elif len(body) > 1 and len(body[1]) > 0:
+            try: request.img = decode_payload(body[1])
+            except ValueError as exc: request.error = str(exc)
+
+        return request
+
+    def gather(self: any, poller: zmq.Poller) -> List[Request]:
+        """
+        Receives the waiting requests, and keeps receiving for up to [window] seconds after the first
+        while fewer than [batch] images wait to be recognized, so concurrent requests share a pass.
+        """
+
+        requests: List[Request] = [self.receive()]
+        until: float = requests[0].received + self.window
+
+        while True:
+            while self.socket.poll(0, zmq.POLLIN): requests.append(self.receive())
+
+            waiting: int = sum(request.command in BATCHED and request.error is None for request in requests)
+            remaining: float = until - time.perf_counter()
+            if waiting == 0 or waiting >= self.batch or remaining <= 0: return requests
+            if not poller.poll(max(int(remaining * 1000), 1)): return requests
+
+    def reply(self: any, request: Request, body: Mapping[str, Any]) -> None:
+        """
+        Sends [body] as the reply to [request], with whether it succeeded and how long it took.
+        """
+
+        ok: bool = body.get('error') is None; self.counts['errors'] += not ok
+        body = { 'ok': ok, **body, 'ms': round((time.perf_counter() - request.received) * 1000, 3) }
+        self.socket.send_multipart(request.route + [json.dumps(body).encode(TEXT_ENCODING)])
+
+    def handle(self: any, requests: List[Request]) -> None:
+        """
+        Answers [requests] in order, recognizing the consecutive classify and attendance requests in
+        passes of up to [batch] images.
+        """
+
+        jobs: List[Request] = []
+
+        for request in requests:
+            if request.error is not None: self.reply(request, { 'error': request.error })
+            elif request.command in BATCHED:
+                jobs.append(request)
+                if len(jobs) >= self.batch: self.recognize(jobs); jobs = []
+            else:
+                self.recognize(jobs); jobs = []
+                try: self.reply(request, self.run(request))
+                except Exception as exc: self.reply(request, { 'error': f'Unable to {request.command}: {exc}' })
+
+        self.recognize(jobs)
+
+    def run(self: any, request: Request) -> Mapping[str, Any]:
+        """
+        Runs a learn, forget or stats request, returning the body of its reply.
+        """
+
+        if request.command == 'stats': return { 'service': self.stats(), 'metrics': METRICS.snapshot() }
+        if request.img is None and not self.client.open: raise ValueError('No image given and the camera is not open.')
+
+        if request.command == 'learn':
+            names: Any = request.header.get('names', [])
+            names = [names] if isinstance(names, str) else [str(name) for name in names]
+            return { 'names': sorted(self.client.learn_face(names, disp=False, prnt=False, img=request.img)) }
+
+        return { 'names': sorted(self.client.forget_face(prnt=False, img=request.img)) }
+
+    def recognize(self: any, jobs: List[Request]) -> None:
+        """
+        Recognizes the faces of every classify and attendance request in [jobs] in one pass, and
+        answers them. Attendance requests without an image share a single camera frame.
+        """
+
+        if len(jobs) == 0: return
+        imgs: List[np.ndarray] = []; slots: List[Optional[int]] = []; frame: Optional[int] = None
+
+        for job in jobs:
+            if job.img is not None: slots.append(len(imgs)); imgs.append(job.img)
+            elif job.command == 'attendance' and self.client.open:
+                if frame is None: frame = len(imgs); imgs.append(self.client.camera.adjust_read())
+                slots.append(frame)
+            else: slots.append(None)
+
+        try:
+            results: List[List[Tuple[str, Tuple[int, int, int, int]]]] = self.client.analyze_batch(imgs) if imgs else []
+            failure: Optional[str] = None
+        except Exception as exc: results = []; failure = f'Unable to recognize: {exc}'
+
+        self.counts['batches'] += len(imgs) > 0; self.counts['batched'] += len(imgs)
+        scale: float = self.client.scale_factor
+
+        for job, slot in zip(jobs, slots):
+            if slot is None: self.reply(job, { 'error': 'No image given and the camera is not open.' })
+            elif failure is not None: self.reply(job, { 'error': failure })
+            else:
+                faces: List[Mapping[str, Any]] = [{ 'name': name, 'box': [int(v / scale) for v in location] }
+                                                  for name, location in results[slot]]
+                names: List[str] = sorted({face['name'] for face in faces if face['name'] != UNKNOWN_FACE})
+                self.reply(job, { 'names': names, 'faces': faces, 'batch': len(imgs) })
+
+class ServiceClient:
+    """
+    Sends requests to a `RecognitionService` and waits for their replies. Every instance owns one
+    ZeroMQ REQ socket, so it must only be used from one thread at a time; concurrent callers
+    should each have their own.
+    """
+
+    def __init__(self: any, address: str = SERVICE_ADDRESS, timeout: float = SERVICE_TIMEOUT,
+                 context: Optional[zmq.Context] = None) -> 'ServiceClient':
+        """
+        PARAMETERS
+        ----------
+        address - The endpoint the service is bound to.
+        timeout - The number of seconds to wait for a reply.
+        context - The ZeroMQ context, the process' shared one if None.
+        """
+
+        self.address: str = address; self.timeout: float = timeout
+        self.context: zmq.Context = context if context is not None else zmq.Context.instance()
+        self.socket: Optional[zmq.Socket] = None
+
+    def __enter__(self: any) -> 'ServiceClient':
+        return self
+
+    def __exit__(self: any, exc_type: any, exc_val: any, exc_tb: any) -> None:
+        self.close()
+
+    def close(self: any) -> None:
+        """
+        Closes the socket, a new one is opened by the next request.
+        """
+
+        if self.socket is not None: self.socket.close(); self.socket = None
+
+    def request(self: any, command: str, img: Optional[Union[np.ndarray, bytes]] = None,
+                names: Optional[List[str]] = None) -> Mapping[str, Any]:
+        """
+        Sends one request and returns its reply.
+
+        PARAMETERS
+        ----------
+        command - One of 'classify', 'attendance', 'learn', 'forget' or 'stats'.
+        img     - The image, as an array or an encoded image file, the service's camera if None.
+        names   - The name to learn the face as, for 'learn'.
+
+        RAISES
+        ------
+        TimeoutError - Raised when no reply arrives within [timeout] seconds.
+
+        RETURNS
+        -------
+        Mapping[str, Any] - The reply: whether it succeeded ('ok') and its 'error' otherwise, the 'names'
+        recognized, learned or forgotten, the 'faces' found (name and box), and the milliseconds the
+        service took ('ms').
+        """
+
+        if self.socket is None:
+            self.socket = self.context.socket(zmq.REQ)
+            self.socket.setsockopt(zmq.LINGER, 0); self.socket.setsockopt(zmq.RCVTIMEO, int(self.timeout * 1000))
+            self.socket.connect(self.address)
+
+        header: bytes = json.dumps({ 'command': command, 'names': names or [] }).encode(TEXT_ENCODING)
+        self.socket.send_multipart([header] if img is None else [header, encode_payload(img)])
+
+        try: return json.loads(self.socket.recv().decode(TEXT_ENCODING))
+        except zmq.Again:
+            self.close() # A REQ Socket Can Not Send Again Until It Receives, So It Is Replaced
+            raise TimeoutError(f'No reply from {self.address} within {self.timeout} seconds.')
+
+    def checked(self: any, command: str, **kwargs: Any) -> Mapping[str, Any]:
+        """
+        Sends one request, see `request`, raising a RuntimeError with the service's error if it failed.
+        """
+
+        reply: Mapping[str, Any] = self.request(command, **kwargs)
+        if not reply.get('ok'): raise RuntimeError(reply.get('error'))
+        return reply
+
+    def classify(self: any, img: Union[np.ndarray, bytes]) -> List[Tuple[str, List[int]]]:
+        """
+        Returns the name and (top, right, bottom, left) box of every face in [img].
+        """
+
+        return [(face['name'], face['box']) for face in self.checked('classify', img=img)['faces']]
+
+    def attendance(self: any, img: Optional[Union[np.ndarray, bytes]] = None) -> List[str]:
+        """
+        Returns the names of the people recognized in [img], or in the service's camera if None.
+        """
+
+        return self.checked('attendance', img=img)['names']
+
+    def learn(self: any, name: str, img: Optional[Union[np.ndarray, bytes]] = None) -> List[str]:
+        """
+        Learns the largest face in [img] (or the service's camera if None) as [name], returning the
+        names recognized in it afterwards.
+        """
+
+        return self.checked('learn', img=img, names=[name])['names']
+
+    def forget(self: any, img: Optional[Union[np.ndarray, bytes]] = None) -> List[str]:
+        """
+        Forgets the people recognized in [img] (or the service's camera if None), returning their names.
+        """
+
+        return self.checked('forget', img=img)['names']
+
+    def stats(self: any) -> Mapping[str, Any]:
+        """
+        Returns the service's statistics and the metrics of its process.
+        """
+
+        return self.checked('stats')
+
+def load_test(address: str, img: Union[np.ndarray, bytes], clients: int = 8, requests: int = 25,
+              command: str = 'classify') -> Mapping[str, Any]:
+    """
+    Sends [requests] requests from each of [clients] concurrent clients (one thread and socket each)
+    and measures how the service keeps up.
+
+    PARAMETERS
+    ----------
+    address  - The endpoint the service is bound to.
+    img      - The image sent with every request.
+    clients  - The number of concurrent clients.
+    requests - The number of requests each client sends, one after the other.
+    command  - Either 'classify' or 'attendance'.
+
+    RETURNS
+    -------
+    Mapping[str, Any] - The requests sent and failed, the requests per second, the mean, median and
+    99th percentile round trip in milliseconds, and the service's statistics afterwards.
+    """
+
+    from client.bench import summarize # Imported Here, Only The Load Test Needs It
+
+    payload: bytes = encode_payload(img); latencies: List[float] = []; errors: List[str] = []
+    lock: threading.Lock = threading.Lock()
+
+    def work() -> None:
+        with ServiceClient(address) as service:
+            for _ in range(requests):
+                began: float = time.perf_counter()
+                try: reply: Mapping[str, Any] = service.request(command, img=payload)
+                except TimeoutError as exc: reply = { 'ok': False, 'error': str(exc) }
+
+                with lock:
+                    latencies.append(time.perf_counter() - began)
+                    if not reply.get('ok'): errors.append(reply.get('error'))
+
+    threads: List[threading.Thread] = [threading.Thread(target=work, daemon=True) for _ in range(max(clients, 1))]
+    start: float = time.perf_counter()
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    elapsed: float = time.perf_counter() - start
+
+    with ServiceClient(address) as service: stats: Mapping[str, Any] = service.stats()['service']
+    return { 'clients': len(threads), 'requests': len(latencies), 'failed': len(errors),
+             'first_error': errors[0] if errors else None, **summarize(latencies, elapsed), 'service': stats }
+
+if __name__ == '__main__':
+    from client.client import Client # Loaded Here, So The Client Library Does Not Need The Recognition Stack
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description='Serves face recognition over ZeroMQ.')
+    parser.add_argument('mode', nargs='?', default='serve', choices=['serve', 'load'],
+                        help='serve requests, or load test a service (one started here if no --address)')
+    parser.add_argument('-a', '--address', default=None, help=f'endpoint to bind or connect to ({SERVICE_ADDRESS})')
+    parser.add_argument('-w', '--window', type=float, default=SERVICE_WINDOW, help='seconds to wait for requests to batch')
+    parser.add_argument('-b', '--batch', type=int, default=SERVICE_BATCH, help='maximum images recognized in one pass')
+    parser.add_argument('-c', '--clients', type=int, default=8, help='concurrent clients of the load test')
+    parser.add_argument('-n', '--requests', type=int, default=25, help='requests sent by every client of the load test')
+    parser.add_argument('-i', '--image', default=os.path.join('resources', 'examples', 'original.jpg'), help='image sent by the load test')
+    args: argparse.Namespace = parser.parse_args()
+
+    if args.mode == 'serve':
+        client: Client = Client(disp=False, prnt=False)
+        service: RecognitionService = RecognitionService(client, args.address or SERVICE_ADDRESS, window=args.window, batch=args.batch)
+
+        with (client.camera if client.open else nullcontext()):
+            print(f'Serving on {service.bind()}, press Ctrl-C to stop.', file=sys.stderr)
+            print(f'Service: {service.serve()}', file=sys.stderr)
+
+    else:
+        img: Optional[np.ndarray] = cv2.imread(args.image)
+        if img is None: raise OSError(f'File {args.image} does not exist or is not an image.')
+
+        service: Optional[RecognitionService] = None; thread: Optional[threading.Thread] = None
+        if args.address is None: # Serving Over Loopback From This Process
+            service = RecognitionService(Client(open=False, load=False, disp=False, prnt=False), 'tcp://127.0.0.1:*',
+                                         window=args.window, batch=args.batch)
+            service.bind(); thread = threading.Thread(target=service.serve, daemon=True); thread.start()
+
+        try: print(json.dumps(load_test(args.address or service.address, img, clients=args.clients, requests=args.requests)))
+        finally:
+            if service is not None: service.stop(); thread.join()
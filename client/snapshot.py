@@ -0,0 +1,112 @@
+import numpy as np, hashlib, json, os # Default Python Libraries
+
+from client.store import record_dtype, store_path, HEADER_DTYPE, HEADER_SIZE, VERSION, STORE_DTYPES # Encoding Store Layout
+from client.config import * # Default Configurations
+
+from typing import Any, List, Mapping, Optional, Tuple # Type Hinting
+
+# Copying Config Values
+ENCODING_MODEL: str = DEFAULT_ENCODING_MODEL
+NUM_JITTERS: int    = DEFAULT_NUM_JITTERS
+LIMIT: int          = DEFAULT_IDENTITY_ENCODINGS
+
+def snapshot_path(cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    return os.path.join(cache_dir, SNAPSHOT_FILENAME)
+
+def image_files(path: str) -> List[str]:
+    """
+    Returns every image `cload_images` would load from [path], a directory or a single file, sorted.
+    """
+
+    if os.path.isfile(path): return [path]
+    return sorted(os.path.join(root, file) for root, _, names in os.walk(path) for file in names
+                  if '.' in file and file[file.rindex('.')+1:] in IMG_EXTs)
+
+def snapshot_key(path: Optional[str], cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    """
+    Returns a key describing everything a loaded gallery depends on: the encoding parameters, the
+    size and modification time of every image under [path], the manifest, and which records of the
+    encoding store are alive. Only stats and the store's header and tombstone flags are read, so
+    this is far cheaper than loading, but any learned, forgotten, added or edited face changes it.
+
+    PARAMETERS
+    ----------
+    path      - The image directory (or file) the gallery was loaded from, None if not loaded.
+    cache_dir - The directory of the `cache`, default specified by `DEFAULT_CACHE_DIR`.
+
+    RETURNS
+    -------
+    str - The hex digest of the key.
+    """
+
+    digest: Any = hashlib.blake2b(digest_size=20)
+    params: Mapping[str, Any] = { 'model': ENCODING_MODEL, 'jitters': NUM_JITTERS, 'limit': LIMIT, 'dim': DEFAULT_ENCODING_DIM,
+                                  'dtype': DEFAULT_GALLERY_DTYPE }
+    digest.update(json.dumps({ **params, 'path': path }, sort_keys=True).encode(TEXT_ENCODING))
+
+    for file in image_files(path) if path is not None else []:
+        stat: os.stat_result = os.stat(file)
+        digest.update(f'{os.path.relpath(file, path)}:{stat.st_size}:{stat.st_mtime_ns};'.encode(TEXT_ENCODING))
+
+    manifest: str = os.path.join(cache_dir, MANIFEST_FILENAME)
+    if os.path.exists(manifest):
+        stat = os.stat(manifest); digest.update(f'manifest:{stat.st_size}:{stat.st_mtime_ns};'.encode(TEXT_ENCODING))
+
+    # Writes Through The Memory Map Do Not Reliably Update The Store's Modification Time, So The
+    # Header (Record Count) And Every Tombstone Flag Are Hashed Instead
+    store: str = store_path(cache_dir)
+    if os.path.exists(store):
+        header: np.ndarray = np.fromfile(store, dtype=HEADER_DTYPE, count=1)
+        count: int = int(header['count'][0])
+        digest.update(header.tobytes())
+
+        dtype: str = header['dtype'][0].decode(errors='replace')
+        if count > 0 and header['version'][0] == VERSION and dtype in STORE_DTYPES.values():
+            records: np.memmap = np.memmap(store, dtype=record_dtype(int(header['dim'][0]), dtype),
+                                           mode='r', offset=HEADER_SIZE, shape=(count,))
+            digest.update(np.ascontiguousarray(records['alive']).tobytes()); del records
+
+    return digest.hexdigest()
+
+def load_snapshot(key: str, cache_dir: str = DEFAULT_CACHE_DIR) -> Optional[Tuple[List[str], np.ndarray]]:
+    """
+    Loads the gallery snapshot in [cache_dir], if it was taken under the same [key].
+
+    PARAMETERS
+    ----------
+    key       - The key the gallery would be loaded under now, see `snapshot_key`.
+    cache_dir - The directory of the `cache`, default specified by `DEFAULT_CACHE_DIR`.
+
+    RETURNS
+    -------
+    Optional[Tuple[List[str], np.ndarray]] - The name of every row and the (N x 128) encodings, in
+    the order `Gallery.extend` takes them, or None if there is no snapshot or it is stale or unreadable.
+    """
+
+    try:
+        with np.load(snapshot_path(cache_dir), allow_pickle=False) as data:
+            if str(data['key']) != key: return None
+            return data['names'].tolist(), data['encodings']
+    except (OSError, ValueError, KeyError): return None
+
+def save_snapshot(gallery: Any, key: str, cache_dir: str = DEFAULT_CACHE_DIR) -> None:
+    """
+    Writes every encoding in [gallery] to the snapshot in [cache_dir] under [key], each person's
+    rows oldest first so reloading them evicts in the same order. Encodings are written as float32
+    unless the gallery holds float64, since no other gallery dtype keeps more than that.
+
+    PARAMETERS
+    ----------
+    gallery   - The loaded `Gallery`.
+    key       - The key the gallery was loaded under, see `snapshot_key`.
+    cache_dir - The directory of the `cache`, default specified by `DEFAULT_CACHE_DIR`.
+    """
+
+    names: List[str] = [name for name in gallery.identities for _ in gallery.rows[name]]
+    rows: List[int] = [row for name in gallery.identities for row in gallery.rows[name]]
+    path: str = snapshot_path(cache_dir)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(path + '.tmp', 'wb') as file:
+        np.savez(file, key=np.array(key), names=np.array(names, dtype=str), encodings=gallery.vectors(rows).astype(np.float64 if gallery.dtype == 'float64' else np.float32))
+    os.replace(path + '.tmp', path)
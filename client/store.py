@@ -0,0 +1,480 @@
+import numpy as np, zlib, os # Default Python Libraries
+
+from client.config import * # Default Configurations
+
+from typing import Iterator, List, Mapping, MutableMapping, Optional, Tuple # Type Hinting
+
+# Copying Config Values
+ENCODING_DIM: int   = DEFAULT_ENCODING_DIM
+STORE_CAPACITY: int = DEFAULT_STORE_CAPACITY
+NAME_BYTES: int     = DEFAULT_STORE_NAME_BYTES
+ENCODING_MODEL: str = DEFAULT_ENCODING_MODEL
+STORE_DTYPES: Mapping[str, str] = { 'float32': '<f4', 'float64': '<f8' }
+STORE_DTYPE: str    = STORE_DTYPES[DEFAULT_STORE_DTYPE]
+
+# File Layout (Header Followed By Fixed-Stride Records), Version 2 Added The Encoding dtype,
+# Encoding Model & Header Checksum (Version 1 Was Always float64 & Is Upgraded When Opened)
+MAGIC: bytes     = b'C1C0ENCS'
+VERSION: int     = 2
+HEADER_SIZE: int = 64
+V1_HEADER_DTYPE: np.dtype = np.dtype([('magic', 'S8'), ('version', '<u4'), ('dim', '<u4'),
+                                      ('count', '<u8'), ('capacity', '<u8')])
+HEADER_DTYPE: np.dtype = np.dtype([('magic', 'S8'), ('version', '<u4'), ('dim', '<u4'),
+                                   ('count', '<u8'), ('capacity', '<u8'), ('dtype', 'S4'),
+                                   ('model', 'S16'), ('checksum', '<u4')])
+
+def record_dtype(dim: int = ENCODING_DIM, dtype: str = STORE_DTYPE) -> np.dtype:
+    """
+    Returns the dtype of a single record in the store, which is a tombstone flag, a fixed-width
+    utf-8 name and the encoding itself. Every record has the same stride, so a record can be
+    found or written by index without reading the ones before it.
+
+    PARAMETERS
+    ----------
+    dim   - The dimension of each encoding.
+    dtype - The dtype of each encoding, either '<f4' or '<f8'.
+
+    RETURNS
+    -------
+    np.dtype - The structured dtype of a record.
+    """
+
+    return np.dtype([('alive', 'u1'), ('name', f'S{NAME_BYTES - 1}'), ('encoding', dtype, (dim,))])
+
+def checksum(header: np.ndarray) -> int:
+    """
+    Returns the CRC-32 of every field of [header] before the checksum itself.
+    """
+
+    return zlib.crc32(header.tobytes()[:HEADER_DTYPE.fields['checksum'][1]])
+
+def store_version(path: str) -> int:
+    """
+    Returns the version of the store at [path].
+
+    RAISES
+    ------
+    OSError - Raised when the file is unable to be accessed, or is not an encoding store at all.
+    """
+
+    header: np.ndarray = np.fromfile(path, dtype=V1_HEADER_DTYPE, count=1)
+    if len(header) == 0 or header['magic'][0] != MAGIC: raise OSError(f'File {path} is not an encoding store.')
+    return int(header['version'][0])
+
+class EncodingStore:
+    """
+    A single packed file holding every cached encoding, opened with np.memmap. The file is a
+    small header followed by fixed-stride records, so loading the cache is one open no matter
+    how many people it holds. A person may have several records, one per encoding. New
+    encodings are appended in place and deleted ones are only marked as dead (tombstoned), the
+    file is only rewritten by `compact`.
+
+    The header records the dimension and dtype of the encodings (float32 by default, half the
+    size of float64 for a difference far below matching tolerance) and the model that encoded
+    them, and is checksummed. A store that does not match what is expected, or whose header,
+    names or encodings are corrupt, is rejected rather than read as something else.
+    """
+
+    def __init__(self: any, path: str, dim: int = ENCODING_DIM, capacity: int = STORE_CAPACITY,
+                 dtype: str = STORE_DTYPE, model: Optional[str] = ENCODING_MODEL) -> 'EncodingStore':
+        """
+        Opens the store at [path], creating an empty one with room for [capacity] records if
+        it does not exist yet.
+
+        PARAMETERS
+        ----------
+        path     - The path to the store file.
+        dim      - The dimension of each encoding, which an existing store must match.
+        capacity - The number of records to preallocate, only used when creating the store.
+        dtype    - The dtype of each encoding, either '<f4' or '<f8', only used when creating the store.
+        model    - The encoding model, which an existing store must match unless None.
+
+        RAISES
+        ------
+        OSError - Raised when the file is unable to be accessed, is not a valid store, does not
+                  match [dim] or [model], or is corrupt.
+        """
+
+        self.path: str = path
+        if not os.path.exists(path): EncodingStore.create(path, dim, capacity, dtype, model or ENCODING_MODEL)
+
+        if os.path.getsize(path) < HEADER_SIZE: raise OSError(f'File {path} is not an encoding store.')
+        self.header: np.memmap = np.memmap(path, dtype=HEADER_DTYPE, mode='r+', shape=(1,))
+        self.validate(dim, model)
+
+        self.dim: int                       = int(self.header['dim'][0])
+        self.encoding_dtype: str            = self.header['dtype'][0].decode()
+        self.model: str                     = self.header['model'][0].decode()
+        self.dtype: np.dtype                = record_dtype(self.dim, self.encoding_dtype)
+
+        if self.count > self.capacity or os.path.getsize(path) < HEADER_SIZE + self.capacity * self.dtype.itemsize:
+            raise OSError(f'File {path} is cut short, it should hold {self.capacity} records.')
+
+        self.records: np.memmap             = self.map_records()
+        self.rows: MutableMapping[str, List[int]] = {}
+
+        alive: np.ndarray = np.flatnonzero(self.records['alive'][:self.count])
+        try:
+            for row, name in zip(alive.tolist(), self.records['name'][alive].tolist()):
+                self.rows.setdefault(name.decode(TEXT_ENCODING), []).append(row)
+        except UnicodeDecodeError as exc: raise OSError(f'File {path} holds a corrupt name.') from exc
+
+    def validate(self: any, dim: int, model: Optional[str]) -> None:
+        """
+        Checks the header is of this version and intact, and that the store holds encodings of
+        [dim] from [model] (any model if None) in a known dtype, raising an OSError if not.
+        """
+
+        header: np.ndarray = self.header[0]
+        if header['magic'] != MAGIC or header['version'] != VERSION:
+            raise OSError(f'File {self.path} is not a version {VERSION} encoding store.')
+        if header['checksum'] != checksum(self.header): raise OSError(f'File {self.path} has a corrupt header.')
+
+        if header['dtype'].decode(errors='replace') not in STORE_DTYPES.values():
+            raise OSError(f'File {self.path} holds encodings of unknown dtype {header["dtype"]}.')
+        if header['dim'] != dim:
+            raise OSError(f'File {self.path} holds encodings of length {header["dim"]}, expected {dim}.')
+        if model is not None and header['model'].decode(errors='replace') != model:
+            raise OSError(f'File {self.path} holds encodings of the {header["model"].decode(errors="replace")} model, '
+                          f'expected {model}. Remove it to encode every face again.')
+
+    @staticmethod
+    def create(path: str, dim: int = ENCODING_DIM, capacity: int = STORE_CAPACITY, dtype: str = STORE_DTYPE,
+               model: str = ENCODING_MODEL) -> None:
+        """
+        Writes an empty store with room for [capacity] records to [path].
+
+        PARAMETERS
+        ----------
+        path     - The path to the store file.
+        dim      - The dimension of each encoding.
+        capacity - The number of records to preallocate.
+        dtype    - The dtype of each encoding, either '<f4' or '<f8'.
+        model    - The encoding model the encodings come from.
+        """
+
+        if dtype not in STORE_DTYPES.values(): raise ValueError(f'Expected one of {list(STORE_DTYPES.values())}. Got \'{dtype}\' instead.')
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        header: np.ndarray = np.zeros(1, dtype=HEADER_DTYPE)
+        header['magic'] = MAGIC; header['version'] = VERSION; header['dim'] = dim
+        header['count'] = 0; header['capacity'] = max(capacity, 1)
+        header['dtype'] = dtype.encode(); header['model'] = model.encode(TEXT_ENCODING)
+        header['checksum'] = checksum(header)
+
+        with open(path, 'wb') as file:
+            file.write(header.tobytes().ljust(HEADER_SIZE, b'\x00'))
+            file.truncate(HEADER_SIZE + max(capacity, 1) * record_dtype(dim, dtype).itemsize)
+
+    def seal(self: any) -> None:
+        """
+        Updates the header's checksum after a change, and writes the header out.
+        """
+
+        self.header['checksum'] = checksum(self.header); self.header.flush()
+
+    @property
+    def count(self: any) -> int:
+        return int(self.header['count'][0])
+
+    @property
+    def capacity(self: any) -> int:
+        return int(self.header['capacity'][0])
+
+    def map_records(self: any) -> np.memmap:
+        return np.memmap(self.path, dtype=self.dtype, mode='r+', offset=HEADER_SIZE, shape=(self.capacity,))
+
+    def __contains__(self: any, name: str) -> bool:
+        return name in self.rows
+
+    def __len__(self: any) -> int:
+        return len(self.rows)
+
+    def __iter__(self: any) -> Iterator[str]:
+        return iter(list(self.rows))
+
+    def get(self: any, name: str) -> np.ndarray:
+        """
+        Gets the encodings stored under [name], oldest first.
+
+        PARAMETERS
+        ----------
+        name - The name of the person whose encoding is being gotten.
+
+        RAISES
+        ------
+        FileNotFoundError - Raised when there is no encoding stored under [name].
+        OSError           - Raised when the encodings are corrupt.
+
+        RETURNS
+        -------
+        np.ndarray - The encodings as a (K x dim) float64 np.ndarray.
+        """
+
+        if name not in self.rows: raise FileNotFoundError(f'No encoding for {name} in {self.path}.')
+        return self.read(self.rows[name])
+
+    def items(self: any) -> List[Tuple[str, np.ndarray]]:
+        """
+        Returns every live name-encoding pair, reading all the encodings in one slice. A name with
+        several encodings appears once per encoding, oldest first.
+
+        RETURNS
+        -------
+        List[Tuple[str, np.ndarray]] - The names and encodings in the store.
+        """
+
+        names: List[str] = [name for name, rows in self.rows.items() for _ in rows]
+        encodings: np.ndarray = self.read([row for rows in self.rows.values() for row in rows])
+        return list(zip(names, encodings))
+
+    def read(self: any, rows: List[int]) -> np.ndarray:
+        """
+        Returns the encodings in [rows] as a (K x dim) float64 array, raising an OSError if any of
+        them is not finite (and so is corrupt).
+        """
+
+        encodings: np.ndarray = self.records['encoding'][rows].astype(np.float64)
+        if not np.isfinite(encodings).all(): raise OSError(f'File {self.path} holds corrupt encodings.')
+        return encodings
+
+    def grow(self: any, capacity: int) -> None:
+        """
+        Extends the file so it can hold [capacity] records, without touching existing records.
+
+        PARAMETERS
+        ----------
+        capacity - The new number of records the file should be able to hold.
+        """
+
+        self.records.flush(); del self.records
+
+        with open(self.path, 'r+b') as file: file.truncate(HEADER_SIZE + capacity * self.dtype.itemsize)
+        self.header['capacity'] = capacity; self.seal()
+        self.records = self.map_records()
+
+    def extend(self: any, pairs: List[Tuple[str, np.ndarray]], replace: bool = False) -> None:
+        """
+        Appends every name-encoding pair to the end of the file, alongside any older records under
+        the same name unless [replace] is set. Only the new records and the header are written.
+
+        PARAMETERS
+        ----------
+        pairs   - The names and encodings to store, a name may appear several times.
+        replace - Whether to tombstone every older record under the names being stored.
+
+        RAISES
+        ------
+        ValueError - Raised when a name is too long or an encoding has the wrong dimension.
+        """
+
+        checked: List[Tuple[str, bytes, np.ndarray]] = []
+        for name, encoding in pairs:
+            encoded: bytes = name.encode(TEXT_ENCODING)
+            if len(encoded) >= NAME_BYTES: raise ValueError(f'Name {name} is longer than {NAME_BYTES - 1} bytes.')
+
+            encoding: np.ndarray = np.asarray(encoding, dtype=np.float64).reshape(-1)
+            if encoding.shape[0] != self.dim:
+                raise ValueError(f'Expected an encoding of length {self.dim}. Got {encoding.shape[0]} instead.')
+            if not np.isfinite(encoding).all(): raise ValueError(f'The encoding of {name} is not finite.')
+            checked.append((name, encoded, encoding))
+
+        if len(checked) == 0: return
+
+        count: int = self.count
+        if count + len(checked) > self.capacity: self.grow(max(self.capacity * 2, count + len(checked)))
+
+        if replace:
+            for name in dict.fromkeys(name for name, _, _ in checked):
+                if name in self.rows: self.records['alive'][self.rows.pop(name)] = 0
+
+        for i, (name, encoded, encoding) in enumerate(checked):
+            self.records[count + i] = (1, encoded, encoding)
+            self.rows.setdefault(name, []).append(count + i)
+
+        self.records.flush()
+        self.header['count'] = count + len(checked); self.seal()
+
+    def append(self: any, name: str, encoding: np.ndarray) -> None:
+        """
+        Appends a single encoding under [name], keeping its older encodings, see `extend`.
+
+        PARAMETERS
+        ----------
+        name     - The name of the person [encoding] is for.
+        encoding - The encoding for the person, [name].
+        """
+
+        self.extend([(name, encoding)])
+
+    def replace(self: any, name: str, encodings: np.ndarray) -> None:
+        """
+        Replaces every encoding under [name] with [encodings], see `extend`.
+
+        PARAMETERS
+        ----------
+        name      - The name of the person [encodings] are for.
+        encodings - A single encoding, or a (K x dim) stack of encodings, for the person, [name].
+        """
+
+        encodings: np.ndarray = np.asarray(encodings, dtype=np.float64).reshape(-1, self.dim)
+        self.extend([(name, encoding) for encoding in encodings], replace=True)
+
+    def remove(self: any, name: str) -> bool:
+        """
+        Tombstones every record stored under [name], leaving the rest of the file untouched.
+
+        PARAMETERS
+        ----------
+        name - The name of the person to remove.
+
+        RETURNS
+        -------
+        bool - True if any record was removed, false if there were none under [name].
+        """
+
+        if name not in self.rows: return False
+
+        self.records['alive'][self.rows.pop(name)] = 0
+        self.records.flush()
+        return True
+
+    def compact(self: any) -> int:
+        """
+        Rewrites the store with only its live records, reclaiming the space used by tombstones.
+        The new file is written next to the old one and swapped in atomically.
+
+        RETURNS
+        -------
+        int - The number of dead records that were dropped.
+        """
+
+        dropped: int = self.count - sum(len(rows) for rows in self.rows.values())
+        pairs: List[Tuple[str, np.ndarray]] = self.items()
+        temp: str = self.path + '.tmp'
+
+        EncodingStore.create(temp, self.dim, max(len(pairs), STORE_CAPACITY), self.encoding_dtype, self.model)
+        compacted: EncodingStore = EncodingStore(temp, self.dim, model=self.model)
+        compacted.extend(pairs); compacted.close()
+
+        self.close(); os.replace(temp, self.path)
+        self.__init__(self.path, self.dim, model=self.model)
+        return dropped
+
+    def close(self: any) -> None:
+        """
+        Flushes and unmaps the store. It should not be used after being closed.
+        """
+
+        self.records.flush(); self.header.flush()
+        del self.records; del self.header
+
+def store_path(cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    return os.path.join(cache_dir, STORE_FILENAME)
+
+# Stores Opened So Far, So Each Store File Is Only Opened Once
+STORES: MutableMapping[str, EncodingStore] = {}
+
+def open_store(cache_dir: str = DEFAULT_CACHE_DIR) -> EncodingStore:
+    """
+    Returns the store in [cache_dir], opening (and migrating old `.enc` files or a version 1 store
+    into) it the first time it is used.
+
+    PARAMETERS
+    ----------
+    cache_dir - The directory of the `cache`, default specified by `DEFAULT_CACHE_DIR`.
+
+    RETURNS
+    -------
+    EncodingStore - The store for [cache_dir].
+    """
+
+    path: str = os.path.abspath(store_path(cache_dir))
+
+    if path not in STORES:
+        fresh: bool = not os.path.exists(path)
+        if not fresh and store_version(path) < VERSION: upgrade_store(path)
+        STORES[path] = EncodingStore(path)
+        if fresh: migrate_store(cache_dir, STORES[path])
+
+    return STORES[path]
+
+def upgrade_store(path: str, dtype: str = STORE_DTYPE, model: str = ENCODING_MODEL) -> int:
+    """
+    Rewrites the version 1 store at [path] (float64 encodings, with no model or checksum in its
+    header) as a current one holding [dtype] encodings from [model], replacing it atomically.
+
+    PARAMETERS
+    ----------
+    path  - The path to the store file.
+    dtype - The dtype to store the encodings as, either '<f4' or '<f8'.
+    model - The encoding model the version 1 store was written with (it did not record it).
+
+    RAISES
+    ------
+    OSError - Raised when the file is unable to be accessed, or is not a valid version 1 store.
+
+    RETURNS
+    -------
+    int - The number of encodings upgraded.
+    """
+
+    header: np.ndarray = np.fromfile(path, dtype=V1_HEADER_DTYPE, count=1)
+    if len(header) == 0 or header['magic'][0] != MAGIC or header['version'][0] != 1:
+        raise OSError(f'File {path} is not a version 1 encoding store.')
+
+    dim: int = int(header['dim'][0]); count: int = int(header['count'][0]); capacity: int = int(header['capacity'][0])
+    old: np.dtype = np.dtype([('alive', 'u1'), ('name', f'S{NAME_BYTES - 1}'), ('encoding', '<f8', (dim,))])
+    if count > capacity or os.path.getsize(path) < HEADER_SIZE + count * old.itemsize:
+        raise OSError(f'File {path} is cut short, it should hold {count} records.')
+
+    records: np.memmap = np.memmap(path, dtype=old, mode='r', offset=HEADER_SIZE, shape=(max(count, 1),))
+    alive: np.ndarray = np.flatnonzero(records['alive'][:count])
+    try: names: List[str] = [name.decode(TEXT_ENCODING) for name in records['name'][alive].tolist()]
+    except UnicodeDecodeError as exc: raise OSError(f'File {path} holds a corrupt name.') from exc
+    encodings: np.ndarray = np.array(records['encoding'][alive]); del records
+
+    temp: str = path + '.tmp'
+    EncodingStore.create(temp, dim, max(len(names), STORE_CAPACITY), dtype, model)
+    upgraded: EncodingStore = EncodingStore(temp, dim, model=model)
+    upgraded.extend(list(zip(names, encodings))); upgraded.close()
+    os.replace(temp, path)
+
+    print(f'Upgraded {len(names)} encodings in {path} to a version {VERSION} store.')
+    return len(names)
+
+def migrate_store(cache_dir: str = DEFAULT_CACHE_DIR, store: Optional[EncodingStore] = None) -> int:
+    """
+    One-shot migration of the old one-file-per-person cache. Every raw `.enc` file in [cache_dir]
+    is appended to the store, and then removed so it is not migrated again.
+
+    PARAMETERS
+    ----------
+    cache_dir - The directory of the `cache`, default specified by `DEFAULT_CACHE_DIR`.
+    store     - The store to migrate into, opened from [cache_dir] if not given.
+
+    RETURNS
+    -------
+    int - The number of encodings migrated.
+    """
+
+    store: EncodingStore = open_store(cache_dir) if store is None else store
+    if not os.path.isdir(cache_dir): return 0
+
+    files: List[str] = [file for file in os.listdir(cache_dir) if file.endswith(f'.{ENCODING_EXT}')]
+    pairs: List[Tuple[str, np.ndarray]] = []
+
+    for file in files:
+        with open(os.path.join(cache_dir, file), 'rb') as enc: data: bytes = enc.read()
+
+        # Raw Files Have No Header, So Only Their Size (dim float64s) Tells Whether They Are Intact
+        if len(data) != store.dim * 8: print(f'Skipped migrating {file}, it is not {store.dim} float64s.'); continue
+        encoding: np.ndarray = np.frombuffer(data, dtype='<f8')
+        if not np.isfinite(encoding).all(): print(f'Skipped migrating {file}, it is corrupt.'); continue
+        pairs.append((file[:file.rindex('.')], encoding))
+
+    store.extend(pairs, replace=True)
+    for name, _ in pairs: os.remove(os.path.join(cache_dir, f'{name}.{ENCODING_EXT}'))
+
+    if len(pairs) > 0: print(f'Migrated {len(pairs)} encodings from {cache_dir} into {store.path}.')
+    return len(pairs)
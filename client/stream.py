@@ -0,0 +1,221 @@
+import threading, queue, time # Default Python Libraries
+
+from client.config import * # Default Configurations
+
+from typing import Any, Callable, List, Mapping, MutableMapping, Optional # Type Hinting
+
+# Copying Config Values
+QUEUE_SIZE: int      = DEFAULT_STREAM_QUEUE_SIZE
+MAX_FRAME_AGE: float = DEFAULT_STREAM_MAX_AGE
+
+class LatestQueue:
+    """
+    A bounded queue that never blocks the producer. When it is full, putting a new item drops
+    the oldest one, so a slow consumer always gets the most recent items instead of a backlog.
+    """
+
+    def __init__(self: any, maxsize: int = QUEUE_SIZE) -> 'LatestQueue':
+        """
+        Initializes an empty queue holding at most [maxsize] items.
+
+        PARAMETERS
+        ----------
+        maxsize - The maximum number of items held before the oldest is dropped.
+        """
+
+        self.queue: queue.Queue = queue.Queue(maxsize=max(maxsize, 1))
+        self.lock: threading.Lock = threading.Lock()
+        self.dropped: int = 0
+
+    def put(self: any, item: Any) -> None:
+        """
+        Puts [item] in the queue, dropping the oldest item if the queue is full.
+
+        PARAMETERS
+        ----------
+        item - The item to put in the queue.
+        """
+
+        with self.lock:
+            while True:
+                try: self.queue.put_nowait(item); return
+                except queue.Full: pass
+
+                try: self.queue.get_nowait(); self.dropped += 1
+                except queue.Empty: pass
+
+    def get(self: any, timeout: Optional[float] = None) -> Any:
+        """
+        Gets the oldest item in the queue, waiting up to [timeout] seconds for one.
+
+        PARAMETERS
+        ----------
+        timeout - The number of seconds to wait, waits forever if None.
+
+        RAISES
+        ------
+        queue.Empty - Raised when no item arrived within [timeout] seconds.
+
+        RETURNS
+        -------
+        Any - The item.
+        """
+
+        return self.queue.get(timeout=timeout)
+
+class StreamPipeline:
+    """
+    Runs recognition continuously as three stages on their own threads, joined by bounded
+    queues that drop stale items: capture reads frames, recognition detects, encodes and
+    matches faces, and publishing hands results to a callback. Each stage only ever works on
+    the latest item, so the results always describe the most recent frame.
+    """
+
+    def __init__(self: any, read: Callable[[], Any], analyze: Callable[[Any], Any],
+                 publish: Callable[[int, Any, Any], None], queue_size: int = QUEUE_SIZE,
+                 max_age: float = MAX_FRAME_AGE) -> 'StreamPipeline':
+        """
+        Initializes the pipeline. Nothing runs until `start` (or `run`) is called.
+
+        PARAMETERS
+        ----------
+        read       - Returns the next frame, called repeatedly by the capture stage. It must wait for a
+                     frame it has not returned before, so the stage does not spin on the same one.
+        analyze    - Returns the results for a frame, called by the recognition stage.
+        publish    - Called with the sequence number, frame and results by the publishing stage.
+        queue_size - The size of the queues between stages.
+        max_age    - The age in seconds after which a captured frame is dropped unprocessed.
+        """
+
+        self.read: Callable[[], Any]                  = read
+        self.analyze: Callable[[Any], Any]            = analyze
+        self.publish: Callable[[int, Any, Any], None] = publish
+        self.max_age: float                           = max_age
+
+        self.frames: LatestQueue              = LatestQueue(queue_size)
+        self.results: LatestQueue             = LatestQueue(queue_size)
+        self.running: threading.Event         = threading.Event()
+        self.threads: List[threading.Thread]  = []
+        self.errors: List[BaseException]      = []
+        self.counts: MutableMapping[str, int] = { 'captured': 0, 'analyzed': 0, 'published': 0, 'stale': 0 }
+
+    def stage(self: any, target: Callable[[], None]) -> Callable[[], None]:
+        """
+        Wraps a stage so it runs repeatedly until the pipeline stops, and so any error stops the
+        whole pipeline and is re-raised by `run`.
+
+        PARAMETERS
+        ----------
+        target - One iteration of the stage.
+
+        RETURNS
+        -------
+        Callable[[], None] - The loop to run on the stage's thread.
+        """
+
+        def loop() -> None:
+            try:
+                while self.running.is_set(): target()
+            except BaseException as exc:
+                self.errors.append(exc); self.running.clear()
+        return loop
+
+    def capture(self: any) -> None:
+        """
+        One iteration of the capture stage, reads a frame and queues it with a sequence number
+        and timestamp, replacing any frame the recognition stage has not picked up yet.
+        """
+
+        frame: Any = self.read()
+        self.counts['captured'] += 1
+        self.frames.put((self.counts['captured'], time.monotonic(), frame))
+
+    def recognize(self: any) -> None:
+        """
+        One iteration of the recognition stage, analyzes the latest frame unless it has become
+        older than `max_age` while waiting, and queues its results for publishing.
+        """
+
+        try: seq, stamp, frame = self.frames.get(timeout=0.1)
+        except queue.Empty: return
+
+        if time.monotonic() - stamp > self.max_age: self.counts['stale'] += 1; return
+
+        results: Any = self.analyze(frame)
+        self.counts['analyzed'] += 1
+        self.results.put((seq, frame, results))
+
+    def deliver(self: any) -> None:
+        """
+        One iteration of the publishing stage, hands the latest results to the callback.
+        """
+
+        try: seq, frame, results = self.results.get(timeout=0.1)
+        except queue.Empty: return
+
+        self.publish(seq, frame, results)
+        self.counts['published'] += 1
+
+    def start(self: any) -> None:
+        """
+        Starts the capture, recognition and publishing threads.
+        """
+
+        self.running.set()
+        self.threads = [threading.Thread(target=self.stage(target), name=f'stream-{name}', daemon=True)
+                        for name, target in [('capture', self.capture), ('recognize', self.recognize),
+                                             ('publish', self.deliver)]]
+        for thread in self.threads: thread.start()
+
+    def stop(self: any) -> None:
+        """
+        Stops every stage and waits for their threads to finish.
+        """
+
+        self.running.clear()
+        for thread in self.threads: thread.join(timeout=5.0)
+        self.threads = []
+
+    def stats(self: any) -> Mapping[str, int]:
+        """
+        Returns how many frames each stage handled and how many were dropped.
+
+        RETURNS
+        -------
+        Mapping[str, int] - Frames captured, analyzed and published, frames dropped for being too
+        old, and frames and results dropped from the queues under backpressure.
+        """
+
+        return { **self.counts, 'dropped_frames': self.frames.dropped, 'dropped_results': self.results.dropped }
+
+    def run(self: any, duration: Optional[float] = None, frames: Optional[int] = None) -> Mapping[str, int]:
+        """
+        Runs the pipeline until [duration] seconds pass, [frames] results are published, a stage
+        fails, or the user interrupts with Ctrl-C.
+
+        PARAMETERS
+        ----------
+        duration - The number of seconds to run for, forever if None.
+        frames   - The number of results to publish before stopping, unlimited if None.
+
+        RAISES
+        ------
+        BaseException - Whichever error stopped a stage, if any.
+
+        RETURNS
+        -------
+        Mapping[str, int] - The statistics of the run, see `stats`.
+        """
+
+        end: float = float('inf') if duration is None else time.monotonic() + duration
+        self.start()
+
+        try:
+            while self.running.is_set() and time.monotonic() < end:
+                if frames is not None and self.counts['published'] >= frames: break
+                time.sleep(0.01)
+        except KeyboardInterrupt: pass
+        finally: self.stop()
+
+        if len(self.errors) > 0: raise self.errors[0]
+        return self.stats()
@@ -0,0 +1,161 @@
+import numpy as np, cv2 # Default Python Libraries
+
+from client.config import * # Default Configurations
+
+from typing import Any, Callable, List, Tuple # Type Hinting
+
+# Copying Config Values
+DETECT_INTERVAL: int = DEFAULT_DETECT_INTERVAL
+TRACK_LOSS: int      = DEFAULT_TRACK_LOSS
+TRACKER: str         = DEFAULT_TRACKER
+
+def create_tracker(kind: str = TRACKER) -> Any:
+    """
+    Creates an OpenCV single-object tracker of the given kind, falling back to the MIL tracker
+    (which ships with every OpenCV build) if that kind is not available in the installed build.
+
+    PARAMETERS
+    ----------
+    kind - The kind of tracker, e.g. 'kcf', 'csrt' or 'mil'.
+
+    RAISES
+    ------
+    RuntimeError - Raised when no tracker is available in the installed OpenCV build.
+
+    RETURNS
+    -------
+    Any - A tracker with `init(img, box)` and `update(img)` methods.
+    """
+
+    names: List[str] = [f'Tracker{kind.upper()}_create', 'TrackerMIL_create']
+    modules: List[Any] = [cv2, getattr(cv2, 'legacy', None)]
+
+    for name in names:
+        for module in modules:
+            if module is not None and hasattr(module, name): return getattr(module, name)()
+
+    raise RuntimeError(f'No OpenCV tracker available for {kind}.')
+
+def to_box(location: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+    """
+    Converts a (top, right, bottom, left) location to an OpenCV (x, y, width, height) box.
+    """
+
+    top, right, bottom, left = location
+    return (int(left), int(top), int(right - left), int(bottom - top))
+
+def to_location(box: Tuple[float, float, float, float], shape: Tuple[int, ...]) -> Tuple[int, int, int, int]:
+    """
+    Converts an OpenCV (x, y, width, height) box to a (top, right, bottom, left) location,
+    clipped to an image of the given [shape].
+    """
+
+    x, y, width, height = box
+    top: int = max(int(y), 0); left: int = max(int(x), 0)
+    bottom: int = min(int(y + height), shape[0]); right: int = min(int(x + width), shape[1])
+    return (top, right, bottom, left)
+
+class Track:
+    """
+    A single face being followed between detections, along with its identity.
+    """
+
+    def __init__(self: any, img: np.ndarray, name: str, location: Tuple[int, int, int, int], kind: str = TRACKER) -> 'Track':
+        """
+        Starts tracking the face at [location] in [img].
+
+        PARAMETERS
+        ----------
+        img      - The image the face was detected in.
+        name     - The identity of the face.
+        location - The location of the face in (top, right, bottom, left) format.
+        kind     - The kind of OpenCV tracker to use.
+        """
+
+        self.name: str                           = name
+        self.location: Tuple[int, int, int, int] = location
+        self.lost: int                           = 0
+        self.tracker: Any                        = create_tracker(kind)
+        self.tracker.init(img, to_box(location))
+
+    def update(self: any, img: np.ndarray) -> bool:
+        """
+        Moves the track to where the face is in [img].
+
+        PARAMETERS
+        ----------
+        img - The next image.
+
+        RETURNS
+        -------
+        bool - Whether the tracker found the face in [img].
+        """
+
+        ok: bool; box: Tuple[float, float, float, float]; ok, box = self.tracker.update(img)
+
+        if ok: self.location = to_location(box, img.shape); self.lost = 0
+        else: self.lost += 1
+        return bool(ok)
+
+class FaceTracker:
+    """
+    Runs full detection and encoding only every [interval] frames, or as soon as a track is
+    lost, and follows the detected faces with cheap OpenCV trackers in between. The identities
+    found by the last detection are carried forward along with the tracked boxes.
+    """
+
+    def __init__(self: any, interval: int = DETECT_INTERVAL, max_lost: int = TRACK_LOSS, kind: str = TRACKER) -> 'FaceTracker':
+        """
+        Initializes a tracker with no faces, so the first frame is always fully detected.
+
+        PARAMETERS
+        ----------
+        interval - The number of frames between full detections.
+        max_lost - The number of consecutive failed updates after which a track is lost.
+        kind     - The kind of OpenCV tracker to use.
+        """
+
+        self.interval: int       = max(interval, 1)
+        self.max_lost: int       = max(max_lost, 1)
+        self.kind: str           = kind
+        self.tracks: List[Track] = []
+        self.frames: int         = 0
+        self.detections: int     = 0
+
+    def reset(self: any) -> None:
+        """
+        Drops every track, so the next frame is fully detected.
+        """
+
+        self.tracks = []; self.frames = 0
+
+    def update(self: any, img: np.ndarray, detect: Callable[[np.ndarray], List[Tuple[str, Tuple[int, int, int, int]]]]
+               ) -> List[Tuple[str, Tuple[int, int, int, int]]]:
+        """
+        Returns the faces in [img], either by calling [detect] or by following the existing tracks.
+
+        PARAMETERS
+        ----------
+        img    - The next image.
+        detect - Runs full detection, encoding and matching on an image.
+
+        RETURNS
+        -------
+        List[Tuple[str, Tuple[int, int, int, int]]] - A list of name-image location pairs, in the
+        same format as `check_faces`.
+        """
+
+        due: bool = self.frames % self.interval == 0
+        self.frames += 1
+
+        if not due:
+            for track in self.tracks: track.update(img)
+            due = any(track.lost >= self.max_lost for track in self.tracks)
+
+        if due:
+            results: List[Tuple[str, Tuple[int, int, int, int]]] = detect(img)
+            self.tracks = [Track(img, name, location, self.kind) for name, location in results]
+            self.frames = 1; self.detections += 1
+            return results
+
+        return [(track.name, track.location) for track in self.tracks]
@@ -22,3 +22,5 @@ if __name__ == '__main__':
             task = client.interpret_task(command)
             result = task(args)
             time.sleep(SLEEP_TIME)
+
+    client.close() # Closing The Display Window
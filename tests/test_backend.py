@@ -0,0 +1,17 @@
+import numpy as np # Default Python Libraries
+
+from client.backend import crop_face # Cropping Faces For dlib
+
+def test_crop_is_contiguous_copy_of_the_face() -> None:
+    img: np.ndarray = np.arange(120 * 160 * 3, dtype=np.uint32).astype(np.uint8).reshape(120, 160, 3)
+    crop, (top, right, bottom, left) = crop_face(img, (40, 100, 80, 60), padding=0.25)
+
+    assert crop.flags['C_CONTIGUOUS'] and not np.shares_memory(crop, img)
+    assert crop.shape == (60, 60, 3) and (top, right, bottom, left) == (10, 50, 50, 10)
+    assert np.array_equal(crop[top:bottom, left:right], img[40:80, 60:100])
+
+def test_crop_is_clipped_at_the_edges() -> None:
+    img: np.ndarray = np.zeros((50, 50, 3), dtype=np.uint8)
+    crop, (top, _, _, left) = crop_face(img, (0, 30, 30, 0), padding=0.5)
+
+    assert crop.shape == (45, 45, 3) and (top, left) == (0, 0)
@@ -0,0 +1,89 @@
+import numpy as np, threading, asyncio, pytest # Default Python Libraries
+
+import cache # Website Caching Under Test
+from client.store import open_store # Encoding Store Fed By Enrollment
+
+from email.utils import formatdate # Last-Modified Dates
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer # Local Stand-In For The Website
+from typing import Any, Iterator, List, Mapping, MutableMapping, Tuple # Type Hinting
+
+# Fixture Pages, A Members Page Listing Two Images
+IMAGES: Mapping[str, bytes] = { '/images/JaneDoe.JPG': b'jane-image', '/images/C1C0CS_JohnSmith.JPG': b'john-image' }
+MEMBERS: bytes = b''.join(f'<img src="{path[1:]}">'.encode() for path in IMAGES) + b'<img src="images/logo.png">'
+MODIFIED: str = formatdate(0, usegmt=True)
+
+class Site(BaseHTTPRequestHandler):
+    """
+    Serves the fixture pages, with an ETag and Last-Modified date on every image, answering 304
+    when the image is requested with either. Every request's path and headers are recorded.
+    """
+
+    requests: List[Tuple[str, Mapping[str, str]]] = []
+
+    def do_GET(self: any) -> None:
+        Site.requests.append((self.path, dict(self.headers)))
+
+        if self.path == '/members.html': body: bytes = MEMBERS
+        elif self.path in IMAGES:
+            etag: str = f'"{len(IMAGES[self.path])}"'
+            if self.headers.get('If-None-Match') == etag or self.headers.get('If-Modified-Since') == MODIFIED:
+                self.send_response(304); self.end_headers(); return
+            body = IMAGES[self.path]
+        else: self.send_error(404); return
+
+        self.send_response(200)
+        if self.path in IMAGES: self.send_header('ETag', etag); self.send_header('Last-Modified', MODIFIED)
+        self.send_header('Content-Length', str(len(body))); self.end_headers(); self.wfile.write(body)
+
+    def log_message(self: any, *args: Any) -> None:
+        pass
+
+@pytest.fixture
+def site() -> Iterator[str]:
+    server: ThreadingHTTPServer = ThreadingHTTPServer(('127.0.0.1', 0), Site); Site.requests = []
+    thread: threading.Thread = threading.Thread(target=server.serve_forever, daemon=True); thread.start()
+
+    yield f'http://127.0.0.1:{server.server_address[1]}/'
+    server.shutdown(); server.server_close()
+
+@pytest.fixture
+def enrolled(monkeypatch: pytest.MonkeyPatch) -> List[List[Tuple[str, bytes]]]:
+    """
+    Replaces enrollment (which needs the face models) with one recording the jobs it was given and
+    storing an encoding for each, as enrolling would.
+    """
+
+    calls: List[List[Tuple[str, bytes]]] = []
+
+    def enroll_images(jobs: List[Tuple[str, bytes]], cache_dir: str, **kwargs: Any) -> None:
+        calls.append(list(jobs))
+        open_store(cache_dir).extend([(name, np.zeros(128)) for name, _ in jobs])
+
+    monkeypatch.setattr(cache, 'enroll_images', enroll_images)
+    return calls
+
+def image_requests() -> MutableMapping[str, Mapping[str, str]]:
+    return { path: headers for path, headers in Site.requests if path in IMAGES }
+
+def test_first_run_downloads_and_enrolls(site: str, enrolled: List[List[Tuple[str, bytes]]], tmp_path: Any) -> None:
+    summary: Mapping[str, int] = cache.cache_website(site, concurrency=2, cache_dir=str(tmp_path))
+
+    assert summary == { 'downloaded': 2, 'failed': 0, 'unchanged': 0 }
+    assert sorted(enrolled[0]) == [('Jane Doe', b'jane-image'), ('John Smith', b'john-image')]
+    assert all('If-None-Match' not in headers for headers in image_requests().values())
+    assert (tmp_path / cache.VALIDATORS).exists()
+
+def test_second_run_is_conditional(site: str, enrolled: List[List[Tuple[str, bytes]]], tmp_path: Any) -> None:
+    cache.cache_website(site, cache_dir=str(tmp_path)); Site.requests = []
+    summary: Mapping[str, int] = cache.cache_website(site, cache_dir=str(tmp_path))
+
+    assert summary == { 'downloaded': 0, 'failed': 0, 'unchanged': 2 }
+    assert enrolled[1] == [] and len(image_requests()) == 2
+    for headers in image_requests().values():
+        assert headers['If-None-Match'].startswith('"') and headers['If-Modified-Since'] == MODIFIED
+
+def test_missing_image_is_reported(site: str, tmp_path: Any) -> None:
+    with cache.Fetcher(cache_dir=str(tmp_path)) as fetcher:
+        results: List[Tuple[str, Any, Any]] = asyncio.run(fetcher.fetch_all([(site + 'images/Missing.JPG', False)], prnt=False))
+
+    assert results[0][1] is None and 'HTTPError' in results[0][2]
@@ -0,0 +1,67 @@
+import numpy as np, time # Default Python Libraries
+
+from client.camera import Camera # Camera Under Test
+from client.stream import StreamPipeline # Pipeline Reading From It
+
+from typing import Any, List, Mapping, Tuple # Type Hinting
+
+class FakeDevice:
+    """
+    Stands in for a cv2.VideoCapture, returning a new frame filled with its frame number every
+    [interval] seconds, like a camera running at 1 / [interval] fps.
+    """
+
+    def __init__(self: any, interval: float = 0.0, shape: Tuple[int, int, int] = (48, 64, 3)) -> 'FakeDevice':
+        self.interval: float = interval; self.shape: Tuple[int, int, int] = shape; self.frames: int = 0
+
+    def read(self: any) -> Tuple[bool, np.ndarray]:
+        if self.interval: time.sleep(self.interval)
+        self.frames += 1
+        return True, np.full(self.shape, self.frames % 256, dtype=np.uint8)
+
+    def isOpened(self: any) -> bool:
+        return True
+
+    def release(self: any) -> None:
+        pass
+
+def fake_camera(interval: float = 0.0, threaded: bool = False) -> Camera:
+    camera: Camera = Camera(0, threaded=threaded)
+    camera.device.release(); camera.device = FakeDevice(interval)
+    return camera
+
+def test_prepared_frames_are_never_reused() -> None:
+    camera: Camera = fake_camera()
+    frames: List[Tuple[np.ndarray, np.ndarray]] = [camera.prepare_read(0.5) for _ in range(20)]
+    kept: List[np.ndarray] = [prepared.copy() for _, prepared in frames]
+
+    for _ in range(20): camera.prepare_read(0.5)
+    assert all(np.array_equal(prepared, copy) for (_, prepared), copy in zip(frames, kept))
+    assert len({id(prepared) for _, prepared in frames}) == len(frames)
+
+def test_prepared_frame_is_resized() -> None:
+    camera: Camera = fake_camera()
+    image: np.ndarray; prepared: np.ndarray; image, prepared = camera.prepare_read(0.5)
+    assert image.shape == (48, 64, 3) and prepared.shape == (24, 32, 3)
+
+def test_fresh_reads_wait_for_a_new_frame() -> None:
+    with fake_camera(interval=0.02, threaded=True) as camera:
+        seqs: List[int] = []
+        for _ in range(5): camera.read_image(fresh=True); seqs.append(camera.seen)
+
+    assert seqs == sorted(set(seqs))
+
+def test_stream_captures_at_the_camera_rate() -> None:
+    analyzed: List[Tuple[np.ndarray, np.ndarray]] = []
+
+    def analyze(frame: Tuple[np.ndarray, np.ndarray]) -> Any:
+        copy: np.ndarray = frame[1].copy(); time.sleep(0.1)
+        analyzed.append((frame[1], copy))
+
+    with fake_camera(interval=1 / 30, threaded=True) as camera:
+        pipeline: StreamPipeline = StreamPipeline(lambda: camera.prepare_read(0.5, fresh=True), analyze, lambda *_: None)
+        stats: Mapping[str, int] = pipeline.run(duration=1.0)
+
+    # About 30 Frames Are Captured In A Second, Not Thousands Of Repeats Of The Same Few
+    assert stats['captured'] <= 40 and stats['dropped_frames'] <= stats['captured']
+    assert len(analyzed) > 0 and all(np.array_equal(frame, copy) for frame, copy in analyzed)
@@ -0,0 +1,60 @@
+import numpy as np, pytest # Default Python Libraries
+
+from client.gallery import Gallery # Gallery Searched By The Index
+from client.index import IVFIndex, exact_search # Index Under Test
+
+from typing import Any # Type Hinting
+
+def clustered(count: int, seed: int = 0) -> np.ndarray:
+    rng: np.random.Generator = np.random.default_rng(seed)
+    centers: np.ndarray = rng.normal(0.0, 0.3, (20, 128))
+    return centers[rng.integers(0, 20, count)] + rng.normal(0.0, 0.05, (count, 128))
+
+def ivf_gallery(count: int, min_size: int = 500, dtype: str = 'float32') -> Gallery:
+    gallery: Gallery = Gallery(index=IVFIndex(lists=16, probes=4, min_size=min_size), dtype=dtype)
+    gallery.extend([f'person {i}' for i in range(count)], clustered(count))
+    return gallery
+
+def assert_matches_exact(gallery: Gallery, queries: np.ndarray) -> None:
+    distances, rows = gallery.index.search(queries)
+    exact_distances, exact_rows = exact_search(gallery, queries)
+
+    assert np.array_equal(rows, exact_rows)
+    assert np.allclose(distances, exact_distances, atol=1e-4)
+
+def test_search_never_trains(monkeypatch: pytest.MonkeyPatch) -> None:
+    gallery: Gallery = ivf_gallery(1000)
+    assert gallery.index.centroids is not None and gallery.index.offsets is not None
+
+    def train(*args: Any, **kwargs: Any) -> None:
+        raise AssertionError('Trained while searching.')
+
+    monkeypatch.setattr(gallery.index, 'train', train)
+    gallery.index.search(clustered(10, seed=1))
+
+def test_search_is_exact_before_training() -> None:
+    gallery: Gallery = ivf_gallery(400)
+    assert gallery.index.centroids is None and gallery.index.offsets is None
+    assert_matches_exact(gallery, clustered(10, seed=1))
+
+    gallery.extend([f'late {i}' for i in range(200)], clustered(200, seed=2))
+    assert gallery.index.centroids is not None and gallery.index.trained_size == 600
+
+def test_clusters_are_contiguous_slices() -> None:
+    index: IVFIndex = ivf_gallery(1000).index
+    clusters: np.ndarray = index.assign[index.order]
+
+    assert np.all(np.diff(clusters) >= 0) and index.offsets[-1] == len(index.order)
+    assert np.array_equal(index.vectors, index.gallery.matrix[index.order])
+
+@pytest.mark.parametrize('dtype', ['float32', 'int8'])
+def test_search_follows_inserts_and_deletes(dtype: str) -> None:
+    gallery: Gallery = ivf_gallery(1000, dtype=dtype)
+    encodings: np.ndarray = clustered(300, seed=3)
+
+    for i in range(100): gallery.add(f'new {i}', encodings[i])
+    for i in range(0, 300, 3): del gallery[f'person {i}']
+    for i in range(100, 200): gallery[f'person {i}'] = encodings[i]
+
+    queries: np.ndarray = gallery.vectors(np.arange(0, gallery.size, 37))
+    assert_matches_exact(gallery, queries + np.random.default_rng(4).normal(0.0, 0.01, queries.shape))
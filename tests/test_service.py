@@ -0,0 +1,73 @@
+import numpy as np, threading, pytest, zmq # Default Python Libraries
+
+from client.service import RecognitionService, ServiceClient, encode_payload, load_test # Service Under Test
+
+from typing import Any, Iterator, List, Mapping, Tuple # Type Hinting
+
+class FakeClient:
+    """
+    Stands in for a `Client` without a camera, "recognizing" one face in every image, named after
+    the image's (uniform) pixel value, and recording the size of every batch it was given.
+    """
+
+    def __init__(self: any) -> 'FakeClient':
+        self.open: bool = False; self.scale_factor: float = 0.5; self.batches: List[int] = []
+
+    def analyze_batch(self: any, imgs: List[np.ndarray]) -> List[List[Tuple[str, Tuple[int, int, int, int]]]]:
+        self.batches.append(len(imgs))
+        return [[(f'p{int(img[0, 0, 0])}', (10, 20, 30, 40))] for img in imgs]
+
+def image(value: int) -> bytes:
+    return encode_payload(np.full((16, 16, 3), value, dtype=np.uint8), '.png')
+
+@pytest.fixture
+def service() -> Iterator[Tuple[RecognitionService, FakeClient]]:
+    client: FakeClient = FakeClient()
+    service: RecognitionService = RecognitionService(client, 'tcp://127.0.0.1:*', window=0.2, batch=8, context=zmq.Context())
+    service.bind(); thread: threading.Thread = threading.Thread(target=service.serve, daemon=True); thread.start()
+
+    yield service, client
+    service.stop(); thread.join(timeout=5.0); service.context.term()
+
+def test_concurrent_requests_are_batched(service: Tuple[RecognitionService, FakeClient]) -> None:
+    server: RecognitionService; client: FakeClient; server, client = service
+    replies: List[Mapping[str, Any]] = [None] * 8; barrier: threading.Barrier = threading.Barrier(8)
+
+    def work(i: int) -> None:
+        with ServiceClient(server.address, timeout=5.0, context=server.context) as requester:
+            barrier.wait(); replies[i] = requester.request('classify', img=image(i * 10))
+
+    threads: List[threading.Thread] = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+
+    assert sum(client.batches) == 8 and len(client.batches) < 8
+    for i, reply in enumerate(replies):
+        assert reply['ok'] and reply['names'] == [f'p{i * 10}']
+        assert reply['faces'] == [{ 'name': f'p{i * 10}', 'box': [20, 40, 60, 80] }]
+
+def test_load_test_over_loopback(service: Tuple[RecognitionService, FakeClient]) -> None:
+    server: RecognitionService; server, _ = service
+    result: Mapping[str, Any] = load_test(server.address, image(50), clients=4, requests=5)
+
+    assert result['requests'] == 20 and result['failed'] == 0
+    assert result['service']['batches'] < result['service']['requests']
+
+def test_unknown_command_is_an_error(service: Tuple[RecognitionService, FakeClient]) -> None:
+    server: RecognitionService; client: FakeClient; server, client = service
+
+    with ServiceClient(server.address, timeout=5.0, context=server.context) as requester:
+        reply: Mapping[str, Any] = requester.request('dance', img=image(1))
+
+    assert not reply['ok'] and 'Unknown command' in reply['error'] and client.batches == []
+
+def test_missing_image_is_an_error(service: Tuple[RecognitionService, FakeClient]) -> None:
+    server: RecognitionService; client: FakeClient; server, client = service
+
+    with ServiceClient(server.address, timeout=5.0, context=server.context) as requester:
+        classify: Mapping[str, Any] = requester.request('classify')
+        learn: Mapping[str, Any] = requester.request('learn', names=['someone'])
+        with pytest.raises(RuntimeError): requester.attendance()
+
+    assert not classify['ok'] and 'No image given' in classify['error']
+    assert not learn['ok'] and 'No image given' in learn['error'] and client.batches == []
@@ -0,0 +1,99 @@
+import numpy as np, pytest, os # Default Python Libraries
+
+from client import store # Store Layout & Open Stores
+from client.store import EncodingStore, open_store, upgrade_store, store_version # Encoding Store Under Test
+from client.gallery import parity # Lossy Gallery Checks
+
+from typing import Any, List, Tuple # Type Hinting
+
+def pairs(count: int, seed: int = 0) -> List[Tuple[str, np.ndarray]]:
+    rng: np.random.Generator = np.random.default_rng(seed)
+    return [(f'person {i}', rng.normal(0.0, 0.1, 128)) for i in range(count)]
+
+def write_v1(path: str, records: List[Tuple[str, np.ndarray]], dead: Tuple[int, ...] = ()) -> None:
+    """
+    Writes [records] as a version 1 store (float64 encodings, no model or checksum), with the
+    records at the indices in [dead] tombstoned.
+    """
+
+    header: np.ndarray = np.zeros(1, dtype=store.V1_HEADER_DTYPE)
+    header['magic'] = store.MAGIC; header['version'] = 1; header['dim'] = 128
+    header['count'] = len(records); header['capacity'] = len(records) + 4
+
+    rows: np.ndarray = np.zeros(len(records) + 4, dtype=[('alive', 'u1'), ('name', 'S63'), ('encoding', '<f8', (128,))])
+    for i, (name, encoding) in enumerate(records): rows[i] = (i not in dead, name.encode(), encoding)
+
+    with open(path, 'wb') as file: file.write(header.tobytes().ljust(store.HEADER_SIZE, b'\x00')); file.write(rows.tobytes())
+
+@pytest.fixture(autouse=True)
+def fresh_stores() -> None:
+    store.STORES.clear()
+
+def test_v1_store_is_upgraded(tmp_path: Any) -> None:
+    records: List[Tuple[str, np.ndarray]] = pairs(5); path: str = str(tmp_path / store.STORE_FILENAME)
+    write_v1(path, records, dead=(2,))
+
+    opened: EncodingStore = open_store(str(tmp_path))
+    assert store_version(path) == store.VERSION and opened.encoding_dtype == '<f4'
+    assert [name for name, _ in opened.items()] == [name for i, (name, _) in enumerate(records) if i != 2]
+    for name, encoding in opened.items():
+        assert np.array_equal(encoding, dict(records)[name].astype(np.float32).astype(np.float64))
+
+def test_upgrade_refuses_other_files(tmp_path: Any) -> None:
+    path: str = str(tmp_path / 'store'); EncodingStore(path).close()
+    with pytest.raises(OSError): upgrade_store(path)
+
+def test_corrupt_checksum_is_rejected(tmp_path: Any) -> None:
+    path: str = str(tmp_path / 'store'); created: EncodingStore = EncodingStore(path)
+    created.extend(pairs(3)); created.close()
+
+    with open(path, 'r+b') as file: file.seek(16); count: bytes = file.read(1); file.seek(16); file.write(bytes([count[0] ^ 1]))
+    with pytest.raises(OSError, match='corrupt header'): EncodingStore(path)
+
+def test_mismatches_are_rejected(tmp_path: Any) -> None:
+    path: str = str(tmp_path / 'store'); EncodingStore(path, dtype='<f8', model='small').close()
+
+    with pytest.raises(OSError, match='model'): EncodingStore(path, model='large')
+    with pytest.raises(OSError, match='length'): EncodingStore(path, dim=64, model='small')
+    assert EncodingStore(path, model='small').encoding_dtype == '<f8'
+
+    header: np.memmap = np.memmap(path, dtype=store.HEADER_DTYPE, mode='r+', shape=(1,))
+    header['dtype'] = b'<f2'; header['checksum'] = store.checksum(header); header.flush(); del header
+    with pytest.raises(OSError, match='dtype'): EncodingStore(path, model='small')
+
+def test_truncated_store_is_rejected(tmp_path: Any) -> None:
+    path: str = str(tmp_path / 'store'); EncodingStore(path, capacity=8).close()
+    with open(path, 'r+b') as file: file.truncate(os.path.getsize(path) // 2)
+    with pytest.raises(OSError, match='cut short'): EncodingStore(path)
+
+def test_non_finite_encodings_are_rejected(tmp_path: Any) -> None:
+    path: str = str(tmp_path / 'store'); opened: EncodingStore = EncodingStore(path)
+    with pytest.raises(ValueError): opened.extend([('nobody', np.full(128, np.nan))])
+
+    opened.extend(pairs(1)); opened.records['encoding'][0, 0] = np.inf
+    with pytest.raises(OSError, match='corrupt'): opened.get('person 0')
+
+def test_compact_keeps_live_rows(tmp_path: Any) -> None:
+    path: str = str(tmp_path / 'store'); opened: EncodingStore = EncodingStore(path, model='small')
+    records: List[Tuple[str, np.ndarray]] = pairs(6)
+    opened.extend(records); opened.extend([('person 1', records[0][1])], replace=True); opened.remove('person 3')
+    before: List[Tuple[str, np.ndarray]] = opened.items()
+
+    opened.compact(); opened.close()
+    reopened: EncodingStore = EncodingStore(path, model='small')
+    after: List[Tuple[str, np.ndarray]] = reopened.items()
+
+    assert reopened.count == len(before) == 5 and reopened.model == 'small'
+    assert sorted(name for name, _ in after) == sorted(name for name, _ in before)
+    assert all(np.array_equal(dict(before)[name], encoding) for name, encoding in after)
+    assert np.array_equal(reopened.get('person 1')[0], records[0][1].astype(np.float32))
+
+@pytest.mark.parametrize('dtype, max_error', [('float32', 1e-4), ('int8', 1e-2)])
+def test_lossy_galleries_match_float64(dtype: str, max_error: float) -> None:
+    rng: np.random.Generator = np.random.default_rng(0)
+    encodings: np.ndarray = rng.normal(0.0, 0.1, (2000, 128))
+    queries: np.ndarray = np.concatenate([encodings[:200] + rng.normal(0.0, 0.02, (200, 128)), rng.normal(0.0, 0.1, (50, 128))])
+
+    report: Any = parity(encodings, dtype, queries)
+    assert report['agreement'] >= 0.99 and report['max_error'] <= max_error
+    assert report['bytes'] < report['float64_bytes']